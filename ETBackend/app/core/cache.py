@@ -0,0 +1,200 @@
+"""Report, user and category caches.
+
+The report cache has two backends. The default keeps entries in each
+worker's memory. REPORT_CACHE_URL points all workers at one Redis-protocol
+server instead. Multi-worker deployments (uvicorn/gunicorn --workers N)
+should set REPORT_CACHE_URL. Report entries are keyed by the user's data
+version, so an in-process entry cannot be served after the user writes,
+even from a worker that never saw the write. But each worker then computes
+and holds its own copy, and a write only frees memory on the worker that
+handled it.
+
+user_cache and category_cache are always per-process. Their staleness
+across workers is bounded by their TTLs.
+"""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# redis://host:6379/0 (needs the `redis` package); unset keeps reports in each worker's memory
+REPORT_CACHE_URL = os.getenv("REPORT_CACHE_URL")
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", "300"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "10000"))
+# Authenticated-user lookups; a TTL of 0 disables the cache
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Custom categories per user; see crud/categories.py for how staleness is bounded
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "60"))
+CATEGORY_CACHE_MAX_ENTRIES = int(os.getenv("CATEGORY_CACHE_MAX_ENTRIES", "10000"))
+# How often each worker reloads the shared system category catalog
+SYSTEM_CATEGORY_REFRESH_SECONDS = float(os.getenv("SYSTEM_CATEGORY_REFRESH_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Bounded in-process mapping with a per-entry TTL.
+
+    Least recently used entries are evicted past max_entries; on_evict is
+    called with the key of every entry dropped for age or size.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+
+class LRUCacheBackend:
+    """In-process report cache with TTL and size-bound eviction."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._entries = LRUCache(max_entries, ttl, on_evict=self._forget)
+        self._user_keys = {}
+
+    async def get(self, user_id: int, key: str) -> Optional[Any]:
+        return self._entries.get((user_id, key))
+
+    async def set(self, user_id: int, key: str, value: Any):
+        self._user_keys.setdefault(user_id, set()).add(key)
+        self._entries.set((user_id, key), value)
+
+    async def invalidate(self, user_id: int):
+        for key in self._user_keys.pop(user_id, ()):
+            self._entries.pop((user_id, key))
+
+    def _forget(self, entry_key):
+        user_id, key = entry_key
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+
+class RedisCacheBackend:
+    """Out-of-process cache on any Redis-protocol server (Redis, Valkey, KeyDB...).
+
+    Each user's entries live in one hash so invalidation is a single DEL.
+    Errors are logged and treated as misses; the cache never fails a request.
+    """
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis
+        self.ttl = ttl
+        self._client = redis.from_url(url)
+
+    @staticmethod
+    def _hash_key(user_id: int) -> str:
+        return f"reports:{user_id}"
+
+    async def get(self, user_id: int, key: str) -> Optional[Any]:
+        try:
+            raw = await self._client.hget(self._hash_key(user_id), key)
+        except Exception:
+            logger.warning("Report cache read failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if entry["expires_at"] < time.time():
+            return None
+        return entry["value"]
+
+    async def set(self, user_id: int, key: str, value: Any):
+        entry = json.dumps({"expires_at": time.time() + self.ttl, "value": value})
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.hset(self._hash_key(user_id), key, entry)
+                pipe.expire(self._hash_key(user_id), self.ttl)
+                await pipe.execute()
+        except Exception:
+            logger.warning("Report cache write failed", exc_info=True)
+
+    async def invalidate(self, user_id: int):
+        try:
+            await self._client.delete(self._hash_key(user_id))
+        except Exception:
+            logger.warning("Report cache invalidation failed", exc_info=True)
+
+
+class ReportCache:
+    """Report results keyed by the user's data version (users.sync_version).
+
+    Callers read the version from the primary, so an entry computed before
+    the user's latest write never matches, whichever worker cached it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def make_key(endpoint: str, version: int, start: Optional[datetime], end: Optional[datetime]) -> str:
+        start_part = start.isoformat() if start else "-"
+        end_part = end.isoformat() if end else "-"
+        return f"{endpoint}@{version}:{start_part}:{end_part}"
+
+    async def get(self, user_id: int, version: int, endpoint: str, start: Optional[datetime], end: Optional[datetime]):
+        return await self.backend.get(user_id, self.make_key(endpoint, version, start, end))
+
+    async def set(self, user_id: int, version: int, endpoint: str, start: Optional[datetime], end: Optional[datetime], value: Any):
+        await self.backend.set(user_id, self.make_key(endpoint, version, start, end), value)
+
+    async def invalidate_user(self, user_id: int):
+        await self.backend.invalidate(user_id)
+
+
+def _create_backend():
+    if REPORT_CACHE_URL:
+        return RedisCacheBackend(REPORT_CACHE_URL, REPORT_CACHE_TTL)
+    # uvicorn and gunicorn both take their default worker count from WEB_CONCURRENCY
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning("REPORT_CACHE_URL is not set; each of the %s workers keeps its own report cache", os.getenv("WEB_CONCURRENCY"))
+    return LRUCacheBackend(REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_TTL)
+
+
+report_cache = ReportCache(_create_backend())
+# Per-process; keyed by user id and holding column snapshots, not live ORM objects
+user_cache = LRUCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+# Per-process; keyed by user id and holding immutable CategorySet snapshots
+category_cache = LRUCache(CATEGORY_CACHE_MAX_ENTRIES, CATEGORY_CACHE_TTL)
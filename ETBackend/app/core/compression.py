@@ -0,0 +1,153 @@
+"""Response compression: brotli when the client takes it, gzip otherwise.
+
+Bodies under COMPRESSION_MIN_BYTES go out as they are; small JSON gains
+little and costs CPU on both ends. Streaming responses (exports, import
+progress) are compressed chunk by chunk and flushed, so clients still see
+each chunk as it is produced. Content that is already compressed (images,
+PDFs, Parquet) is left alone, as are Range responses.
+
+A plain ASGI wrapper around `send`, using only zlib, the optional `brotli`
+package and Starlette's public header classes; without brotli only gzip is
+offered.
+"""
+import os
+import zlib
+from typing import Optional
+import anyio.to_thread
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Tuned for dynamic responses: close to the best ratio at a fraction of the CPU of level 9 / quality 11
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Chunks at least this big are compressed on a worker thread instead of the event loop
+THREAD_MIN_BYTES = 128 * 1024
+
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream", "image/", "video/", "audio/",
+    "application/pdf", "application/zip", "application/gzip", "application/vnd.apache.parquet",
+)
+
+def preferred_encoding(accept_encoding: str) -> Optional[str]:
+    """The best coding we support from an Accept-Encoding header, or None for identity."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    # Ties go to brotli, which compresses JSON noticeably better
+    ranked = sorted(supported, key=lambda coding: -weights.get(coding, weights.get("*", 0.0)))
+    best = ranked[0]
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+class GzipCompressor:
+    def __init__(self, level: int = GZIP_LEVEL):
+        # wbits 31: a gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        data = self._compressor.compress(body)
+        return data + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class BrotliCompressor:
+    def __init__(self, quality: int = BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality, mode=brotli.MODE_TEXT)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        data = self._compressor.process(body)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+COMPRESSORS = {"gzip": GzipCompressor, "br": BrotliCompressor}
+
+class _Responder:
+    """Wraps one response's `send`, deciding on compression at the first body chunk."""
+
+    def __init__(self, send, encoding: Optional[str], minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = encoding is None
+
+    async def __call__(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            # Even uncompressed answers vary by Accept-Encoding, so caches keep encodings apart
+            headers.add_vary_header("Accept-Encoding")
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers or "content-range" in headers
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            ):
+                self.passthrough = True
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._flush_start()
+                await self.send(message)
+                self.passthrough = True
+                return
+            self.compressor = COMPRESSORS[self.encoding]()
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["content-length"]
+                await self._flush_start()
+            else:
+                compressed = await self._compress(body, final=True)
+                headers["Content-Length"] = str(len(compressed))
+                await self._flush_start()
+                await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+        await self.send({"type": "http.response.body", "body": await self._compress(body, not more_body), "more_body": more_body})
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MIN_BYTES:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
+
+    async def _flush_start(self):
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = preferred_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _Responder(send, encoding, self.minimum_size))
@@ -0,0 +1,34 @@
+"""Conditional GET helpers: ETags and 304 Not Modified.
+
+Collection endpoints tag their responses with the user's data version
+(users.sync_version), which every write to synced data bumps. Checking a
+client's If-None-Match therefore costs one primary-key read, and an
+unchanged collection is answered with a 304 before the list query runs.
+The tags are weak: the compression middleware may re-encode the body.
+"""
+from fastapi import Request, Response
+
+# Per-user data: clients may keep it but must revalidate; shared caches must not
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+def data_etag(collection: str, user_id: int, version: int) -> str:
+    return f'W/"{collection}-{user_id}-{version}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and etag_matches(if_none_match, etag)
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE})
+
+def tag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    return response
@@ -0,0 +1,127 @@
+"""ASGI middleware that times every request and charges SQL work to it.
+
+Each response carries a Server-Timing header splitting its time into SQL,
+pool wait and everything else (handler code and serialization), and the
+same numbers feed the per-route histograms in app.core.metrics.
+
+Setting PROFILE_DIR turns on sampled profiling: PROFILE_SAMPLE_RATE of
+requests run under cProfile, and those that take longer than
+PROFILE_MIN_MS are written to PROFILE_DIR as .prof files (open them with
+snakeviz or `python -m pstats`). One request is profiled at a time; the
+profile also sees whatever else the event loop ran meanwhile.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from app.core import metrics
+
+load_dotenv()
+
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_MIN_SECONDS = float(os.getenv("PROFILE_MIN_MS", "500")) / 1000
+# Requests slower than this are logged with their SQL/pool breakdown; 0 disables
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_MS", "1000")) / 1000
+
+logger = logging.getLogger(__name__)
+
+_profiling = False
+
+def route_label(scope) -> str:
+    # The route template, never the raw path, so ids do not explode the label set.
+    # FastAPI versions that keep included routers nested leave only the route's
+    # own path in scope["route"]; the prefixed template is on the route context.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "<unmatched>"
+
+def _start_profiler():
+    global _profiling
+    if not PROFILE_DIR or _profiling or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    _profiling = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+async def _finish_profiler(profiler, elapsed: float, method: str, route: str):
+    global _profiling
+    profiler.disable()
+    _profiling = False
+    if elapsed < PROFILE_MIN_SECONDS:
+        return
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{method}-{slug}-{int(elapsed * 1000)}ms.prof"
+    try:
+        await run_in_threadpool(os.makedirs, PROFILE_DIR, exist_ok=True)
+        await run_in_threadpool(profiler.dump_stats, os.path.join(PROFILE_DIR, name))
+        metrics.profiles_written.inc()
+    except OSError:
+        logger.warning("Could not write profile %s", name, exc_info=True)
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+        finished = None
+        profiler = _start_profiler()
+
+        async def send_with_timing(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                db_ms = stats.query_seconds * 1000
+                pool_ms = stats.pool_wait_seconds * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={db_ms:.1f};desc=\"{stats.queries} queries\", pool;dur={pool_ms:.1f}, "
+                    f"app;dur={max(elapsed_ms - db_ms - pool_ms, 0):.1f}, total;dur={elapsed_ms:.1f}",
+                )
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background tasks run after this, still inside the app call; they are not the client's wait
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = (finished or time.perf_counter()) - started
+            metrics.current_request.reset(token)
+            method = scope["method"]
+            route = route_label(scope)
+            metrics.http_request_duration.observe(elapsed, method, route)
+            metrics.http_responses.inc(method, route, str(status))
+            metrics.http_request_db_seconds.observe(stats.query_seconds, method, route)
+            metrics.http_request_db_queries.observe(stats.queries, method, route)
+            metrics.http_request_pool_wait_seconds.observe(stats.pool_wait_seconds, method, route)
+
+            repeated = stats.repeated_statements()
+            if repeated:
+                metrics.db_n_plus_one.inc(method, route)
+                statement, count = repeated[0]
+                logger.warning("Possible N+1 on %s %s: %d runs of %s", method, route, count, " ".join(statement.split())[:200])
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS:
+                logger.warning(
+                    "Slow request %s %s: %.0f ms total, %.0f ms in %d queries, %.0f ms pool wait",
+                    method, route, elapsed * 1000, stats.query_seconds * 1000, stats.queries, stats.pool_wait_seconds * 1000,
+                )
+            if profiler is not None:
+                await _finish_profiler(profiler, elapsed, method, route)
@@ -0,0 +1,180 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters and histograms live in this process only; every worker exposes
+its own on /metrics and Prometheus sums them. Per-request database
+statistics ride on a context variable set by the instrumentation
+middleware, which SQLAlchemy's engine events can see because the async
+driver runs them in the request's own context.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as TallyCounter
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+load_dotenv()
+
+# Same statement this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+logger = logging.getLogger(__name__)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_number(value)}"
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(label_values, list(counts), total) for label_values, (counts, total) in self._series.items()]
+        for label_values, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_label = 'le="' + le + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, bucket_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}"
+
+def render_gauge(name: str, help_text: str, samples: Dict[Tuple[Tuple[str, str], ...], float]) -> Iterable[str]:
+    """Gauge lines for values read at scrape time; samples maps ((label, value), ...) to a number."""
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} gauge"
+    for labels, value in samples.items():
+        names = tuple(label for label, _ in labels)
+        values = tuple(label_value for _, label_value in labels)
+        yield f"{name}{_format_labels(names, values)} {_number(value)}"
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.", ("method", "route"))
+http_responses = Counter("http_responses_total", "Responses sent, by status code.", ("method", "route", "status"))
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"))
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), buckets=QUERY_COUNT_BUCKETS)
+http_request_pool_wait_seconds = Histogram(
+    "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request.", ("method", "route"))
+db_n_plus_one = Counter(
+    "db_n_plus_one_total", f"Requests that ran one statement at least {N_PLUS_ONE_THRESHOLD} times.", ("method", "route"))
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement execution time.", ("engine",))
+db_pool_wait = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.", ("engine",))
+profiles_written = Counter("profiles_written_total", "Slow-request profiles written to disk.")
+
+REGISTRY = (
+    http_request_duration,
+    http_responses,
+    http_request_db_seconds,
+    http_request_db_queries,
+    http_request_pool_wait_seconds,
+    db_n_plus_one,
+    db_query_duration,
+    db_pool_wait,
+    profiles_written,
+)
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+class RequestStats:
+    """SQL work done on behalf of one request."""
+
+    __slots__ = ("queries", "query_seconds", "pool_wait_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements = TallyCounter()
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def record_pool_wait(engine_name: str, seconds: float):
+    db_pool_wait.observe(seconds, engine_name)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+def instrument_engine(engine, engine_name: str):
+    """Time every statement on `engine` and charge it to the current request."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        took = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(took, engine_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += took
+            # Bound parameters keep the text identical across N+1 repeats
+            stats.statements[statement] += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -0,0 +1,26 @@
+"""JSON responses rendered with orjson.
+
+ORJSONResponse is the app's default response class, installed as a
+Default() so recent FastAPI still encodes response_model routes straight
+through Pydantic. Everything else is encoded by orjson, which handles
+datetimes and enums natively and is several times faster than the stdlib
+json module: plain dict responses, response_model routes on older FastAPI,
+and the hot list endpoints, which skip Pydantic altogether and return rows
+shaped by app.schemas.rows. Without orjson installed it falls back to
+jsonable_encoder and the stdlib encoder.
+"""
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        # UTC as "Z", the way Pydantic writes it, so both paths produce the same JSON
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z)
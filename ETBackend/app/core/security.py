@@ -1,7 +1,13 @@
 from datetime import datetime, timedelta
 from typing import Any, Union
+from concurrent.futures import ThreadPoolExecutor
 from jose import jwt
 from passlib.context import CryptContext
+from fastapi import HTTPException, Request, status
+import asyncio
+import hmac
+import logging
+import time
 import os
 from dotenv import load_dotenv
 
@@ -11,6 +17,14 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-goes-here-make-it-long-and
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+# bcrypt runs on its own threads; 0 workers hashes inline on the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# /internal/* and /metrics: off unless enabled, and always bearer-token protected; enabled without INTERNAL_TOKEN stays off
+INTERNAL_ENDPOINTS_ENABLED = os.getenv("INTERNAL_ENDPOINTS_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN") or None
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -20,6 +34,96 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    pass
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    Calls beyond max_pending (queued plus running) are rejected with
+    PasswordHasherBusy instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    @staticmethod
+    def _timed(fn, args, submitted_at):
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started - submitted_at, time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            submitted_at = time.perf_counter()
+            if self.workers <= 0:
+                result, waited, took = self._timed(fn, args, submitted_at)
+            else:
+                loop = asyncio.get_running_loop()
+                result, waited, took = await loop.run_in_executor(self._pool(), self._timed, fn, args, submitted_at)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self.wait_seconds += waited
+        self.hash_seconds += took
+        self.max_hash_seconds = max(self.max_hash_seconds, took)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "hash_seconds_total": round(self.hash_seconds, 6),
+            "hash_seconds_max": round(self.max_hash_seconds, 6),
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+def check_internal_access_settings():
+    if INTERNAL_ENDPOINTS_ENABLED and INTERNAL_TOKEN is None:
+        logger.error("INTERNAL_ENDPOINTS_ENABLED is set without INTERNAL_TOKEN; /internal and /metrics stay disabled")
+
+async def require_internal_access(request: Request):
+    """Dependency for operational endpoints: 404 while disabled, 401 without the token."""
+    # Fail closed: without a token there is nothing to check callers against
+    if not INTERNAL_ENDPOINTS_ENABLED or INTERNAL_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {INTERNAL_TOKEN}".encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
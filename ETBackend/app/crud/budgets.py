@@ -1,22 +1,51 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.models import Budget
+from sqlalchemy import and_, func
+from app.models.models import Budget, Category, MonthlyCategoryTotal, TransactionType
 from app.schemas.schemas import BudgetCreate
+from app.schemas import rows as row_serializers
+from app.crud import sync
+from app.core.cache import report_cache
 
 async def get_budgets(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Budget).filter(Budget.user_id == user_id))
-    return result.scalars().all()
+    # Column tuples for app.schemas.rows.budget
+    result = await db.execute(select(*row_serializers.budget.columns).filter(Budget.user_id == user_id))
+    return result.all()
 
 async def create_budget(db: AsyncSession, budget: BudgetCreate, user_id: int):
     db_budget = Budget(
         **budget.dict(),
-        user_id=user_id
+        user_id=user_id,
+        version=await sync.next_version(db, user_id)
     )
     db.add(db_budget)
     await db.commit()
+    await report_cache.invalidate_user(user_id)
     await db.refresh(db_budget)
     return db_budget
 
 async def get_budget(db: AsyncSession, budget_id: int, user_id: int):
     result = await db.execute(select(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id))
     return result.scalars().first()
+
+async def get_budget_progress(db: AsyncSession, user_id: int, year: int, month: int):
+    """(Budget, category name, category icon, spent) for every budget of the month, in one query.
+
+    Spend comes from the monthly rollup, which already holds one row per
+    (user, month, category, type), so no transaction rows are read.
+    """
+    spent = func.coalesce(MonthlyCategoryTotal.total, 0.0)
+    result = await db.execute(
+        select(Budget, Category.name, Category.icon, spent)
+        .join(Category, Category.id == Budget.category_id)
+        .outerjoin(MonthlyCategoryTotal, and_(
+            MonthlyCategoryTotal.user_id == Budget.user_id,
+            MonthlyCategoryTotal.year == Budget.year,
+            MonthlyCategoryTotal.month == Budget.month,
+            MonthlyCategoryTotal.category_id == Budget.category_id,
+            MonthlyCategoryTotal.type == TransactionType.EXPENSE
+        ))
+        .filter(Budget.user_id == user_id, Budget.year == year, Budget.month == month)
+        .order_by(Budget.id)
+    )
+    return result.all()
@@ -1,27 +1,114 @@
+"""Categories: a shared catalog of system categories plus each user's own.
+
+System categories (user_id NULL) are the same for everyone and change only
+through migrations and seeding, so every worker keeps them in one immutable
+CategorySet and reloads it every SYSTEM_CATEGORY_REFRESH_SECONDS. A reload
+that finds different rows gets a new digest, which the categories ETag
+includes.
+
+Each user's custom categories are cached as a CategorySet in
+category_cache. Writes in this worker drop the entry. Writes in other
+workers are caught three ways: the list endpoint passes the user's
+sync_version and reloads a snapshot taken at another version; a lookup for
+an id the snapshot lacks reloads once before giving up; and entries expire
+after CATEGORY_CACHE_TTL.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_
 from app.models.models import Category
 from app.schemas.schemas import CategoryCreate
+from app.schemas import rows as row_serializers
+from app.crud import sync
+from app.core.cache import report_cache, category_cache, SYSTEM_CATEGORY_REFRESH_SECONDS
+
+@dataclass(frozen=True)
+class CategorySet:
+    """Id-ordered category rows (column tuples for app.schemas.rows.category) and a by-id view."""
+    rows: Tuple[Any, ...]
+    by_id: Mapping[int, Any]
+    # The user's sync_version when loaded, if the caller knew it
+    version: Optional[int] = None
+    loaded_at: float = 0.0
+    digest: str = ""
+
+    @classmethod
+    def from_rows(cls, rows: Iterable, version: Optional[int] = None) -> "CategorySet":
+        rows = tuple(rows)
+        digest = hashlib.sha1(repr(rows).encode()).hexdigest()[:12]
+        return cls(rows, MappingProxyType({row.id: row for row in rows}), version, time.monotonic(), digest)
+
+_system_catalog: Optional[CategorySet] = None
+
+async def _load(db: AsyncSession, user_id: Optional[int], version: Optional[int] = None) -> CategorySet:
+    result = await db.execute(
+        select(*row_serializers.category.columns).filter(Category.user_id == user_id).order_by(Category.id)
+    )
+    return CategorySet.from_rows(result.all(), version)
+
+async def get_system_categories(db: AsyncSession) -> CategorySet:
+    global _system_catalog
+    catalog = _system_catalog
+    if catalog is None or time.monotonic() - catalog.loaded_at >= SYSTEM_CATEGORY_REFRESH_SECONDS:
+        # Swapped whole, so readers holding the old snapshot are unaffected
+        catalog = _system_catalog = await _load(db, None)
+    return catalog
+
+def refresh_system_categories():
+    """Reload the catalog on next use; for code in this process that changes system categories."""
+    global _system_catalog
+    _system_catalog = None
+
+async def get_custom_categories(db: AsyncSession, user_id: int, version: Optional[int] = None, reload: bool = False) -> CategorySet:
+    custom = category_cache.get(user_id)
+    if reload or custom is None or (version is not None and custom.version != version):
+        custom = await _load(db, user_id, version)
+        category_cache.set(user_id, custom)
+    return custom
+
+async def get_categories(db: AsyncSession, user_id: int, version: Optional[int] = None):
+    """System categories then the user's own, as column tuples; pass the user's sync_version for an exact answer."""
+    system = await get_system_categories(db)
+    custom = await get_custom_categories(db, user_id, version)
+    return system.rows + custom.rows
 
-async def get_categories(db: AsyncSession, user_id: int):
-    # Get system categories (user_id is None) and user's custom categories
-    result = await db.execute(select(Category).filter(or_(Category.user_id == user_id, Category.user_id == None)))
-    return result.scalars().all()
+async def get_category_ids(db: AsyncSession, user_id: int, wanted: Iterable[int] = (), reload: bool = False) -> set:
+    """Ids of every category the user may use, reloading their own once if any of `wanted` is missing."""
+    system = await get_system_categories(db)
+    custom = await get_custom_categories(db, user_id, reload=reload)
+    ids = system.by_id.keys() | custom.by_id.keys()
+    if not ids.issuperset(wanted):
+        custom = await get_custom_categories(db, user_id, reload=True)
+        ids = system.by_id.keys() | custom.by_id.keys()
+    return ids
 
 async def create_category(db: AsyncSession, category: CategoryCreate, user_id: int):
     db_category = Category(
         **category.dict(),
-        user_id=user_id
+        user_id=user_id,
+        version=await sync.next_version(db, user_id)
     )
     db.add(db_category)
     await db.commit()
+    category_cache.pop(user_id)
+    await report_cache.invalidate_user(user_id)
     await db.refresh(db_category)
     return db_category
 
 async def get_category(db: AsyncSession, category_id: int, user_id: int):
-    result = await db.execute(select(Category).filter(Category.id == category_id, or_(Category.user_id == user_id, Category.user_id == None)))
-    return result.scalars().first()
+    """A system category or one of the user's own, as a column tuple, or None."""
+    system = await get_system_categories(db)
+    if category_id in system.by_id:
+        return system.by_id[category_id]
+    custom = await get_custom_categories(db, user_id)
+    if category_id not in custom.by_id:
+        # Possibly created through another worker since this snapshot was taken
+        custom = await get_custom_categories(db, user_id, reload=True)
+    return custom.by_id.get(category_id)
 
 async def update_category(db: AsyncSession, category_id: int, category: CategoryCreate, user_id: int):
     result = await db.execute(select(Category).filter(Category.id == category_id, Category.user_id == user_id))
@@ -31,8 +118,11 @@ async def update_category(db: AsyncSession, category_id: int, category: Category
     
     for key, value in category.dict().items():
         setattr(db_category, key, value)
+    db_category.version = await sync.next_version(db, user_id)
     
     await db.commit()
+    category_cache.pop(user_id)
+    await report_cache.invalidate_user(user_id)
     await db.refresh(db_category)
     return db_category
 
@@ -42,6 +132,10 @@ async def delete_category(db: AsyncSession, category_id: int, user_id: int):
     if not db_category:
         return False
     
+    version = await sync.next_version(db, user_id)
+    await sync.record_deletion(db, user_id, "categories", category_id, version)
     await db.delete(db_category)
     await db.commit()
+    category_cache.pop(user_id)
+    await report_cache.invalidate_user(user_id)
     return True
@@ -0,0 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from app.models.models import JobLease
+from datetime import datetime, timedelta
+from typing import Optional
+
+# A job runs on whichever worker wins the conditional UPDATE below. The row
+# lock taken by that UPDATE is what makes the claim exclusive; expires_at only
+# decides when a crashed owner's claim can be taken over.
+
+async def acquire_lease(db: AsyncSession, name: str, owner: str, ttl: timedelta, now: Optional[datetime] = None) -> bool:
+    """Claim job `name` if it is due and nobody holds a live lease on it."""
+    now = now or datetime.utcnow()
+    claim = update(JobLease).where(
+        JobLease.name == name,
+        or_(JobLease.expires_at == None, JobLease.expires_at < now, JobLease.owner == owner),
+        or_(JobLease.next_due_at == None, JobLease.next_due_at <= now)
+    ).values(
+        owner=owner,
+        expires_at=now + ttl,
+        last_started_at=now
+    )
+    result = await db.execute(claim)
+    if result.rowcount == 0:
+        await db.rollback()
+        if not await _create_lease_row(db, name):
+            return False
+        result = await db.execute(claim)
+        if result.rowcount == 0:
+            await db.rollback()
+            return False
+
+    # Lag: how long after it fell due the job actually started
+    result = await db.execute(select(JobLease).filter(JobLease.name == name))
+    lease = result.scalar_one()
+    lease.last_lag_seconds = (now - lease.next_due_at).total_seconds() if lease.next_due_at else 0.0
+    await db.commit()
+    return True
+
+async def _create_lease_row(db: AsyncSession, name: str) -> bool:
+    # First run of a job anywhere: create its row, losing races gracefully
+    existing = await db.execute(select(JobLease.name).filter(JobLease.name == name))
+    if existing.scalar_one_or_none() is not None:
+        return False
+    db.add(JobLease(name=name))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+    return True
+
+async def renew_lease(db: AsyncSession, name: str, owner: str, ttl: timedelta) -> bool:
+    result = await db.execute(
+        update(JobLease).where(JobLease.name == name, JobLease.owner == owner)
+        .values(expires_at=datetime.utcnow() + ttl)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+async def release_lease(db: AsyncSession, name: str, owner: str, next_due_at: Optional[datetime], duration: float, error: Optional[str] = None):
+    """Give the job back; next_due_at None keeps it due so another worker retries it."""
+    values = {
+        "owner": None,
+        "expires_at": None,
+        "last_finished_at": datetime.utcnow(),
+        "last_duration_seconds": duration,
+        "last_error": error,
+        "run_count": JobLease.run_count + 1,
+    }
+    if next_due_at is not None:
+        values["next_due_at"] = next_due_at
+    await db.execute(update(JobLease).where(JobLease.name == name, JobLease.owner == owner).values(**values))
+    await db.commit()
+
+async def get_leases(db: AsyncSession):
+    result = await db.execute(select(JobLease).order_by(JobLease.name))
+    return result.scalars().all()
@@ -0,0 +1,288 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, extract, delete, update, insert
+from app.models.models import MonthlyCategoryTotal, Transaction, TransactionType, Category
+from app.utils.dates import naive_utc
+from datetime import datetime
+from typing import Optional
+
+# Maintenance: keep monthly_category_totals in step with live transactions
+
+async def _upsert_delta(db: AsyncSession, key: dict, amount: float, count: int):
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(MonthlyCategoryTotal).values(**key, total=amount, count=count)
+        stmt = stmt.on_duplicate_key_update(
+            total=MonthlyCategoryTotal.total + amount,
+            count=MonthlyCategoryTotal.count + count
+        )
+        await db.execute(stmt)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(MonthlyCategoryTotal).values(**key, total=amount, count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key.keys()),
+            set_={"total": MonthlyCategoryTotal.total + amount, "count": MonthlyCategoryTotal.count + count}
+        )
+        await db.execute(stmt)
+    else:
+        result = await db.execute(
+            update(MonthlyCategoryTotal)
+            .filter_by(**key)
+            .values(total=MonthlyCategoryTotal.total + amount, count=MonthlyCategoryTotal.count + count)
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(MonthlyCategoryTotal).values(**key, total=amount, count=count))
+
+async def apply_transaction(db: AsyncSession, user_id: int, category_id: int, type: TransactionType, amount: float, date: datetime, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one transaction from its month bucket.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    if date is None:
+        return
+    key = {
+        "user_id": user_id,
+        "year": date.year,
+        "month": date.month,
+        "category_id": category_id,
+        "type": type,
+    }
+    await _upsert_delta(db, key, sign * amount, sign)
+
+async def apply_user_deltas(db: AsyncSession, deltas: dict):
+    """Apply {(user_id, year, month, category_id, type): (amount, count)} in one multi-row upsert."""
+    rows = [
+        {"user_id": user_id, "year": year, "month": month, "category_id": category_id, "type": type, "total": amount, "count": count}
+        for (user_id, year, month, category_id, type), (amount, count) in deltas.items()
+        if amount != 0 or count != 0
+    ]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(MonthlyCategoryTotal).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            total=MonthlyCategoryTotal.total + stmt.inserted.total,
+            count=MonthlyCategoryTotal.count + stmt.inserted.count
+        )
+        await db.execute(stmt)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(MonthlyCategoryTotal).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "year", "month", "category_id", "type"],
+            set_={"total": MonthlyCategoryTotal.total + stmt.excluded.total, "count": MonthlyCategoryTotal.count + stmt.excluded.count}
+        )
+        await db.execute(stmt)
+    else:
+        for row in rows:
+            amount, count = row.pop("total"), row.pop("count")
+            await _upsert_delta(db, row, amount, count)
+
+async def apply_deltas(db: AsyncSession, user_id: int, deltas: dict):
+    """Apply {(year, month, category_id, type): (amount, count)} for one user."""
+    await apply_user_deltas(db, {(user_id,) + key: value for key, value in deltas.items()})
+
+def collect_delta(deltas: dict, category_id: int, type: TransactionType, amount: float, date: datetime, sign: int = 1):
+    if date is None:
+        return
+    key = (date.year, date.month, category_id, type)
+    total, count = deltas.get(key, (0.0, 0))
+    deltas[key] = (total + sign * amount, count + sign)
+
+async def apply_rows(db: AsyncSession, user_id: int, rows):
+    """Add many new transaction rows (dicts) with one upsert per month bucket."""
+    deltas = {}
+    for row in rows:
+        collect_delta(deltas, row["category_id"], row["type"], row["amount"], row["date"])
+    await apply_deltas(db, user_id, deltas)
+
+async def add_transaction(db: AsyncSession, db_transaction: Transaction):
+    await apply_transaction(db, db_transaction.user_id, db_transaction.category_id, db_transaction.type, db_transaction.amount, db_transaction.date, 1)
+
+async def remove_transaction(db: AsyncSession, db_transaction: Transaction):
+    await apply_transaction(db, db_transaction.user_id, db_transaction.category_id, db_transaction.type, db_transaction.amount, db_transaction.date, -1)
+
+async def rebuild_monthly_totals(db: AsyncSession, user_id: Optional[int] = None):
+    """Recompute the rollup from raw transactions, for one user or everyone."""
+    clear = delete(MonthlyCategoryTotal)
+    if user_id is not None:
+        clear = clear.filter(MonthlyCategoryTotal.user_id == user_id)
+    await db.execute(clear)
+
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    source = select(
+        Transaction.user_id, year, month, Transaction.category_id, Transaction.type,
+        func.sum(Transaction.amount), func.count(Transaction.id)
+    ).filter(
+        Transaction.is_deleted == False,
+        Transaction.date != None
+    ).group_by(Transaction.user_id, year, month, Transaction.category_id, Transaction.type)
+    if user_id is not None:
+        source = source.filter(Transaction.user_id == user_id)
+
+    await db.execute(
+        insert(MonthlyCategoryTotal).from_select(
+            ["user_id", "year", "month", "category_id", "type", "total", "count"], source
+        )
+    )
+    await db.commit()
+
+# Reads: whole months come from the rollup, partial-month edges from raw rows
+
+def _month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(dt: datetime) -> datetime:
+    return dt.replace(year=dt.year + dt.month // 12, month=dt.month % 12 + 1)
+
+def _month_index(dt: datetime) -> int:
+    return dt.year * 12 + dt.month
+
+def split_range(start: Optional[datetime], end: Optional[datetime]):
+    """Split the inclusive range [start, end] into whole months and raw edges.
+
+    Returns (months, edges). months is (first, last) as year*12+month indices,
+    either side None when open-ended, or None when no whole month is covered.
+    Each edge is (ge, lt, le) bounds for a raw Transaction.date filter.
+    Aware bounds are converted to naive UTC, the way dates are stored.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    first_full = start
+    if start is not None and start != _month_start(start):
+        first_full = _next_month(_month_start(start))
+    # end is inclusive, so the month containing it is always partial
+    last_full_end = _month_start(end) if end is not None else None
+
+    if first_full is not None and last_full_end is not None and first_full >= last_full_end:
+        return None, [(start, None, end)]
+
+    edges = []
+    if start is not None and start != first_full:
+        edges.append((start, first_full, None))
+    if end is not None:
+        edges.append((last_full_end, None, end))
+
+    months = (
+        _month_index(first_full) if first_full is not None else None,
+        _month_index(last_full_end) - 1 if last_full_end is not None else None,
+    )
+    return months, edges
+
+def _filter_months(query, months):
+    first, last = months
+    index = MonthlyCategoryTotal.year * 12 + MonthlyCategoryTotal.month
+    if first is not None:
+        query = query.filter(index >= first)
+    if last is not None:
+        query = query.filter(index <= last)
+    return query
+
+def _filter_edge(query, edge):
+    ge, lt, le = edge
+    if ge is not None:
+        query = query.filter(Transaction.date >= ge)
+    if lt is not None:
+        query = query.filter(Transaction.date < lt)
+    if le is not None:
+        query = query.filter(Transaction.date <= le)
+    return query
+
+async def get_type_totals(db: AsyncSession, user_id: int, start: Optional[datetime], end: Optional[datetime]):
+    """Sum of amounts per TransactionType value over [start, end]."""
+    months, edges = split_range(start, end)
+    totals = {}
+
+    if months is not None:
+        query = select(MonthlyCategoryTotal.type, func.sum(MonthlyCategoryTotal.total)).filter(
+            MonthlyCategoryTotal.user_id == user_id
+        )
+        result = await db.execute(_filter_months(query, months).group_by(MonthlyCategoryTotal.type))
+        for type_, amount in result.all():
+            totals[type_.value] = totals.get(type_.value, 0.0) + (amount or 0.0)
+
+    for edge in edges:
+        query = select(Transaction.type, func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id,
+            Transaction.is_deleted == False
+        )
+        result = await db.execute(_filter_edge(query, edge).group_by(Transaction.type))
+        for type_, amount in result.all():
+            totals[type_.value] = totals.get(type_.value, 0.0) + (amount or 0.0)
+
+    return totals
+
+async def get_category_totals(db: AsyncSession, user_id: int, start: Optional[datetime], end: Optional[datetime], type: TransactionType = TransactionType.EXPENSE):
+    """(name, icon, amount) per category over [start, end], largest first."""
+    months, edges = split_range(start, end)
+    totals = {}
+
+    if months is not None:
+        query = select(Category.name, Category.icon, func.sum(MonthlyCategoryTotal.total)).join(
+            MonthlyCategoryTotal, MonthlyCategoryTotal.category_id == Category.id
+        ).filter(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.type == type,
+            MonthlyCategoryTotal.count > 0
+        )
+        result = await db.execute(_filter_months(query, months).group_by(Category.name, Category.icon))
+        for name, icon, amount in result.all():
+            totals[(name, icon)] = totals.get((name, icon), 0.0) + amount
+
+    for edge in edges:
+        query = select(Category.name, Category.icon, func.sum(Transaction.amount)).join(
+            Transaction, Transaction.category_id == Category.id
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.is_deleted == False,
+            Transaction.type == type
+        )
+        result = await db.execute(_filter_edge(query, edge).group_by(Category.name, Category.icon))
+        for name, icon, amount in result.all():
+            totals[(name, icon)] = totals.get((name, icon), 0.0) + amount
+
+    rows = [(name, icon, amount) for (name, icon), amount in totals.items()]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+async def get_monthly_type_totals(db: AsyncSession, user_id: int, start: Optional[datetime], end: Optional[datetime]):
+    """(year, month, type, amount) rows over [start, end], whole months from the rollup."""
+    months, edges = split_range(start, end)
+    rows = []
+
+    if months is not None:
+        query = select(
+            MonthlyCategoryTotal.year, MonthlyCategoryTotal.month, MonthlyCategoryTotal.type, func.sum(MonthlyCategoryTotal.total)
+        ).filter(MonthlyCategoryTotal.user_id == user_id)
+        result = await db.execute(_filter_months(query, months).group_by(
+            MonthlyCategoryTotal.year, MonthlyCategoryTotal.month, MonthlyCategoryTotal.type
+        ))
+        rows.extend(result.all())
+
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    for edge in edges:
+        query = select(year, month, Transaction.type, func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id,
+            Transaction.is_deleted == False
+        )
+        result = await db.execute(_filter_edge(query, edge).group_by(year, month, Transaction.type))
+        rows.extend(result.all())
+    return rows
+
+async def get_daily_type_totals(db: AsyncSession, user_id: int, start: Optional[datetime], end: Optional[datetime]):
+    """(day, type, amount) rows over [start, end]; day is a date or an ISO date string depending on the driver."""
+    day = func.date(Transaction.date)
+    query = select(day, Transaction.type, func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.is_deleted == False,
+        # Naming every type lets the planner range-scan the covering
+        # (user_id, is_deleted, type, date, ..., amount) index per type
+        Transaction.type.in_(list(TransactionType))
+    )
+    result = await db.execute(_filter_edge(query, (naive_utc(start), None, naive_utc(end))).group_by(day, Transaction.type))
+    return result.all()
@@ -0,0 +1,111 @@
+"""Full-text search over transaction notes and category names.
+
+Notes are matched through the database's full-text index (MySQL FULLTEXT,
+SQLite FTS5). Category names are few per user, so they are matched in
+Python first: a search term is satisfied either by a word of the note or by
+a word of the transaction's category name, and every term must be satisfied.
+Categories are grouped by the set of terms they cover, and each group turns
+into one indexed query for the terms its notes still have to contain.
+"""
+import re
+from typing import Dict, FrozenSet, List, Optional
+from sqlalchemy import Integer, column, func, literal, literal_column, table, union_all
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.models import Transaction
+from app.schemas.schemas import TransactionFilter
+from app.schemas import rows as row_serializers
+from app.crud import categories as crud_categories
+from app.crud.transactions import apply_transaction_filters
+
+MAX_TERMS = 8
+# Added to the note score for each search term met by the category name
+CATEGORY_BOOST = 1.0
+
+# Same word boundaries as the FTS tokenizers: letters and digits only
+_WORD = re.compile(r"[^\W_]+")
+
+_fts = table("transactions_fts", column("rowid", Integer))
+
+def parse_terms(query: str) -> List[str]:
+    """Lower-cased distinct words of the query; each one is matched as a prefix."""
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(query)))[:MAX_TERMS]
+
+def _covered_terms(name: str, terms: List[str]) -> FrozenSet[str]:
+    words = [word.lower() for word in _WORD.findall(name or "")]
+    return frozenset(term for term in terms if any(word.startswith(term) for word in words))
+
+def _note_branch(dialect: str, terms: List[str], boost: float = 0.0):
+    """Select of (id, date, score + boost) over notes matching every term as a prefix."""
+    if dialect == "mysql":
+        score = match(Transaction.note, against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+        return select(Transaction.id, Transaction.date, (score + boost).label("score")).filter(score > 0)
+    if dialect == "sqlite":
+        fts = literal_column("transactions_fts")
+        hits = select(
+            _fts.c.rowid.label("id"),
+            # bm25() is lower for better matches
+            (-func.bm25(fts)).label("score"),
+        ).select_from(_fts).filter(fts.op("MATCH")(" AND ".join(f'"{term}"*' for term in terms)))
+        # Materialized so the match runs once; inlined, SQLite re-runs it for every row of the user
+        hits = hits.cte().prefix_with("MATERIALIZED")
+        return select(Transaction.id, Transaction.date, (hits.c.score + boost).label("score")).join(hits, hits.c.id == Transaction.id)
+    # No full-text index: substring scan, fine for tiny databases
+    conditions = [Transaction.note.ilike(f"%{term}%") for term in terms]
+    return select(Transaction.id, Transaction.date, literal(boost).label("score")).filter(*conditions)
+
+async def search_transactions(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    filters: Optional[TransactionFilter] = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """Return one page of matching transactions, best matches first, newest first among equals.
+
+    Rows are column tuples for app.schemas.rows.transaction.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    dialect = db.bind.dialect.name
+
+    groups: Dict[FrozenSet[str], List[int]] = {}
+    for category in await crud_categories.get_categories(db, user_id=user_id):
+        covered = _covered_terms(category.name, terms)
+        if covered:
+            groups.setdefault(covered, []).append(category.id)
+
+    branches = []
+    for covered, category_ids in groups.items():
+        remaining = [term for term in terms if term not in covered]
+        boost = len(covered) * CATEGORY_BOOST
+        if remaining:
+            branch = _note_branch(dialect, remaining, boost)
+        else:
+            branch = select(Transaction.id, Transaction.date, literal(boost).label("score"))
+        branches.append(branch.filter(Transaction.category_id.in_(category_ids)))
+
+    rest = _note_branch(dialect, terms)
+    matched_categories = [category_id for category_ids in groups.values() for category_id in category_ids]
+    if matched_categories:
+        # Those categories' rows are already covered, with a boost, by their own branch
+        rest = rest.filter(Transaction.category_id.notin_(matched_categories))
+    branches.append(rest)
+
+    branches = [
+        apply_transaction_filters(branch.filter(Transaction.user_id == user_id, Transaction.is_deleted == False), filters)
+        for branch in branches
+    ]
+    hits = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery()
+    # Rank and cut the page on the narrow (id, date, score) rows; only the page is joined back
+    ordering = (hits.c.score.desc(), hits.c.date.desc(), hits.c.id.desc())
+    page = select(hits.c.id, hits.c.date, hits.c.score).order_by(*ordering).offset(offset).limit(limit).subquery()
+    result = await db.execute(
+        select(*row_serializers.transaction.columns)
+        .join(page, page.c.id == Transaction.id)
+        .order_by(page.c.score.desc(), page.c.date.desc(), page.c.id.desc())
+    )
+    return result.all()
@@ -0,0 +1,103 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update
+from app.models.models import User, Transaction, Wallet, Category, Budget, SyncTombstone
+from app.schemas import rows as row_serializers
+from app.crud import categories as crud_categories
+
+# Every write to a user's synced data takes the next value of users.sync_version
+# and stamps it on the rows it touches. The UPDATE holds the user's row lock
+# until commit, so versions commit in order and "everything <= N" is stable
+# once a reader has seen N.
+
+async def next_version(db: AsyncSession, user_id: int) -> int:
+    await db.execute(update(User).where(User.id == user_id).values(sync_version=User.sync_version + 1))
+    result = await db.execute(select(User.sync_version).where(User.id == user_id))
+    return result.scalar_one()
+
+async def next_versions(db: AsyncSession, user_ids) -> dict:
+    """Bump several users at once; returns {user_id: new version}."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+    await db.execute(update(User).where(User.id.in_(user_ids)).values(sync_version=User.sync_version + 1))
+    result = await db.execute(select(User.id, User.sync_version).where(User.id.in_(user_ids)))
+    return dict(result.all())
+
+async def lock_users(db: AsyncSession, user_ids) -> None:
+    """Take the users' row locks, in id order, without bumping their versions."""
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        await db.execute(select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update())
+
+async def current_version(db: AsyncSession, user_id: int) -> int:
+    result = await db.execute(select(User.sync_version).where(User.id == user_id))
+    return result.scalar_one_or_none() or 0
+
+async def read_session(db: AsyncSession, read_db: AsyncSession, user_id: int):
+    """The user's version from the primary, and a session that has seen it.
+
+    Returns (version, session). The replica session is used only once it has
+    replayed that version, so a lagging replica never serves (or gets cached)
+    results older than the user's own latest write.
+    """
+    version = await current_version(db, user_id)
+    if read_db.get_bind() is db.get_bind():
+        return version, db
+    if await current_version(read_db, user_id) >= version:
+        # Hand the primary connection back to the pool for the rest of the request
+        await db.close()
+        return version, read_db
+    return version, db
+
+async def record_deletion(db: AsyncSession, user_id: int, entity: str, entity_id: int, version: int):
+    db.add(SyncTombstone(user_id=user_id, entity=entity, entity_id=entity_id, version=version))
+
+def _window(column, since: int, version: int):
+    # A full sync has no lower bound: rows written before versioning carry version 0
+    if since == 0:
+        return (column <= version,)
+    return (column > since, column <= version)
+
+async def get_changes(db: AsyncSession, user_id: int, since: int):
+    """Rows created, updated or deleted after version `since`, up to the current version.
+
+    Changed rows are column tuples for the serializers in app.schemas.rows.
+    """
+    version = await current_version(db, user_id)
+    changes = {"version": version, "transactions": [], "wallets": [], "categories": [], "budgets": []}
+    deleted = {"transactions": [], "wallets": [], "categories": [], "budgets": []}
+    if since and since >= version:
+        return changes, deleted
+
+    result = await db.execute(select(*row_serializers.transaction.columns).filter(
+        Transaction.user_id == user_id, *_window(Transaction.version, since, version)
+    ))
+    for row in result.all():
+        if row.is_deleted:
+            deleted["transactions"].append(row.id)
+        else:
+            changes["transactions"].append(row)
+
+    for key, model, serializer in (
+        ("wallets", Wallet, row_serializers.wallet),
+        ("categories", Category, row_serializers.category),
+        ("budgets", Budget, row_serializers.budget),
+    ):
+        result = await db.execute(select(*serializer.columns).filter(
+            model.user_id == user_id, *_window(model.version, since, version)
+        ))
+        changes[key] = result.all()
+
+    if since == 0:
+        # System categories are shared and not versioned; send them on first sync
+        system = await crud_categories.get_system_categories(db)
+        changes["categories"] = list(system.rows) + list(changes["categories"])
+
+    result = await db.execute(select(SyncTombstone.entity, SyncTombstone.entity_id).filter(
+        SyncTombstone.user_id == user_id, *_window(SyncTombstone.version, since, version)
+    ))
+    for entity, entity_id in result.all():
+        deleted.setdefault(entity, []).append(entity_id)
+
+    return changes, deleted
@@ -1,33 +1,297 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.models import Transaction, Wallet, TransactionType
-from app.schemas.schemas import TransactionCreate
+from sqlalchemy import or_, and_, insert, delete, func
+from app.models.models import Transaction, Wallet, TransactionType, ClientOperation, Category
+from app.schemas.schemas import TransactionCreate, TransactionFilter, TransactionBatchOperation
+from app.schemas import rows as row_serializers
+from app.crud import rollups
+from app.crud import sync
+from app.crud import categories as crud_categories
+from app.crud import wallets as crud_wallets
+from app.core.cache import report_cache
 from fastapi import HTTPException
+from datetime import datetime
+from typing import List, Optional
+import base64
 
-async def get_transactions(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Transaction).filter(Transaction.user_id == user_id, Transaction.is_deleted == False))
-    return result.scalars().all()
+def encode_cursor(db_transaction: Transaction) -> str:
+    raw = f"{db_transaction.date.isoformat()}|{db_transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    # Every failure mode here (bad base64, bad utf-8, bad date/id) is a ValueError
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    date_part, id_part = raw.rsplit("|", 1)
+    return datetime.fromisoformat(date_part), int(id_part)
+
+def apply_transaction_filters(query, filters: Optional[TransactionFilter]):
+    if filters is None:
+        return query
+    if filters.start_date:
+        query = query.filter(Transaction.date >= filters.start_date)
+    if filters.end_date:
+        query = query.filter(Transaction.date <= filters.end_date)
+    if filters.type:
+        query = query.filter(Transaction.type == filters.type)
+    if filters.category_id is not None:
+        query = query.filter(Transaction.category_id == filters.category_id)
+    if filters.min_amount is not None:
+        query = query.filter(Transaction.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        query = query.filter(Transaction.amount <= filters.max_amount)
+    return query
+
+async def get_transactions(db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None, filters: Optional[TransactionFilter] = None):
+    """Return one page of transactions, newest first, and the cursor for the next page.
+
+    Pages are keyed on (date, id) rather than OFFSET so the cost of a page does
+    not grow with how far back the client has scrolled. Rows are column tuples
+    for app.schemas.rows.transaction, not ORM objects.
+    """
+    query = select(*row_serializers.transaction.columns).filter(Transaction.user_id == user_id, Transaction.is_deleted == False)
+    query = apply_transaction_filters(query, filters)
+
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Transaction.date < cursor_date,
+            and_(Transaction.date == cursor_date, Transaction.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(
+        query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+async def count_transactions(db: AsyncSession, user_id: int, filters: Optional[TransactionFilter] = None) -> int:
+    query = select(func.count()).select_from(Transaction).filter(Transaction.user_id == user_id, Transaction.is_deleted == False)
+    result = await db.execute(apply_transaction_filters(query, filters))
+    return result.scalar_one()
+
+async def stream_transactions(db: AsyncSession, user_id: int, filters: Optional[TransactionFilter] = None, batch_size: int = 1000):
+    """Yield the user's live transactions, oldest first, as lists of column tuples.
+
+    Rows come from a server-side cursor batch_size at a time, so neither the
+    driver nor the ORM ever holds the whole history.
+    """
+    query = select(
+        Transaction.id, Transaction.date, Transaction.type, Transaction.amount,
+        Transaction.category_id, Category.name, Transaction.wallet_id, Transaction.note, Transaction.receipt_url
+    ).outerjoin(Category, Category.id == Transaction.category_id).filter(
+        Transaction.user_id == user_id, Transaction.is_deleted == False
+    )
+    query = apply_transaction_filters(query, filters).order_by(Transaction.date, Transaction.id)
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
 
 async def create_transaction(db: AsyncSession, transaction: TransactionCreate, user_id: int):
+    version = await sync.next_version(db, user_id)
     db_transaction = Transaction(
         **transaction.dict(),
-        user_id=user_id
+        user_id=user_id,
+        version=version
     )
     db.add(db_transaction)
+    await db.flush()
+    if db_transaction.date is None:
+        # Pick up the server-side default so the rollup lands in the right month
+        await db.refresh(db_transaction, ["date"])
+    await rollups.add_transaction(db, db_transaction)
+    balances = {}
+    crud_wallets.collect_balance_delta(balances, db_transaction.wallet_id, db_transaction.type, db_transaction.amount)
+    await crud_wallets.apply_balance_deltas(db, user_id, balances, version)
     await db.commit()
+    await report_cache.invalidate_user(user_id)
     await db.refresh(db_transaction)
     return db_transaction
 
+async def bulk_create_transactions(db: AsyncSession, transactions: List[TransactionCreate], user_id: int):
+    """Insert many transactions with one multi-row INSERT and a single commit."""
+    if not transactions:
+        return 0
+    now = datetime.utcnow()
+    version = await sync.next_version(db, user_id)
+    rows = []
+    for transaction in transactions:
+        row = transaction.dict()
+        row["user_id"] = user_id
+        row["is_deleted"] = False
+        row["version"] = version
+        if row["date"] is None:
+            row["date"] = now
+        rows.append(row)
+
+    await db.execute(insert(Transaction), rows)
+    await rollups.apply_rows(db, user_id, rows)
+    balances = {}
+    for row in rows:
+        crud_wallets.collect_balance_delta(balances, row["wallet_id"], row["type"], row["amount"])
+    await crud_wallets.apply_balance_deltas(db, user_id, balances, version)
+    await db.commit()
+    await report_cache.invalidate_user(user_id)
+    return len(rows)
+
+async def apply_transaction_batch(db: AsyncSession, operations: List[TransactionBatchOperation], user_id: int):
+    """Apply a mixed list of create/update/delete operations in one DB transaction.
+
+    Lookups, inserts and updates are each sent as one batch rather than per
+    operation. New rows go in with one multi-row INSERT and their ids are read
+    back by version, which the user row lock keeps to this batch.
+    Applied operations are recorded under their client op_id, and an op_id
+    seen before returns the recorded outcome instead of running again. Failed
+    operations are not recorded, so a client can fix and retry them.
+    """
+    results = [None] * len(operations)
+
+    op_ids = {operation.op_id for operation in operations}
+    result = await db.execute(select(ClientOperation).filter(ClientOperation.user_id == user_id, ClientOperation.op_id.in_(op_ids)))
+    recorded = {}
+    stale = []
+    for row in result.scalars().all():
+        if row.status == "applied":
+            recorded[row.op_id] = row
+        else:
+            # Failures recorded by older versions; retry those ops instead of replaying them
+            stale.append(row.id)
+
+    pending = []
+    seen = set()
+    for index, operation in enumerate(operations):
+        previous = recorded.get(operation.op_id)
+        if previous is not None:
+            results[index] = {"op_id": previous.op_id, "action": previous.action, "status": previous.status, "id": previous.transaction_id, "error": previous.error, "replayed": True}
+        elif operation.op_id in seen:
+            results[index] = {"op_id": operation.op_id, "action": operation.action, "status": "failed", "error": "Duplicate op_id in batch"}
+        else:
+            seen.add(operation.op_id)
+            pending.append((index, operation))
+
+    if not pending:
+        return results
+
+    allowed_categories = set()
+    allowed_wallets = set()
+    if any(operation.data is not None for _, operation in pending):
+        wanted = {operation.data.category_id for _, operation in pending if operation.data is not None}
+        allowed_categories = await crud_categories.get_category_ids(db, user_id=user_id, wanted=wanted)
+        allowed_wallets = await crud_wallets.get_wallet_ids(db, user_id)
+
+    target_ids = {operation.id for _, operation in pending if operation.action != "create" and operation.id is not None}
+    targets = {}
+    if target_ids:
+        result = await db.execute(select(Transaction).filter(Transaction.user_id == user_id, Transaction.is_deleted == False, Transaction.id.in_(target_ids)))
+        targets = {row.id: row for row in result.scalars().all()}
+
+    now = datetime.utcnow()
+    version = await sync.next_version(db, user_id)
+    deltas = {}
+    balances = {}
+    created = []
+    outcomes = {}
+    for index, operation in pending:
+        target = targets.get(operation.id)
+        if operation.action != "delete" and operation.data is None:
+            outcomes[index] = ("failed", operation.id, "data is required")
+        elif operation.action != "delete" and operation.data.category_id not in allowed_categories:
+            outcomes[index] = ("failed", operation.id, f"Unknown category {operation.data.category_id}")
+        elif operation.action != "delete" and operation.data.wallet_id is not None and operation.data.wallet_id not in allowed_wallets:
+            outcomes[index] = ("failed", operation.id, f"Unknown wallet {operation.data.wallet_id}")
+        elif operation.action == "create":
+            row = operation.data.dict()
+            row["user_id"] = user_id
+            row["is_deleted"] = False
+            row["version"] = version
+            if row["date"] is None:
+                row["date"] = now
+            created.append((index, row))
+            rollups.collect_delta(deltas, row["category_id"], row["type"], row["amount"], row["date"])
+            crud_wallets.collect_balance_delta(balances, row["wallet_id"], row["type"], row["amount"])
+        elif target is None:
+            outcomes[index] = ("failed", operation.id, "Transaction not found")
+        elif operation.action == "update":
+            rollups.collect_delta(deltas, target.category_id, target.type, target.amount, target.date, -1)
+            crud_wallets.collect_balance_delta(balances, target.wallet_id, target.type, target.amount, -1)
+            for key, value in operation.data.dict().items():
+                if key == "date" and value is None:
+                    continue
+                setattr(target, key, value)
+            target.version = version
+            rollups.collect_delta(deltas, target.category_id, target.type, target.amount, target.date)
+            crud_wallets.collect_balance_delta(balances, target.wallet_id, target.type, target.amount)
+            outcomes[index] = ("applied", target.id, None)
+        else:
+            rollups.collect_delta(deltas, target.category_id, target.type, target.amount, target.date, -1)
+            crud_wallets.collect_balance_delta(balances, target.wallet_id, target.type, target.amount, -1)
+            target.is_deleted = True
+            target.version = version
+            # Later operations in this batch see it as gone
+            del targets[operation.id]
+            outcomes[index] = ("applied", target.id, None)
+
+    await db.flush()
+    if created:
+        await db.execute(insert(Transaction), [row for _, row in created])
+        # Auto-increment ids follow the order of the rows; only this batch has
+        # written rows at this version, and updated or deleted targets are excluded
+        result = await db.execute(
+            select(Transaction.id).filter(
+                Transaction.user_id == user_id, Transaction.version == version, Transaction.id.notin_(target_ids)
+            ).order_by(Transaction.id)
+        )
+        for (index, _), transaction_id in zip(created, result.scalars().all()):
+            outcomes[index] = ("applied", transaction_id, None)
+
+    records = []
+    for index, operation in pending:
+        status, transaction_id, error = outcomes[index]
+        if status == "applied":
+            records.append({"user_id": user_id, "op_id": operation.op_id, "action": operation.action, "status": status, "transaction_id": transaction_id, "error": error})
+        results[index] = {"op_id": operation.op_id, "action": operation.action, "status": status, "id": transaction_id, "error": error, "replayed": False}
+    if stale:
+        await db.execute(delete(ClientOperation).filter(ClientOperation.id.in_(stale)))
+    if records:
+        await db.execute(insert(ClientOperation), records)
+
+    await rollups.apply_deltas(db, user_id, deltas)
+    await crud_wallets.apply_balance_deltas(db, user_id, balances, version)
+    await db.commit()
+    await report_cache.invalidate_user(user_id)
+    return results
+
 async def update_transaction(db: AsyncSession, transaction_id: int, transaction: TransactionCreate, user_id: int):
     result = await db.execute(select(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id))
     db_transaction = result.scalars().first()
     if not db_transaction:
         return None
-    
+
+    version = await sync.next_version(db, user_id)
+    balances = {}
+    if not db_transaction.is_deleted:
+        await rollups.remove_transaction(db, db_transaction)
+        crud_wallets.collect_balance_delta(balances, db_transaction.wallet_id, db_transaction.type, db_transaction.amount, -1)
+
     for key, value in transaction.dict().items():
+        # A missing date means "leave it", not "clear it"
+        if key == "date" and value is None:
+            continue
         setattr(db_transaction, key, value)
-    
+    db_transaction.version = version
+
+    if not db_transaction.is_deleted:
+        await rollups.add_transaction(db, db_transaction)
+        crud_wallets.collect_balance_delta(balances, db_transaction.wallet_id, db_transaction.type, db_transaction.amount)
+    await crud_wallets.apply_balance_deltas(db, user_id, balances, version)
+
     await db.commit()
+    await report_cache.invalidate_user(user_id)
     await db.refresh(db_transaction)
     return db_transaction
 
@@ -35,7 +299,15 @@ async def delete_transaction(db: AsyncSession, transaction_id: int, user_id: int
     result = await db.execute(select(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id))
     db_transaction = result.scalars().first()
     if db_transaction:
+        version = await sync.next_version(db, user_id)
+        if not db_transaction.is_deleted:
+            await rollups.remove_transaction(db, db_transaction)
+            balances = {}
+            crud_wallets.collect_balance_delta(balances, db_transaction.wallet_id, db_transaction.type, db_transaction.amount, -1)
+            await crud_wallets.apply_balance_deltas(db, user_id, balances, version)
         db_transaction.is_deleted = True
+        db_transaction.version = version
         await db.commit()
+        await report_cache.invalidate_user(user_id)
         return True
     return False
@@ -2,17 +2,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.models import User
 from app.schemas.schemas import UserCreate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
+async def get_user(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalars().first()
+
 async def create_user(db: AsyncSession, user: UserCreate):
     db_user = User(
         email=user.email,
         name=user.name,
-        password_hash=get_password_hash(user.password),
+        password_hash=await get_password_hash_async(user.password),
         currency=user.currency,
         timezone=user.timezone
     )
@@ -1,16 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.models import Wallet, User
+from sqlalchemy import update, bindparam, func, case
+from app.models.models import Wallet, User, Transaction, TransactionType
 from app.schemas.schemas import WalletCreate
+from app.schemas import rows as row_serializers
+from app.crud import sync
+import logging
+
+logger = logging.getLogger(__name__)
 
 async def get_wallets(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Wallet).filter(Wallet.user_id == user_id))
-    return result.scalars().all()
+    # Column tuples for app.schemas.rows.wallet
+    result = await db.execute(select(*row_serializers.wallet.columns).filter(Wallet.user_id == user_id))
+    return result.all()
 
 async def create_wallet(db: AsyncSession, wallet: WalletCreate, user_id: int):
     db_wallet = Wallet(
         **wallet.dict(),
-        user_id=user_id
+        opening_balance=wallet.balance,
+        user_id=user_id,
+        version=await sync.next_version(db, user_id)
     )
     db.add(db_wallet)
     await db.commit()
@@ -21,10 +30,110 @@ async def get_wallet(db: AsyncSession, wallet_id: int, user_id: int):
     result = await db.execute(select(Wallet).filter(Wallet.id == wallet_id, Wallet.user_id == user_id))
     return result.scalars().first()
 
+async def get_wallet_ids(db: AsyncSession, user_id: int):
+    result = await db.execute(select(Wallet.id).filter(Wallet.user_id == user_id))
+    return set(result.scalars().all())
+
 async def delete_wallet(db: AsyncSession, wallet_id: int, user_id: int):
     db_wallet = await get_wallet(db, wallet_id, user_id)
     if db_wallet:
+        version = await sync.next_version(db, user_id)
+        await sync.record_deletion(db, user_id, "wallets", wallet_id, version)
+        # Keep the transactions, just unlinked
+        await db.execute(
+            update(Transaction).where(Transaction.wallet_id == wallet_id).values(wallet_id=None, version=version)
+        )
         await db.delete(db_wallet)
         await db.commit()
         return True
     return False
+
+# Balance maintenance: every transaction write moves its wallet's balance by
+# the signed amount, inside the same DB transaction as the write itself
+
+def signed_amount(type: TransactionType, amount: float) -> float:
+    return amount if type == TransactionType.INCOME else -amount
+
+def collect_balance_delta(deltas: dict, wallet_id, type: TransactionType, amount: float, sign: int = 1):
+    if wallet_id is None:
+        return
+    deltas[wallet_id] = deltas.get(wallet_id, 0.0) + sign * signed_amount(type, amount)
+
+async def apply_balance_deltas(db: AsyncSession, user_id: int, deltas: dict, version: int):
+    """Apply {wallet_id: amount} to the user's wallets and stamp them with version."""
+    rows = [{"wallet_id": wallet_id, "delta": delta} for wallet_id, delta in deltas.items() if delta != 0]
+    if not rows:
+        return
+    table = Wallet.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.id == bindparam("wallet_id"), table.c.user_id == user_id)
+        .values(balance=func.coalesce(table.c.balance, 0) + bindparam("delta"), version=version),
+        rows
+    )
+
+# Reconciliation: compare materialized balances with the ledger, a batch at a time
+
+_ledger_sum = func.coalesce(func.sum(
+    case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=-Transaction.amount)
+), 0.0)
+
+async def _ledger(db: AsyncSession, wallet_ids) -> dict:
+    result = await db.execute(
+        select(Transaction.wallet_id, _ledger_sum).filter(
+            Transaction.wallet_id.in_(wallet_ids),
+            Transaction.is_deleted == False
+        ).group_by(Transaction.wallet_id)
+    )
+    return dict(result.all())
+
+def _drifted(wallet: Wallet, ledger: dict, tolerance: float):
+    expected = (wallet.opening_balance or 0.0) + ledger.get(wallet.id, 0.0)
+    return expected if abs((wallet.balance or 0.0) - expected) > tolerance else None
+
+async def reconcile_balances(db: AsyncSession, after_id: int, limit: int, tolerance: float = 0.005):
+    """Check wallets with id > after_id (up to limit) and repair drifted balances.
+
+    Returns (last wallet id or None when done, wallets checked, wallets corrected).
+    The batch is checked without locks. Drifted wallets are then locked the
+    way writers lock them, owners' user rows first and wallet rows second,
+    re-checked and repaired, so the repair cannot deadlock against a
+    concurrent write. Only owners of wallets actually rewritten get a new
+    sync version.
+    """
+    result = await db.execute(select(Wallet).filter(Wallet.id > after_id).order_by(Wallet.id).limit(limit))
+    wallets = result.scalars().all()
+    if not wallets:
+        await db.rollback()
+        return None, 0, 0
+    last_id, checked = wallets[-1].id, len(wallets)
+
+    ledger = await _ledger(db, [wallet.id for wallet in wallets])
+    suspects = {wallet.id: wallet.user_id for wallet in wallets if _drifted(wallet, ledger, tolerance) is not None}
+    await db.rollback()
+    if not suspects:
+        return last_id, checked, 0
+
+    await sync.lock_users(db, suspects.values())
+    result = await db.execute(
+        select(Wallet).filter(Wallet.id.in_(list(suspects))).order_by(Wallet.id).with_for_update()
+    )
+    wallets = result.scalars().all()
+    ledger = await _ledger(db, [wallet.id for wallet in wallets])
+
+    # A concurrent write may have settled a suspect; only owners of rewritten wallets get a new version
+    repairs = []
+    for wallet in wallets:
+        expected = _drifted(wallet, ledger, tolerance)
+        if expected is not None:
+            repairs.append((wallet, expected))
+    if not repairs:
+        await db.rollback()
+        return last_id, checked, 0
+    versions = await sync.next_versions(db, [wallet.user_id for wallet, _ in repairs])
+    for wallet, expected in repairs:
+        logger.warning("Wallet %s balance %s drifted from ledger %s; repairing", wallet.id, wallet.balance, expected)
+        wallet.balance = expected
+        wallet.version = versions[wallet.user_id]
+    await db.commit()
+    return last_id, checked, len(repairs)
@@ -1,10 +1,20 @@
 from fastapi import FastAPI
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
-from app.routers import auth, users, wallets, categories, transactions, budgets, reports
+from app.core.security import check_internal_access_settings
+from app.utils.scheduler import start_scheduler, stop_scheduler
+from app.utils.images import shutdown_pool as shutdown_image_pool
+from app.core.instrumentation import InstrumentationMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.responses import ORJSONResponse
+from app.routers import auth, users, wallets, categories, transactions, budgets, reports, sync, internal, uploads, metrics
 
-app = FastAPI(title="Expense Tracker API", version="1.0.0")
+# Default() keeps FastAPI's own Pydantic encoding for routes with a response_model
+app = FastAPI(title="Expense Tracker API", version="1.0.0", default_response_class=Default(ORJSONResponse))
+
+# Innermost, so CORS and timing headers are set on the compressed response
+app.add_middleware(CompressionMiddleware)
 
 # Set up CORS
 app.add_middleware(
@@ -13,11 +23,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "Server-Timing", "ETag"],
 )
-
-# Static files for receipts
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Outermost, so its timings include CORS and the other middleware
+app.add_middleware(InstrumentationMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
@@ -27,6 +36,22 @@ app.include_router(categories.router, prefix="/api/v1/categories", tags=["catego
 app.include_router(transactions.router, prefix="/api/v1/transactions", tags=["transactions"])
 app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["budgets"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["sync"])
+# Receipts and avatars: content-addressed, cached forever by clients
+app.include_router(uploads.router, prefix="/uploads", tags=["uploads"], include_in_schema=False)
+app.include_router(internal.router, prefix="/internal", tags=["internal"], include_in_schema=False)
+app.include_router(metrics.router, tags=["internal"], include_in_schema=False)
+
+@app.on_event("startup")
+async def on_startup():
+    check_internal_access_settings()
+    if os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes", "on"):
+        start_scheduler()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    stop_scheduler()
+    shutdown_image_pool()
 
 @app.get("/")
 async def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Boolean, Text, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -26,7 +26,9 @@ class User(Base):
     timezone = Column(String(50), default="UTC")
     avatar_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
+    # Bumped on every write to the user's synced data; see crud/sync.py
+    sync_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     wallets = relationship("Wallet", back_populates="owner")
     categories = relationship("Category", back_populates="owner")
     transactions = relationship("Transaction", back_populates="owner")
@@ -38,16 +40,42 @@ class Wallet(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String(255), nullable=False)
     type = Column(Enum(WalletType), default=WalletType.CASH)
+    # balance = opening_balance + the wallet's live transactions; see crud/wallets.py
     balance = Column(Float, default=0.0)
+    opening_balance = Column(Float, nullable=False, default=0.0, server_default="0")
     last_4 = Column(String(4), nullable=True)
     total_limit = Column(Float, nullable=True)
     bill_date = Column(Integer, nullable=True) # Day of month
     due_date = Column(Integer, nullable=True) # Day of month
     additional_charges = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="wallets")
 
+    __table_args__ = (
+        Index("ix_wallets_user_id", "user_id"),
+    )
+
+    @property
+    def credit_used(self):
+        return wallet_credit_used(self.type, self.balance, self.additional_charges)
+
+    @property
+    def credit_utilization(self):
+        return wallet_credit_utilization(self.type, self.balance, self.additional_charges, self.total_limit)
+
+# Plain functions so column-tuple rows (app/schemas/rows.py) compute the same values
+def wallet_credit_used(type_, balance, additional_charges):
+    if type_ != WalletType.CREDIT_CARD:
+        return None
+    return max(0.0, -(balance or 0.0)) + (additional_charges or 0.0)
+
+def wallet_credit_utilization(type_, balance, additional_charges, total_limit):
+    if type_ != WalletType.CREDIT_CARD or not total_limit:
+        return None
+    return wallet_credit_used(type_, balance, additional_charges) / total_limit
+
 class Category(Base):
     __tablename__ = "categories"
     id = Column(Integer, primary_key=True, index=True)
@@ -56,26 +84,64 @@ class Category(Base):
     type = Column(Enum(TransactionType), nullable=False)
     icon = Column(String(50))
     color = Column(String(20))
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     
     owner = relationship("User", back_populates="categories")
     transactions = relationship("Transaction", back_populates="category")
     budgets = relationship("Budget", back_populates="category")
 
+    __table_args__ = (
+        Index("ix_categories_user_id", "user_id"),
+    )
+
 class Transaction(Base):
     __tablename__ = "transactions"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=True)
     type = Column(Enum(TransactionType), nullable=False)
     amount = Column(Float, nullable=False)
     note = Column(Text)
     date = Column(DateTime(timezone=True), server_default=func.now())
     receipt_url = Column(String(500))
     is_deleted = Column(Boolean, default=False)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
 
+    __table_args__ = (
+        # Listing: newest-first pages of a user's live transactions
+        Index("ix_transactions_user_deleted_date", "user_id", "is_deleted", "date"),
+        # Reports: covers the SUM(amount) GROUP BY type / category scans
+        Index("ix_transactions_user_deleted_type_date", "user_id", "is_deleted", "type", "date", "category_id", "amount"),
+        # Sync: rows changed since a client's last version
+        Index("ix_transactions_user_version", "user_id", "version"),
+        # Reconciler: ledger sum per wallet
+        Index("ix_transactions_wallet_deleted", "wallet_id", "is_deleted", "type", "amount"),
+        # Search on MySQL; SQLite gets the FTS5 table below instead
+        Index("ft_transactions_note", "note", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+# SQLite (dev) search index: an external-content FTS5 table over notes,
+# kept in step with transactions by triggers. Mirrors migration b6d2e8f4a1c3.
+TRANSACTIONS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+    "note, content='transactions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, note) VALUES (new.id, new.note); END",
+    "CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, note) VALUES ('delete', old.id, old.note); END",
+    "CREATE TRIGGER transactions_fts_au AFTER UPDATE OF note ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, note) VALUES ('delete', old.id, old.note); "
+    "INSERT INTO transactions_fts(rowid, note) VALUES (new.id, new.note); END",
+)
+for _statement in TRANSACTIONS_FTS_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Transaction.__table__, "before_drop", DDL("DROP TABLE IF EXISTS transactions_fts").execute_if(dialect="sqlite"))
+
 class Budget(Base):
     __tablename__ = "budgets"
     id = Column(Integer, primary_key=True, index=True)
@@ -84,10 +150,15 @@ class Budget(Base):
     monthly_limit = Column(Float, nullable=False)
     month = Column(Integer, nullable=False)
     year = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="budgets")
     category = relationship("Category", back_populates="budgets")
 
+    __table_args__ = (
+        Index("ix_budgets_user_year_month", "user_id", "year", "month"),
+    )
+
 class RecurringTransaction(Base):
     __tablename__ = "recurring_transactions"
     id = Column(Integer, primary_key=True, index=True)
@@ -95,3 +166,62 @@ class RecurringTransaction(Base):
     frequency = Column(String(50), nullable=False) # daily, weekly, monthly, yearly
     next_run_date = Column(DateTime)
     template_transaction_id = Column(Integer, ForeignKey("transactions.id"))
+
+    __table_args__ = (
+        Index("ix_recurring_transactions_next_run_date", "next_run_date"),
+    )
+
+class MonthlyCategoryTotal(Base):
+    __tablename__ = "monthly_category_totals"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "year", "month", "category_id", "type", name="uq_monthly_category_totals_key"),
+    )
+
+class ClientOperation(Base):
+    __tablename__ = "client_operations"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    op_id = Column(String(64), nullable=False)
+    action = Column(String(10), nullable=False)
+    status = Column(String(10), nullable=False)
+    transaction_id = Column(Integer, nullable=True)
+    error = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "op_id", name="uq_client_operations_user_op"),
+    )
+
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_version", "user_id", "version"),
+    )
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    next_due_at = Column(DateTime, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_duration_seconds = Column(Float, nullable=True)
+    last_lag_seconds = Column(Float, nullable=True)
+    last_error = Column(Text, nullable=True)
+    run_count = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,39 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-import os
-import uuid
-import shutil
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app.db.database import get_db
 from app.schemas.schemas import UserCreate, UserResponse, Token, UserUpdate
 from app.crud import users as crud_users
 from app.core import security
+from app.core.cache import user_cache
+from app.utils import storage, images
+from app.models.models import User
 from jose import JWTError, jwt
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
+def _hasher_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = await crud_users.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return await crud_users.create_user(db=db, user=user)
+    try:
+        return await crud_users.create_user(db=db, user=user)
+    except security.PasswordHasherBusy:
+        raise _hasher_busy_exception()
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     user = await crud_users.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    try:
+        password_ok = user is not None and await security.verify_password_async(form_data.password, user.password_hash)
+    except security.PasswordHasherBusy:
+        raise _hasher_busy_exception()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = security.create_access_token(data={"sub": user.email})
-    refresh_token = security.create_refresh_token(data={"sub": user.email})
+    claims = {"sub": user.email, "uid": user.id}
+    access_token = security.create_access_token(data=claims)
+    refresh_token = security.create_refresh_token(data=claims)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
+def _user_snapshot(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+def _user_from_snapshot(snapshot: dict) -> User:
+    # A fresh detached instance per request, so handlers never share state
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,13 +69,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     try:
         payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
         email: str = payload.get("sub")
+        user_id = payload.get("uid")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = await crud_users.get_user_by_email(db, email=email)
+
+    if user_id is None:
+        # Tokens issued before the user id was added to the claims
+        user = await crud_users.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        return user
+
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return _user_from_snapshot(snapshot)
+    user = await crud_users.get_user(db, user_id)
     if user is None:
         raise credentials_exception
+    user_cache.set(user_id, _user_snapshot(user))
     return user
 
 @router.get("/me", response_model=UserResponse)
@@ -58,18 +97,23 @@ async def get_me(current_user: UserResponse = Depends(get_current_user)):
 
 @router.put("/me", response_model=UserResponse)
 async def update_me(user_update: UserUpdate, db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
-    return await crud_users.update_user(db, db_user=current_user, user_update=user_update.dict(exclude_unset=True))
+    # current_user may be a cached snapshot, so update the row from this session
+    db_user = await crud_users.get_user(db, current_user.id)
+    db_user = await crud_users.update_user(db, db_user=db_user, user_update=user_update.dict(exclude_unset=True))
+    user_cache.pop(current_user.id)
+    return db_user
 
 @router.post("/me/upload-avatar")
-async def upload_avatar(file: UploadFile = File(...), db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"avatar_{current_user.id}_{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join("uploads", unique_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    avatar_url = f"/uploads/{unique_filename}"
-    await crud_users.update_user(db, db_user=current_user, user_update={"avatar_url": avatar_url})
+async def upload_avatar(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: AsyncSession = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
+    try:
+        stored = await storage.save_upload(file)
+    except storage.UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    background_tasks.add_task(images.process_upload, stored.key)
+
+    avatar_url = stored.url
+    db_user = await crud_users.get_user(db, current_user.id)
+    await crud_users.update_user(db, db_user=db_user, user_update={"avatar_url": avatar_url})
+    user_cache.pop(current_user.id)
     
-    return {"avatar_url": avatar_url}
+    return {"avatar_url": avatar_url, "avatar_variants": images.variant_urls(avatar_url)}
@@ -1,18 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.db.database import get_db
-from app.schemas.schemas import BudgetCreate, BudgetResponse
+from typing import List, Optional
+from datetime import datetime
+import calendar
+from app.db.database import get_db, get_read_db
+from app.schemas.schemas import BudgetCreate, BudgetResponse, BudgetProgress
 from app.crud import budgets as crud_budgets
+from app.crud import sync as crud_sync
 from app.routers.auth import get_current_user
 from app.models.models import User
+from app.schemas import rows as row_serializers
+from app.core.responses import ORJSONResponse
+from app.core import conditional
 
 router = APIRouter()
 
 @router.get("/", response_model=List[BudgetResponse])
-async def get_budgets(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud_budgets.get_budgets(db, user_id=current_user.id)
+async def get_budgets(request: Request, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    etag = conditional.data_etag("budgets", current_user.id, await crud_sync.current_version(db, current_user.id))
+    if conditional.not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    return conditional.tag(ORJSONResponse(row_serializers.budget.dump_all(await crud_budgets.get_budgets(db, user_id=current_user.id))), etag)
 
 @router.post("/", response_model=BudgetResponse)
 async def create_budget(budget: BudgetCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     return await crud_budgets.create_budget(db, budget=budget, user_id=current_user.id)
+
+def _month_elapsed(year: int, month: int, now: datetime) -> float:
+    """Fraction of the month gone by at `now`: 0 before it starts, 1 once it is over."""
+    days = calendar.monthrange(year, month)[1]
+    start = datetime(year, month, 1)
+    elapsed = (now - start).total_seconds() / (days * 86400)
+    return min(max(elapsed, 0.0), 1.0)
+
+@router.get("/progress", response_model=List[BudgetProgress])
+async def get_budget_progress(
+    year: Optional[int] = Query(None, ge=1970, le=9999),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    _, read_db = await crud_sync.read_session(db, read_db, current_user.id)
+    now = datetime.utcnow()
+    year = year or now.year
+    month = month or now.month
+    elapsed = _month_elapsed(year, month, now)
+
+    rows = await crud_budgets.get_budget_progress(read_db, user_id=current_user.id, year=year, month=month)
+    progress = []
+    for budget, category_name, category_icon, spent in rows:
+        progress.append({
+            "id": budget.id,
+            "category_id": budget.category_id,
+            "category_name": category_name,
+            "category_icon": category_icon,
+            "monthly_limit": budget.monthly_limit,
+            "month": budget.month,
+            "year": budget.year,
+            "spent": spent,
+            "remaining": budget.monthly_limit - spent,
+            "percentage": round(spent / budget.monthly_limit * 100, 1) if budget.monthly_limit else 0.0,
+            # Straight-line projection of the pace so far to the end of the month
+            "projected_spend": spent / elapsed if elapsed > 0 else 0.0,
+        })
+    return progress
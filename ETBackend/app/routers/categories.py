@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.db.database import get_db
 from app.schemas.schemas import CategoryCreate, CategoryResponse
 from app.crud import categories as crud_categories
+from app.crud import sync as crud_sync
 from app.routers.auth import get_current_user
 from app.models.models import User
+from app.schemas import rows as row_serializers
+from app.core.responses import ORJSONResponse
+from app.core import conditional
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CategoryResponse])
-async def get_categories(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud_categories.get_categories(db, user_id=current_user.id)
+async def get_categories(request: Request, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    version = await crud_sync.current_version(db, current_user.id)
+    # The catalog digest changes the tag when the shared system categories do
+    system = await crud_categories.get_system_categories(db)
+    etag = conditional.data_etag(f"categories-{system.digest}", current_user.id, version)
+    if conditional.not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    categories = await crud_categories.get_categories(db, user_id=current_user.id, version=version)
+    return conditional.tag(ORJSONResponse(row_serializers.category.dump_all(categories)), etag)
 
 @router.post("/", response_model=CategoryResponse)
 async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import password_hasher, require_internal_access
+from app.db.database import engine, replica_engine, pool_stats, get_db
+from app.crud import leases as crud_leases
+
+# Operational endpoints; disabled unless INTERNAL_ENDPOINTS_ENABLED and
+# INTERNAL_TOKEN are set, and still best kept unreachable from the public proxy
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+@router.get("/password-hasher")
+async def get_password_hasher_stats():
+    return password_hasher.stats()
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    return {
+        "primary": pool_stats(engine),
+        "replica": pool_stats(replica_engine) if replica_engine is not None else None,
+    }
+
+@router.get("/scheduler")
+async def get_scheduler_stats(db: AsyncSession = Depends(get_db)):
+    # One row per leased job, as last written by whichever worker ran it
+    jobs = await crud_leases.get_leases(db)
+    return [
+        {
+            "name": job.name,
+            "owner": job.owner,
+            "lease_expires_at": job.expires_at,
+            "next_due_at": job.next_due_at,
+            "last_started_at": job.last_started_at,
+            "last_finished_at": job.last_finished_at,
+            "last_duration_seconds": job.last_duration_seconds,
+            "last_lag_seconds": job.last_lag_seconds,
+            "last_error": job.last_error,
+            "run_count": job.run_count,
+        }
+        for job in jobs
+    ]
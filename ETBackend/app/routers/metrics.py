@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
+from app.db.database import engine, replica_engine, InstrumentedQueuePool
+from app.core.security import require_internal_access
+
+# Prometheus scrape target, gated like /internal (scrape with INTERNAL_TOKEN as the bearer_token)
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+POOL_GAUGES = (
+    ("db_pool_size", "Configured pool size.", "size"),
+    ("db_pool_checked_out", "Connections currently checked out.", "checked_out"),
+    ("db_pool_overflow", "Connections open beyond the pool size.", "overflow"),
+)
+
+def _pool_lines():
+    pools = {name: db_engine.pool for name, db_engine in (("primary", engine), ("replica", replica_engine)) if db_engine is not None}
+    pools = {name: pool.stats() for name, pool in pools.items() if isinstance(pool, InstrumentedQueuePool)}
+    for metric, help_text, key in POOL_GAUGES:
+        yield from metrics.render_gauge(metric, help_text, {(("engine", name),): stats[key] for name, stats in pools.items()})
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    body = metrics.render() + "\n".join(_pool_lines()) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -1,102 +1,93 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy import func
-from app.db.database import get_db
-from app.models.models import Transaction, TransactionType, User
+from app.db.database import get_db, get_read_db
+from app.models.models import TransactionType, User
 from app.routers.auth import get_current_user
-from datetime import datetime
+from app.crud import rollups
+from app.crud import sync as crud_sync
+from app.core.cache import report_cache
+from app.utils import timeseries
+from app.utils.dates import parse_datetime
+from datetime import datetime, time, timedelta
+from typing import Literal
 
 router = APIRouter()
 
+def _parse_date(value: str, name: str):
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
 @router.get("/summary")
 async def get_summary(
     start_date: str = None,
     end_date: str = None,
     period: str = None,
-    db: AsyncSession = Depends(get_db), 
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     # Calculate date filtering
     start_of_period = None
     if start_date:
-        start_of_period = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        start_of_period = _parse_date(start_date, "start_date")
     elif period != 'all':
         now = datetime.utcnow()
         start_of_period = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
     end_of_period = None
     if end_date:
-        end_of_period = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        end_of_period = _parse_date(end_date, "end_date")
     
+    version, read_db = await crud_sync.read_session(db, read_db, current_user.id)
+    cached = await report_cache.get(current_user.id, version, "summary", start_of_period, end_of_period)
+    if cached is not None:
+        return cached
+
     # Simple summary for period: total income, total expense
-    query = select(Transaction.type, func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id, 
-        Transaction.is_deleted == False
-    )
-    
-    if start_of_period:
-        query = query.filter(Transaction.date >= start_of_period)
-    if end_of_period:
-        query = query.filter(Transaction.date <= end_of_period)
-        
-    result = await db.execute(query.group_by(Transaction.type))
-    
-    summary = {}
-    for row in result.all():
-        summary[row[0].value] = row[1]
+    summary = await rollups.get_type_totals(read_db, current_user.id, start_of_period, end_of_period)
         
     total_income = summary.get("income", 0.0)
     total_expenses = summary.get("expense", 0.0)
     
-    return {
+    response = {
         "total_income": total_income,
         "total_expenses": total_expenses,
         "total_balance": total_income - total_expenses
     }
+    await report_cache.set(current_user.id, version, "summary", start_of_period, end_of_period, response)
+    return response
 
 @router.get("/category-breakdown")
 async def get_category_breakdown(
     start_date: str = None,
     end_date: str = None,
     period: str = None,
-    db: AsyncSession = Depends(get_db), 
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    from app.models.models import Category
-    
     start_of_period = None
     if start_date:
-        start_of_period = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        start_of_period = _parse_date(start_date, "start_date")
     elif period != 'all':
         now = datetime.utcnow()
         start_of_period = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
     end_of_period = None
     if end_date:
-        end_of_period = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        end_of_period = _parse_date(end_date, "end_date")
     
+    version, read_db = await crud_sync.read_session(db, read_db, current_user.id)
+    cached = await report_cache.get(current_user.id, version, "category-breakdown", start_of_period, end_of_period)
+    if cached is not None:
+        return cached
+
     # Get expenses grouped by category
-    query = select(Category.name, Category.icon, func.sum(Transaction.amount)).join(
-        Transaction, Transaction.category_id == Category.id
-    ).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.is_deleted == False,
-        Transaction.type == TransactionType.EXPENSE
-    )
-    
-    if start_of_period:
-        query = query.filter(Transaction.date >= start_of_period)
-    if end_of_period:
-        query = query.filter(Transaction.date <= end_of_period)
-        
-    result = await db.execute(
-        query.group_by(Category.name, Category.icon)
-        .order_by(func.sum(Transaction.amount).desc())
-    )
-    
+    rows = await rollups.get_category_totals(read_db, current_user.id, start_of_period, end_of_period, TransactionType.EXPENSE)
+
     breakdown = []
-    rows = result.all()
     total_spent = sum(row[2] for row in rows)
     
     for row in rows:
@@ -108,7 +99,55 @@ async def get_category_breakdown(
             "percentage": round(percentage, 1)
         })
         
-    return {
+    response = {
         "total_spent": total_spent,
         "breakdown": breakdown
     }
+    await report_cache.set(current_user.id, version, "category-breakdown", start_of_period, end_of_period, response)
+    return response
+
+@router.get("/timeseries")
+async def get_timeseries(
+    granularity: Literal["day", "week", "month"] = "day",
+    start_date: str = None,
+    end_date: str = None,
+    window: int = Query(7, ge=1, le=366),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Gap-filled income/expense series with running totals, moving averages and period deltas."""
+    end_of_period = _parse_date(end_date, "end_date")
+    if end_of_period is None:
+        # Last instant of today rather than now, so the cache key holds for the whole day
+        end_of_period = datetime.combine(datetime.utcnow().date(), time.max)
+    start_of_period = _parse_date(start_date, "start_date")
+    if start_of_period is None:
+        start_day = end_of_period.date() - timedelta(days=90 if granularity == "day" else 365)
+        if granularity == "month":
+            start_day = start_day.replace(day=1)
+        start_of_period = datetime.combine(start_day, time.min)
+    if start_of_period > end_of_period:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    cache_name = f"timeseries:{granularity}:{window}"
+    version, read_db = await crud_sync.read_session(db, read_db, current_user.id)
+    cached = await report_cache.get(current_user.id, version, cache_name, start_of_period, end_of_period)
+    if cached is not None:
+        return cached
+
+    if granularity == "month":
+        rows = await rollups.get_monthly_type_totals(read_db, current_user.id, start_of_period, end_of_period)
+        years, months, types, amounts = zip(*rows) if rows else ((), (), (), ())
+        days = timeseries.month_starts(years, months)
+    else:
+        rows = await rollups.get_daily_type_totals(read_db, current_user.id, start_of_period, end_of_period)
+        day_values, types, amounts = zip(*rows) if rows else ((), (), ())
+        days = timeseries.as_days(day_values)
+
+    response = timeseries.build_series(
+        days, types, amounts, start_of_period.date(), end_of_period.date(), granularity, window,
+        TransactionType.INCOME, TransactionType.EXPENSE
+    )
+    await report_cache.set(current_user.id, version, cache_name, start_of_period, end_of_period, response)
+    return response
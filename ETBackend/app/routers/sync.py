@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
+from app.schemas.schemas import SyncResponse
+from app.schemas import rows as row_serializers
+from app.crud import sync as crud_sync
+from app.routers.auth import get_current_user
+from app.models.models import User
+from app.core.responses import ORJSONResponse
+
+router = APIRouter()
+
+@router.get("/", response_model=SyncResponse)
+async def get_changes(
+    since: int = Query(0, ge=0, description="Version from the previous sync response; 0 for a full sync"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Reads the primary: a replica that lags could hand out a version whose rows it has not seen yet
+    changes, deleted = await crud_sync.get_changes(db, user_id=current_user.id, since=since)
+    # A first sync can carry a user's whole history; skip building a model per row
+    return ORJSONResponse({
+        "version": changes["version"],
+        "transactions": row_serializers.transaction.dump_all(changes["transactions"]),
+        "wallets": row_serializers.wallet.dump_all(changes["wallets"]),
+        "categories": row_serializers.category.dump_all(changes["categories"]),
+        "budgets": row_serializers.budget.dump_all(changes["budgets"]),
+        "deleted": deleted,
+    })
@@ -1,42 +1,234 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Form, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-import os
-import uuid
-import shutil
-from app.db.database import get_db
-from app.schemas.schemas import TransactionCreate, TransactionResponse
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from typing import List, Optional, Literal
+from itertools import islice
+import json
+from app.db.database import get_db, AsyncSessionLocal
+from app.schemas.schemas import TransactionCreate, TransactionResponse, TransactionFilter, TransactionBatchRequest, TransactionBatchResult
+from app.schemas import rows as row_serializers
+from app.core.responses import ORJSONResponse
+from app.core import conditional
 from app.crud import transactions as crud_transactions
+from app.crud import categories as crud_categories
+from app.crud import wallets as crud_wallets
+from app.crud import search as crud_search
+from app.crud import sync as crud_sync
+from app.utils import importers, exporters, storage, images
 from app.routers.auth import get_current_user
 from app.models.models import User
 
 router = APIRouter()
 
+IMPORT_BATCH_SIZE = 2000
+IMPORT_MAX_REPORTED_ERRORS = 500
+EXPORT_BATCH_SIZE = 2000
+
 @router.get("/", response_model=List[TransactionResponse])
-async def get_transactions(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud_transactions.get_transactions(db, user_id=current_user.id)
+async def get_transactions(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    filters: TransactionFilter = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Any page of any filter is unchanged until the user's data version moves
+    etag = conditional.data_etag("transactions", current_user.id, await crud_sync.current_version(db, current_user.id))
+    if conditional.not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    try:
+        transactions, next_cursor = await crud_transactions.get_transactions(
+            db, user_id=current_user.id, limit=limit, cursor=cursor, filters=filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # The body stays a plain list; the next page is advertised in a header
+    response = conditional.tag(ORJSONResponse(row_serializers.transaction.dump_all(transactions)), etag)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+@router.get("/count")
+async def count_transactions(
+    request: Request,
+    filters: TransactionFilter = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # The list is paged, so totals come from here rather than from len(list)
+    etag = conditional.data_etag("transactions-count", current_user.id, await crud_sync.current_version(db, current_user.id))
+    if conditional.not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    count = await crud_transactions.count_transactions(db, user_id=current_user.id, filters=filters)
+    return conditional.tag(ORJSONResponse({"count": count}), etag)
+
+@router.get("/search", response_model=List[TransactionResponse])
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    filters: TransactionFilter = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    transactions = await crud_search.search_transactions(
+        db, user_id=current_user.id, query=q, filters=filters, limit=limit + 1, offset=offset
+    )
+    # Ranked results cannot be keyset-paged, so the next page is an offset
+    response = ORJSONResponse(row_serializers.transaction.dump_all(transactions[:limit]))
+    if len(transactions) > limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return response
+
+async def _check_category(db: AsyncSession, transaction: TransactionCreate, user_id: int):
+    # Served from the category catalog; no query unless the id is unknown
+    if await crud_categories.get_category(db, category_id=transaction.category_id, user_id=user_id) is None:
+        raise HTTPException(status_code=400, detail="Category not found")
+
+async def _check_wallet(db: AsyncSession, transaction: TransactionCreate, user_id: int):
+    if transaction.wallet_id is not None and await crud_wallets.get_wallet(db, wallet_id=transaction.wallet_id, user_id=user_id) is None:
+        raise HTTPException(status_code=400, detail="Wallet not found")
 
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(transaction: TransactionCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    await _check_category(db, transaction, current_user.id)
+    await _check_wallet(db, transaction, current_user.id)
     return await crud_transactions.create_transaction(db, transaction=transaction, user_id=current_user.id)
 
+@router.post("/batch", response_model=List[TransactionBatchResult])
+async def apply_batch(batch: TransactionBatchRequest, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    try:
+        return await crud_transactions.apply_transaction_batch(db, operations=batch.operations, user_id=current_user.id)
+    except IntegrityError:
+        # The same op_ids were committed by a concurrent retry; replaying will return them
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Batch conflicted with a concurrent request, please retry")
+
 @router.put("/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(transaction_id: int, transaction: TransactionCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    await _check_category(db, transaction, current_user.id)
+    await _check_wallet(db, transaction, current_user.id)
     db_transaction = await crud_transactions.update_transaction(db, transaction_id=transaction_id, transaction=transaction, user_id=current_user.id)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found or not authorized to edit")
     return db_transaction
 
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+async def _run_import(upload: UploadFile, parser, default_category_id: Optional[int], wallet_id: Optional[int], user_id: int):
+    """Parse, validate and insert an upload batch by batch, yielding NDJSON progress lines."""
+    processed = imported = failed = reported = 0
+    rows = parser(upload.file)
+    # Own session: the stream outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        # Rows are checked one by one against this set, so start from a fresh copy
+        allowed_categories = await crud_categories.get_category_ids(db, user_id=user_id, reload=True)
+        allowed_wallets = await crud_wallets.get_wallet_ids(db, user_id)
+        try:
+            while True:
+                batch = await run_in_threadpool(lambda: list(islice(rows, IMPORT_BATCH_SIZE)))
+                if not batch:
+                    break
+
+                valid, errors = [], []
+                for row_number, fields in batch:
+                    if isinstance(fields, importers.ImportRowError):
+                        errors.append({"row": row_number, "error": str(fields)})
+                        continue
+                    if default_category_id is not None:
+                        fields.setdefault("category_id", default_category_id)
+                    if wallet_id is not None:
+                        fields.setdefault("wallet_id", wallet_id)
+                    try:
+                        transaction = TransactionCreate(**fields)
+                    except ValidationError as exc:
+                        errors.append({"row": row_number, "error": _validation_message(exc)})
+                        continue
+                    if transaction.category_id not in allowed_categories:
+                        errors.append({"row": row_number, "error": f"Unknown category {transaction.category_id}"})
+                        continue
+                    if transaction.wallet_id is not None and transaction.wallet_id not in allowed_wallets:
+                        errors.append({"row": row_number, "error": f"Unknown wallet {transaction.wallet_id}"})
+                        continue
+                    valid.append(transaction)
+
+                imported += await crud_transactions.bulk_create_transactions(db, valid, user_id=user_id)
+                processed += len(batch)
+                failed += len(errors)
+                shown = errors[:max(0, IMPORT_MAX_REPORTED_ERRORS - reported)]
+                reported += len(shown)
+                yield json.dumps({"event": "progress", "processed": processed, "imported": imported, "failed": failed, "errors": shown}) + "\n"
+        except Exception as exc:
+            await db.rollback()
+            yield json.dumps({"event": "error", "processed": processed, "imported": imported, "failed": failed, "detail": str(exc)}) + "\n"
+            return
+    yield json.dumps({"event": "done", "processed": processed, "imported": imported, "failed": failed}) + "\n"
+
+@router.post("/import")
+async def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    category_id: Optional[int] = Form(None),
+    wallet_id: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk import a CSV, OFX/QFX or QIF statement.
+
+    Streams one JSON line per committed batch with running counts and the
+    rows that failed. OFX and QIF carry no categories, so category_id is
+    used for every row that does not name one; wallet_id likewise links rows
+    to the account the statement came from.
+    """
+    try:
+        parser = importers.PARSERS[importers.detect_format(file.filename, format)]
+    except (ValueError, KeyError):
+        raise HTTPException(status_code=400, detail="Unsupported file type; use CSV, OFX or QIF")
+    return StreamingResponse(
+        _run_import(file, parser, category_id, wallet_id, current_user.id),
+        media_type="application/x-ndjson"
+    )
+
+async def _run_export(writer, user_id: int, filters: TransactionFilter):
+    # Own session: the stream outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        batches = crud_transactions.stream_transactions(db, user_id=user_id, filters=filters, batch_size=EXPORT_BATCH_SIZE)
+        async for chunk in writer(batches):
+            yield chunk
+
+@router.get("/export")
+async def export_transactions(
+    format: Literal["csv", "jsonl", "parquet", "arrow"] = "csv",
+    filters: TransactionFilter = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Download every matching transaction, oldest first, streamed as it is read.
+
+    csv and jsonl are written row by row; parquet and arrow (an Arrow IPC
+    stream) are written one EXPORT_BATCH_SIZE batch at a time and need pyarrow
+    installed on the server.
+    """
+    writer, media_type, extension, needs_arrow = exporters.WRITERS[format]
+    if needs_arrow and not exporters.arrow_available():
+        raise HTTPException(status_code=501, detail=f"{format} export is not available on this server")
+    return StreamingResponse(
+        _run_export(writer, current_user.id, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{extension}"'}
+    )
+
 @router.post("/upload")
-async def upload_receipt(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join("uploads", unique_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    return {"receipt_url": f"/uploads/{unique_filename}"}
+async def upload_receipt(background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+    try:
+        stored = await storage.save_upload(file)
+    except storage.UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    background_tasks.add_task(images.process_upload, stored.key)
+    return {"receipt_url": stored.url, "receipt_variants": images.variant_urls(stored.url)}
 
 @router.delete("/{transaction_id}")
 async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -0,0 +1,63 @@
+import mimetypes
+import os
+import re
+import time
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse
+from app.utils import storage as upload_storage
+from app.utils.storage import storage, LocalStorage, IMMUTABLE_CACHE_CONTROL
+from app.core.conditional import etag_matches
+
+router = APIRouter()
+
+# ab/<sha256>[_<variant>].<ext>, as written by save_upload and the image variants
+_CONTENT_KEY = re.compile(r"^[0-9a-f]{2}/(?P<tag>[0-9a-f]{64}(?:_[a-z_]+)?)(?:\.[a-z0-9]{1,8})?$")
+
+def _check_key(key: str):
+    # Dot segments would escape the upload dir or expose .incoming temp files
+    if any(not part or part.startswith(".") for part in key.split("/")):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+def _signed_redirect(key: str) -> Response:
+    now = time.time()
+    expires = upload_storage.signed_expiry(now)
+    # Clients reuse the redirect until the window rolls over; the target stays valid a TTL longer
+    max_age = max(int(expires - now) - upload_storage.UPLOAD_URL_TTL, 0)
+    return RedirectResponse(
+        storage.signed_url(key, expires),
+        status_code=307,
+        headers={"Cache-Control": f"private, max-age={max_age}"},
+    )
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def get_upload(key: str, request: Request):
+    _check_key(key)
+    if upload_storage.UPLOAD_URL_MODE == "signed":
+        return _signed_redirect(key)
+    if not isinstance(storage, LocalStorage):
+        return RedirectResponse(storage.public_object_url(key), status_code=301, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+    if_none_match = request.headers.get("if-none-match")
+    match = _CONTENT_KEY.match(key)
+    if match is not None:
+        # The key is the content hash, so a matching tag is answered without touching the disk
+        headers = {"ETag": f'"{match.group("tag")}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    else:
+        # Files from before content addressing can be replaced in place; revalidate them
+        headers = {"Cache-Control": "no-cache"}
+
+    path = storage.path(key)
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    # FileResponse answers Range / If-Range requests with 206 on its own
+    response = FileResponse(path, stat_result=stat_result, media_type=media_type, headers=headers)
+    if if_none_match and etag_matches(if_none_match, response.headers["etag"]):
+        return Response(status_code=304, headers={"ETag": response.headers["etag"], "Cache-Control": headers["Cache-Control"]})
+    return response
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.db.database import get_db
 from app.schemas.schemas import WalletCreate, WalletResponse
 from app.crud import wallets as crud_wallets
+from app.crud import sync as crud_sync
 from app.routers.auth import get_current_user
 from app.models.models import User
+from app.schemas import rows as row_serializers
+from app.core.responses import ORJSONResponse
+from app.core import conditional
 
 router = APIRouter()
 
 @router.get("/", response_model=List[WalletResponse])
-async def get_wallets(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await crud_wallets.get_wallets(db, user_id=current_user.id)
+async def get_wallets(request: Request, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    etag = conditional.data_etag("wallets", current_user.id, await crud_sync.current_version(db, current_user.id))
+    if conditional.not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    return conditional.tag(ORJSONResponse(row_serializers.wallet.dump_all(await crud_wallets.get_wallets(db, user_id=current_user.id))), etag)
 
 @router.post("/", response_model=WalletResponse)
 async def create_wallet(wallet: WalletCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
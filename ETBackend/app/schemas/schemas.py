@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal, Dict
 from app.models.models import TransactionType, WalletType
+from app.utils.images import variant_urls
+from app.utils.dates import naive_utc
 
 # User Schemas
 class UserBase(BaseModel):
@@ -23,9 +25,14 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     id: int
     created_at: datetime
+    avatar_variants: Optional[Dict[str, str]] = None
     class Config:
         orm_mode = True
 
+    @validator("avatar_variants", always=True)
+    def _avatar_variants(cls, value, values):
+        return value or variant_urls(values.get("avatar_url"))
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
@@ -53,6 +60,9 @@ class WalletResponse(WalletBase):
     id: int
     user_id: int
     created_at: datetime
+    opening_balance: float = 0.0
+    credit_used: Optional[float] = None
+    credit_utilization: Optional[float] = None
     class Config:
         orm_mode = True
 
@@ -75,6 +85,7 @@ class CategoryResponse(CategoryBase):
 # Transaction Schemas
 class TransactionBase(BaseModel):
     category_id: int
+    wallet_id: Optional[int] = None
     type: TransactionType
     amount: float
     note: Optional[str] = None
@@ -82,16 +93,53 @@ class TransactionBase(BaseModel):
     receipt_url: Optional[str] = None
 
 class TransactionCreate(TransactionBase):
-    pass
+    # Stored as naive UTC, so the rollup month and report bounds agree with the row
+    @validator("date")
+    def _date_naive_utc(cls, value):
+        return naive_utc(value)
 
 class TransactionResponse(TransactionBase):
     id: int
     user_id: int
     date: datetime
     is_deleted: bool
+    receipt_variants: Optional[Dict[str, str]] = None
     class Config:
         orm_mode = True
 
+    @validator("receipt_variants", always=True)
+    def _receipt_variants(cls, value, values):
+        return value or variant_urls(values.get("receipt_url"))
+
+class TransactionFilter(BaseModel):
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    type: Optional[TransactionType] = None
+    category_id: Optional[int] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+    @validator("start_date", "end_date")
+    def _bounds_naive_utc(cls, value):
+        return naive_utc(value)
+
+class TransactionBatchOperation(BaseModel):
+    op_id: str = Field(..., min_length=1, max_length=64)
+    action: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[TransactionCreate] = None
+
+class TransactionBatchRequest(BaseModel):
+    operations: List[TransactionBatchOperation] = Field(..., max_length=500)
+
+class TransactionBatchResult(BaseModel):
+    op_id: str
+    action: str
+    status: Literal["applied", "failed"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+    replayed: bool = False
+
 # Budget Schemas
 class BudgetBase(BaseModel):
     category_id: int
@@ -107,3 +155,27 @@ class BudgetResponse(BudgetBase):
     user_id: int
     class Config:
         orm_mode = True
+
+class BudgetProgress(BudgetBase):
+    id: int
+    category_name: Optional[str] = None
+    category_icon: Optional[str] = None
+    spent: float
+    remaining: float
+    percentage: float
+    projected_spend: float
+
+# Sync Schemas
+class SyncDeleted(BaseModel):
+    transactions: List[int] = []
+    wallets: List[int] = []
+    categories: List[int] = []
+    budgets: List[int] = []
+
+class SyncResponse(BaseModel):
+    version: int
+    transactions: List[TransactionResponse] = []
+    wallets: List[WalletResponse] = []
+    categories: List[CategoryResponse] = []
+    budgets: List[BudgetResponse] = []
+    deleted: SyncDeleted
@@ -0,0 +1,15 @@
+"""Report date bounds. Transaction dates are stored and compared as naive UTC."""
+from datetime import datetime, timezone
+from typing import Optional
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """value in UTC without tzinfo; naive values are taken to be UTC already."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """An ISO 8601 query parameter (a trailing Z allowed) as naive UTC."""
+    if not value:
+        return None
+    return naive_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
@@ -0,0 +1,115 @@
+"""Streaming writers for transaction exports.
+
+Each writer takes an async iterator of row batches (lists of tuples in
+EXPORT_COLUMNS order) and yields encoded chunks as soon as a batch is
+written, so memory stays bounded by one batch whatever the history size.
+"""
+import csv
+import io
+import json
+from app.utils.dates import naive_utc
+
+EXPORT_COLUMNS = ("id", "date", "type", "amount", "category_id", "category", "wallet_id", "note", "receipt_url")
+
+def _plain(row):
+    # Enum members and datetimes become their JSON/CSV-friendly values
+    id_, date, type_, amount, category_id, category, wallet_id, note, receipt_url = row
+    return (id_, date.isoformat() if date else None, type_.value, amount, category_id, category, wallet_id, note, receipt_url)
+
+async def write_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for batch in batches:
+        writer.writerows(_plain(row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def write_jsonl(batches):
+    async for batch in batches:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _plain(row)))) + "\n" for row in batch)
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever has been written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.timestamp("us")),
+        ("type", pa.string()),
+        ("amount", pa.float64()),
+        ("category_id", pa.int64()),
+        ("category", pa.string()),
+        ("wallet_id", pa.int64()),
+        ("note", pa.string()),
+        ("receipt_url", pa.string()),
+    ])
+
+def _arrow_batch(pa, schema, batch):
+    columns = list(zip(*batch))
+    columns[2] = [type_.value for type_ in columns[2]]
+    # Timezone-aware values would force a tz-typed column; store naive UTC
+    columns[1] = [naive_utc(date) if date is not None else None for date in columns[1]]
+    return pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+async def _write_arrow(batches, open_writer):
+    import pyarrow as pa
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    writer = open_writer(pa, sink, schema)
+    async for batch in batches:
+        if batch:
+            writer.write_batch(_arrow_batch(pa, schema, batch))
+            yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def write_parquet(batches):
+    # One row group per batch, so the writer never holds more than a batch
+    def open_writer(pa, sink, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, schema, compression="snappy")
+    return _write_arrow(batches, open_writer)
+
+def write_arrow(batches):
+    def open_writer(pa, sink, schema):
+        return pa.ipc.new_stream(sink, schema)
+    return _write_arrow(batches, open_writer)
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+# format: (writer, media type, file extension, needs pyarrow)
+WRITERS = {
+    "csv": (write_csv, "text/csv", "csv", False),
+    "jsonl": (write_jsonl, "application/x-ndjson", "jsonl", False),
+    "parquet": (write_parquet, "application/vnd.apache.parquet", "parquet", True),
+    "arrow": (write_arrow, "application/vnd.apache.arrow.stream", "arrows", True),
+}
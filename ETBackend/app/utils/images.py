@@ -0,0 +1,133 @@
+"""Resized and recompressed variants of uploaded images.
+
+Variants are rendered on a process pool after the upload response has been
+sent, and stored next to the original under a derived content-addressed
+key, so their URLs can be computed from the original URL alone. An image
+that cannot be rendered gets copies of the original under the variant
+keys instead, so its advertised URLs still resolve and it is not retried.
+"""
+import asyncio
+import logging
+import mimetypes
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+load_dotenv()
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# name: (longest side in pixels, format, quality)
+VARIANTS = {
+    "thumb": (320, "WEBP", 70),
+    "medium": (1280, "WEBP", 80),
+    "medium_jpeg": (1280, "JPEG", 82),
+}
+_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
+_CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff"}
+
+try:
+    import pillow_heif
+except ImportError:
+    pillow_heif = None
+else:
+    # Pillow reads HEIC/HEIF only through this plugin; without it they get no variants
+    _IMAGE_EXTENSIONS |= {".heic", ".heif"}
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed original: .../<sha256>[.ext] at the end of a URL or key
+_ORIGINAL = re.compile(r"(?P<sha>[0-9a-f]{64})(?P<ext>\.[a-z0-9]{1,8})?$")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def variant_key(key: str, name: str) -> str:
+    match = _ORIGINAL.search(key)
+    format_ = VARIANTS[name][1]
+    return f"{key[:match.start()]}{match.group('sha')}_{name}{_EXTENSIONS[format_]}"
+
+def variant_urls(url: Optional[str]) -> Optional[Dict[str, str]]:
+    """URLs of every variant of an uploaded image, or None for other URLs.
+
+    Variants appear a moment after upload; clients fall back to the original
+    until they exist.
+    """
+    if not url:
+        return None
+    match = _ORIGINAL.search(url)
+    if match is None or (match.group("ext") or "").lower() not in _IMAGE_EXTENSIONS:
+        return None
+    return {name: variant_key(url, name) for name in VARIANTS}
+
+def render_variants(source_path: str, target_dir: str) -> Dict[str, str]:
+    """Write every variant of source_path into target_dir; runs in a worker process."""
+    from PIL import Image, ImageOps
+    if pillow_heif is not None:
+        pillow_heif.register_heif_opener()
+    try:
+        with Image.open(source_path) as image:
+            # Phone photos are often stored sideways with an EXIF rotation flag
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+            outputs = {}
+            for name, (size, format_, quality) in VARIANTS.items():
+                variant = image.copy()
+                variant.thumbnail((size, size), Image.LANCZOS)
+                path = os.path.join(target_dir, f"{name}{_EXTENSIONS[format_]}")
+                variant.save(path, format_, quality=quality, optimize=True)
+                outputs[name] = path
+            return outputs
+    except Exception:
+        # Unreadable, truncated, or a decompression bomb (DecompressionBombError)
+        logger.warning("Could not render variants of %s", source_path, exc_info=True)
+        return {}
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned, not forked: a fork would copy the server's event loop, open
+        # DB connections and threads into every worker
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def process_upload(key: str):
+    """Render and store the variants of the stored original `key` (no-op when not an image)."""
+    from app.utils.storage import storage
+    if variant_urls(key) is None or await storage.exists(variant_key(key, "thumb")):
+        return
+
+    work_dir = await run_in_threadpool(tempfile.mkdtemp, prefix="variants-")
+    try:
+        source_path = os.path.join(work_dir, "original")
+        await storage.get_file(key, source_path)
+        loop = asyncio.get_running_loop()
+        outputs = await loop.run_in_executor(_get_pool(), render_variants, source_path, work_dir)
+        if outputs:
+            content_types = {name: _CONTENT_TYPES[VARIANTS[name][1]] for name in outputs}
+        else:
+            # Copies of the original keep the advertised URLs working
+            content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            outputs, content_types = {}, {}
+            for name in VARIANTS:
+                outputs[name] = os.path.join(work_dir, f"fallback-{name}")
+                await run_in_threadpool(shutil.copyfile, source_path, outputs[name])
+                content_types[name] = content_type
+        # The thumbnail goes last: its presence marks the set as complete
+        for name in sorted(outputs, key=lambda name: name == "thumb"):
+            await storage.put_file(outputs[name], variant_key(key, name), content_types[name])
+    finally:
+        await run_in_threadpool(shutil.rmtree, work_dir, True)
@@ -0,0 +1,167 @@
+"""Streaming parsers for bank statement files.
+
+Each parser reads a binary file object incrementally and yields
+(row_number, fields) pairs, where fields is a dict of raw values keyed by
+TransactionCreate field names. A row that cannot be parsed at all yields
+(row_number, ImportRowError) instead, so one bad line never stops an import.
+"""
+import codecs
+import csv
+import io
+import re
+from datetime import datetime
+
+CHUNK_SIZE = 64 * 1024
+
+class ImportRowError(Exception):
+    pass
+
+def detect_format(filename: str, declared: str = None) -> str:
+    if declared:
+        return declared.lower()
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("csv", "ofx", "qfx", "qif"):
+        return "ofx" if extension == "qfx" else extension
+    raise ValueError("Unsupported file type; use CSV, OFX or QIF")
+
+def _split_amount(raw: str):
+    # Statements use signed amounts; we store a positive amount plus a type
+    amount = float(raw.replace(",", "").strip())
+    return abs(amount), ("expense" if amount < 0 else "income")
+
+# CSV
+
+_CSV_ALIASES = {
+    "date": "date", "posted": "date", "transaction date": "date",
+    "amount": "amount", "value": "amount",
+    "type": "type",
+    "category_id": "category_id",
+    "wallet_id": "wallet_id",
+    "note": "note", "description": "note", "memo": "note", "payee": "note",
+}
+
+def parse_csv(binary_file):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_CSV_ALIASES.get(name.strip().lower()) for name in header]
+        for row_number, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            fields = {column: cell.strip() for column, cell in zip(columns, row) if column and cell.strip()}
+            try:
+                if "amount" in fields:
+                    amount, signed_type = _split_amount(fields["amount"])
+                    fields["amount"] = amount
+                    fields.setdefault("type", signed_type)
+                yield row_number, fields
+            except ValueError as exc:
+                yield row_number, ImportRowError(f"Invalid amount: {exc}")
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
+
+# OFX / QFX (SGML or XML flavour)
+
+_OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+def _parse_ofx_date(raw: str) -> datetime:
+    digits = re.match(r"\d+", raw.strip()).group(0)
+    return datetime.strptime(digits[:14].ljust(14, "0"), "%Y%m%d%H%M%S")
+
+def parse_ofx(binary_file):
+    decoder = codecs.getincrementaldecoder("latin-1")()
+    buffer = ""
+    current = None
+    row_number = 0
+    while True:
+        chunk = binary_file.read(CHUNK_SIZE)
+        buffer += decoder.decode(chunk, final=not chunk)
+        # Hold back a possibly incomplete trailing tag until the next chunk
+        cut = len(buffer) if not chunk else buffer.rfind("<")
+        if cut <= 0 and chunk:
+            continue
+        for closing, tag, value in _OFX_TOKEN.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    current = {}
+                    row_number += 1
+                elif current is not None:
+                    yield row_number, _ofx_fields(current)
+                    current = None
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+def _ofx_fields(raw: dict):
+    try:
+        amount, signed_type = _split_amount(raw["TRNAMT"])
+        note = " - ".join(part for part in (raw.get("NAME"), raw.get("MEMO")) if part) or None
+        return {
+            "date": _parse_ofx_date(raw["DTPOSTED"]),
+            "amount": amount,
+            "type": signed_type,
+            "note": note,
+        }
+    except (KeyError, ValueError, AttributeError) as exc:
+        return ImportRowError(f"Invalid OFX transaction: {exc}")
+
+# QIF
+
+_QIF_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y-%m-%d", "%m-%d-%Y")
+
+def _parse_qif_date(raw: str) -> datetime:
+    value = raw.strip().replace("' ", "/").replace("'", "/").replace(" ", "")
+    for fmt in _QIF_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {raw!r}")
+
+def parse_qif(binary_file):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", errors="replace")
+    try:
+        record = {}
+        row_number = 0
+        for line in text:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            code, value = line[0], line[1:].strip()
+            if code == "^":
+                row_number += 1
+                yield row_number, _qif_fields(record)
+                record = {}
+            else:
+                record.setdefault(code, value)
+        if record:
+            row_number += 1
+            yield row_number, _qif_fields(record)
+    finally:
+        text.detach()
+
+def _qif_fields(raw: dict):
+    try:
+        amount, signed_type = _split_amount(raw.get("T") or raw["U"])
+        note = " - ".join(part for part in (raw.get("P"), raw.get("M")) if part) or None
+        return {
+            "date": _parse_qif_date(raw["D"]),
+            "amount": amount,
+            "type": signed_type,
+            "note": note,
+        }
+    except (KeyError, ValueError) as exc:
+        return ImportRowError(f"Invalid QIF record: {exc}")
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qif": parse_qif,
+}
@@ -1,50 +1,253 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, func
 from app.models.models import RecurringTransaction, Transaction, Wallet, TransactionType
 from app.db.database import AsyncSessionLocal
+from app.crud import rollups
+from app.crud import sync
+from app.crud import leases
+from app.crud import wallets as crud_wallets
+from app.core.cache import report_cache
 from datetime import datetime, timedelta
+import asyncio
+import calendar
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
-async def process_recurring_transactions():
+# Rules handled per database transaction
+RECURRING_CHUNK_SIZE = int(os.getenv("RECURRING_CHUNK_SIZE", "1000"))
+# Most missed occurrences one rule may create per run; the rest follow next run
+RECURRING_MAX_CATCH_UP = int(os.getenv("RECURRING_MAX_CATCH_UP", "400"))
+RECURRING_INTERVAL_HOURS = float(os.getenv("RECURRING_INTERVAL_HOURS", "24"))
+# Users per shard; each user_id range is a separately leased job
+RECURRING_SHARD_SIZE = int(os.getenv("RECURRING_SHARD_SIZE", "50000"))
+
+WALLET_RECONCILE_INTERVAL_HOURS = float(os.getenv("WALLET_RECONCILE_INTERVAL_HOURS", "6"))
+WALLET_RECONCILE_BATCH_SIZE = int(os.getenv("WALLET_RECONCILE_BATCH_SIZE", "500"))
+
+# How often each worker checks for due jobs, and how long a claim lives without a heartbeat
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "300"))
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "120"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+def add_months(dt: datetime, months: int, anchor_day: int) -> datetime:
+    """Move dt by whole months, landing on anchor_day or the month's last day if shorter."""
+    index = dt.year * 12 + dt.month - 1 + months
+    year, month = divmod(index, 12)
+    day = min(anchor_day, calendar.monthrange(year, month + 1)[1])
+    return dt.replace(year=year, month=month + 1, day=day)
+
+def next_occurrence(dt: datetime, frequency: str, anchor_day: int) -> datetime:
+    if frequency == "daily":
+        return dt + timedelta(days=1)
+    if frequency == "weekly":
+        return dt + timedelta(weeks=1)
+    if frequency == "monthly":
+        return add_months(dt, 1, anchor_day)
+    return add_months(dt, 12, anchor_day)
+
+def due_occurrences(next_run_date: datetime, frequency: str, anchor_day: int, now: datetime):
+    """Every occurrence up to now (at most RECURRING_MAX_CATCH_UP) and the next run date after them."""
+    occurrences = []
+    run_date = next_run_date
+    while run_date <= now and len(occurrences) < RECURRING_MAX_CATCH_UP:
+        occurrences.append(run_date)
+        run_date = next_occurrence(run_date, frequency, anchor_day)
+    return occurrences, run_date
+
+def _filter_users(query, user_range):
+    if user_range is not None:
+        low, high = user_range
+        query = query.filter(RecurringTransaction.user_id >= low, RecurringTransaction.user_id <= high)
+    return query
+
+async def _process_chunk(db: AsyncSession, now: datetime, after_id: int, user_range=None):
+    query = select(RecurringTransaction, Transaction).join(
+        Transaction, Transaction.id == RecurringTransaction.template_transaction_id
+    ).filter(
+        RecurringTransaction.next_run_date <= now,
+        RecurringTransaction.frequency.in_(FREQUENCIES),
+        RecurringTransaction.id > after_id
+    )
+    query = _filter_users(query, user_range).order_by(RecurringTransaction.id).limit(RECURRING_CHUNK_SIZE)
+    # Another worker already holding a rule skips it rather than running it twice
+    # (ignored on SQLite, where writers are serialized anyway)
+    result = await db.execute(query.with_for_update(skip_locked=True, of=RecurringTransaction))
+    pairs = result.all()
+    if not pairs:
+        return None, 0, 0, set()
+
+    versions = await sync.next_versions(db, {template.user_id for _, template in pairs})
+    rows = []
+    advances = []
+    deltas = {}
+    balances = {}
+    for task, template in pairs:
+        # Monthly and yearly rules stay on the template's day of month
+        anchor_day = (template.date or task.next_run_date).day
+        occurrences, next_run_date = due_occurrences(task.next_run_date, task.frequency, anchor_day, now)
+        for occurred_at in occurrences:
+            rows.append({
+                "user_id": template.user_id,
+                "category_id": template.category_id,
+                "wallet_id": template.wallet_id,
+                "type": template.type,
+                "amount": template.amount,
+                "note": f"Recurring: {template.note}",
+                "date": occurred_at,
+                "is_deleted": False,
+                "version": versions[template.user_id],
+            })
+            key = (template.user_id, occurred_at.year, occurred_at.month, template.category_id, template.type)
+            total, count = deltas.get(key, (0.0, 0))
+            deltas[key] = (total + template.amount, count + 1)
+            crud_wallets.collect_balance_delta(balances.setdefault(template.user_id, {}), template.wallet_id, template.type, template.amount)
+        advances.append({"id": task.id, "next_run_date": next_run_date})
+
+    if rows:
+        await db.execute(insert(Transaction), rows)
+    await rollups.apply_user_deltas(db, deltas)
+    for user_id, user_balances in balances.items():
+        await crud_wallets.apply_balance_deltas(db, user_id, user_balances, versions[user_id])
+    await db.execute(update(RecurringTransaction), advances)
+    await db.commit()
+
+    for user_id in versions:
+        await report_cache.invalidate_user(user_id)
+    return pairs[-1][0].id, len(pairs), len(rows), set(versions)
+
+async def process_recurring_transactions(now: datetime = None, user_range=None):
+    """Create every due occurrence of every recurring rule, one committed chunk at a time.
+
+    Returns counts for the run. A crash part-way leaves finished chunks
+    committed and the rest still due for the next run. user_range limits the
+    run to rules of users with low <= user_id <= high.
+    """
+    now = now or datetime.utcnow()
+    stats = {"rules": 0, "transactions": 0, "users": 0}
+    users = set()
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            last_id, rules, created, touched = await _process_chunk(db, now, after_id, user_range)
+        if last_id is None:
+            break
+        stats["rules"] += rules
+        stats["transactions"] += created
+        users |= touched
+        after_id = last_id
+    stats["users"] = len(users)
+    return stats
+
+async def _heartbeat(name: str, work: asyncio.Task):
+    """Keep the lease alive while work runs; returns, having cancelled work, once the lease is lost."""
+    ttl = timedelta(seconds=SCHEDULER_LEASE_SECONDS)
+    while True:
+        await asyncio.sleep(SCHEDULER_LEASE_SECONDS / 3)
+        async with AsyncSessionLocal() as db:
+            renewed = await leases.renew_lease(db, name, WORKER_ID, ttl)
+        if not renewed:
+            # Another worker may already be running the job; stop rather than run it twice
+            logger.warning("Lost lease on job %s; stopping it", name)
+            work.cancel()
+            return
+
+async def run_leased_job(name: str, interval: timedelta, job):
+    """Run job() here if this worker wins the lease for name; True when it ran.
+
+    A job whose lease is lost part-way (a missed heartbeat let another worker
+    take over) is cancelled; committed chunks stay, the rest is redone by the
+    new holder.
+    """
+    async with AsyncSessionLocal() as db:
+        if not await leases.acquire_lease(db, name, WORKER_ID, timedelta(seconds=SCHEDULER_LEASE_SECONDS)):
+            return False
+
+    started = time.perf_counter()
+    scheduled_at = datetime.utcnow()
+    work = asyncio.ensure_future(job())
+    heartbeat = asyncio.create_task(_heartbeat(name, work))
+    next_due_at, error, lost = None, None, False
+    try:
+        await work
+        next_due_at = scheduled_at + interval
+    except asyncio.CancelledError:
+        lost = heartbeat.done() and not heartbeat.cancelled()
+        if not lost:
+            raise
+    except Exception as exc:
+        logger.exception("Scheduled job %s failed", name)
+        error = repr(exc)
+    finally:
+        heartbeat.cancel()
+        # A lost lease belongs to the new holder; there is nothing of ours to release
+        if not lost:
+            async with AsyncSessionLocal() as db:
+                await leases.release_lease(db, name, WORKER_ID, next_due_at, time.perf_counter() - started, error)
+    return True
+
+async def run_recurring_jobs():
+    """Offer every recurring-transaction shard to this worker, in random order.
+
+    Shards are fixed user_id ranges, so every worker agrees on them; with
+    several workers polling, each picks up whichever shards are still free.
+    """
+    now = datetime.utcnow()
     async with AsyncSessionLocal() as db:
-        now = datetime.utcnow()
         result = await db.execute(
-            select(RecurringTransaction).filter(RecurringTransaction.next_run_date <= now)
+            select(func.max(RecurringTransaction.user_id)).filter(RecurringTransaction.next_run_date <= now)
+        )
+        max_user_id = result.scalar_one_or_none()
+    if max_user_id is None:
+        return
+
+    shards = list(range((max_user_id - 1) // RECURRING_SHARD_SIZE + 1))
+    random.shuffle(shards)
+    interval = timedelta(hours=RECURRING_INTERVAL_HOURS)
+    for shard in shards:
+        user_range = (shard * RECURRING_SHARD_SIZE + 1, (shard + 1) * RECURRING_SHARD_SIZE)
+        await run_leased_job(
+            f"recurring_transactions:{shard}", interval,
+            lambda: process_recurring_transactions(user_range=user_range)
         )
-        recurring_tasks = result.scalars().all()
-        
-        for task in recurring_tasks:
-            # Get template transaction
-            result = await db.execute(select(Transaction).filter(Transaction.id == task.template_transaction_id))
-            template = result.scalars().first()
-            
-            if template:
-                # Create new transaction
-                new_tx = Transaction(
-                    user_id=template.user_id,
-                    category_id=template.category_id,
-                    type=template.type,
-                    amount=template.amount,
-                    note=f"Recurring: {template.note}",
-                    date=now
-                )
-                db.add(new_tx)
-                
-                # Update next run date
-                if task.frequency == "daily":
-                    task.next_run_date = now + timedelta(days=1)
-                elif task.frequency == "weekly":
-                    task.next_run_date = now + timedelta(weeks=1)
-                elif task.frequency == "monthly":
-                    # Simple monthly increment
-                    task.next_run_date = now + timedelta(days=30)
-                elif task.frequency == "yearly":
-                    task.next_run_date = now + timedelta(days=365)
-                    
-        await db.commit()
+
+async def reconcile_wallet_balances():
+    """Walk every wallet in batches and repair balances that drifted from the ledger."""
+    stats = {"checked": 0, "corrected": 0}
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            last_id, checked, corrected = await crud_wallets.reconcile_balances(db, after_id, WALLET_RECONCILE_BATCH_SIZE)
+        if last_id is None:
+            break
+        stats["checked"] += checked
+        stats["corrected"] += corrected
+        after_id = last_id
+    if stats["corrected"]:
+        logger.warning("Wallet reconciler repaired %s of %s balances", stats["corrected"], stats["checked"])
+    return stats
+
+async def run_maintenance_jobs():
+    await run_leased_job("wallet_reconcile", timedelta(hours=WALLET_RECONCILE_INTERVAL_HOURS), reconcile_wallet_balances)
 
 def start_scheduler():
-    scheduler.add_job(process_recurring_transactions, 'interval', hours=24)
+    # Every worker polls; the job_leases table decides which one runs each job
+    scheduler.add_job(run_recurring_jobs, 'interval', seconds=SCHEDULER_POLL_SECONDS, max_instances=1, coalesce=True)
+    scheduler.add_job(run_maintenance_jobs, 'interval', seconds=SCHEDULER_POLL_SECONDS, max_instances=1, coalesce=True)
     scheduler.start()
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,210 @@
+"""Upload storage: content-addressed files on local disk or an S3-compatible store.
+
+Uploads are streamed to a temporary file in chunks, hashed on the way, and
+stored under their SHA-256, so the same photo uploaded twice is kept once.
+All blocking file and network work runs in the thread pool.
+"""
+import base64
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+load_dotenv()
+
+UPLOAD_STORAGE = os.getenv("UPLOAD_STORAGE", "local")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION")
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+
+# "direct": the app serves /uploads itself. "signed": /uploads redirects to a
+# short-lived signed URL and the bytes come from the object store or proxy.
+UPLOAD_URL_MODE = os.getenv("UPLOAD_URL_MODE", "direct")
+UPLOAD_URL_TTL = int(os.getenv("UPLOAD_URL_TTL", "3600"))
+UPLOAD_SIGNING_KEY = os.getenv("UPLOAD_SIGNING_KEY")
+UPLOAD_SIGNED_BASE_URL = os.getenv("UPLOAD_SIGNED_BASE_URL", "/protected-uploads")
+
+# Content-addressed keys never change what they point at
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+class UploadTooLarge(Exception):
+    pass
+
+@dataclass
+class StoredFile:
+    key: str
+    url: str
+    size: int
+    sha256: str
+    content_type: Optional[str]
+    deduplicated: bool
+
+def content_key(sha256: str, extension: str) -> str:
+    # Two-level fan-out keeps directories small on local disk
+    return f"{sha256[:2]}/{sha256}{extension}"
+
+def safe_extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if _EXTENSION.match(extension) else ""
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+    def signed_url(self, key: str, expires: int) -> str:
+        """URL checked by nginx's secure_link module, which then serves the file itself.
+
+        Matching config: secure_link $arg_md5,$arg_expires;
+        secure_link_md5 "$secure_link_expires$uri <UPLOAD_SIGNING_KEY>";
+        """
+        if not UPLOAD_SIGNING_KEY:
+            raise RuntimeError("UPLOAD_URL_MODE=signed needs UPLOAD_SIGNING_KEY")
+        uri = f"{UPLOAD_SIGNED_BASE_URL.rstrip('/')}/{key}"
+        # nginx signs $uri, the path alone, even when the base URL names a host
+        digest = hashlib.md5(f"{expires}{urlsplit(uri).path} {UPLOAD_SIGNING_KEY}".encode()).digest()
+        token = base64.urlsafe_b64encode(digest).decode().rstrip("=")
+        return f"{uri}?md5={token}&expires={expires}"
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self.path(key))
+
+    async def put_file(self, source_path: str, key: str, content_type: Optional[str] = None):
+        def move():
+            path = self.path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Same filesystem in the usual setup, so this is an atomic rename
+            shutil.move(source_path, path)
+            os.chmod(path, 0o644)
+        await run_in_threadpool(move)
+
+    async def get_file(self, key: str, target_path: str):
+        await run_in_threadpool(shutil.copyfile, self.path(key), target_path)
+
+class S3Storage:
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None, public_url: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.public_url = (public_url or f"{endpoint_url or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/")
+        # Credentials come from the usual AWS_* environment / config chain
+        self._client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def url(self, key: str) -> str:
+        if UPLOAD_URL_MODE == "signed":
+            # Private bucket: clients go through /uploads, which hands out presigned URLs
+            return f"/uploads/{key}"
+        return f"{self.public_url}/{key}"
+
+    def public_object_url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def signed_url(self, key: str, expires: int) -> str:
+        # Presigning is a local HMAC computation, no request to the store
+        return self._client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=max(expires - int(time.time()), 1),
+        )
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            await run_in_threadpool(self._client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def put_file(self, source_path: str, key: str, content_type: Optional[str] = None):
+        extra = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra["ContentType"] = content_type
+        await run_in_threadpool(self._client.upload_file, source_path, self.bucket, key, ExtraArgs=extra)
+        await run_in_threadpool(os.remove, source_path)
+
+    async def get_file(self, key: str, target_path: str):
+        await run_in_threadpool(self._client.download_file, self.bucket, key, target_path)
+
+def create_storage():
+    if UPLOAD_STORAGE == "s3":
+        if not S3_BUCKET:
+            raise RuntimeError("UPLOAD_STORAGE=s3 needs S3_BUCKET")
+        return S3Storage(S3_BUCKET, endpoint_url=S3_ENDPOINT_URL, region=S3_REGION, public_url=S3_PUBLIC_URL)
+    return LocalStorage(UPLOAD_DIR)
+
+storage = create_storage()
+
+def signed_expiry(now: Optional[float] = None) -> int:
+    """Expiry for signed URLs, rounded up to a TTL boundary.
+
+    Every request in the same window gets the same URL, so clients and
+    proxies can keep caching it; it stays valid for at least one more TTL.
+    """
+    now = int(now if now is not None else time.time())
+    return (now // UPLOAD_URL_TTL + 2) * UPLOAD_URL_TTL
+
+def _consume(chunk: bytes, digest, handle):
+    # hashlib drops the GIL on large buffers, so both steps stay off the loop
+    digest.update(chunk)
+    handle.write(chunk)
+
+async def save_upload(upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> StoredFile:
+    """Stream an upload into storage under its content hash.
+
+    Raises UploadTooLarge as soon as more than max_bytes have arrived.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    # Inside the upload dir so the final move is a rename, not a copy
+    temp_dir = None
+    if isinstance(storage, LocalStorage):
+        temp_dir = os.path.join(UPLOAD_DIR, ".incoming")
+        await run_in_threadpool(os.makedirs, temp_dir, exist_ok=True)
+    handle = await run_in_threadpool(tempfile.NamedTemporaryFile, dir=temp_dir, delete=False)
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File is larger than {max_bytes // (1024 * 1024)} MB")
+            await run_in_threadpool(_consume, chunk, digest, handle)
+        await run_in_threadpool(handle.close)
+
+        sha256 = digest.hexdigest()
+        key = content_key(sha256, safe_extension(upload.filename))
+        deduplicated = await storage.exists(key)
+        if deduplicated:
+            await run_in_threadpool(os.remove, handle.name)
+        else:
+            await storage.put_file(handle.name, key, upload.content_type)
+        return StoredFile(key=key, url=storage.url(key), size=size, sha256=sha256, content_type=upload.content_type, deduplicated=deduplicated)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        if os.path.exists(handle.name):
+            await run_in_threadpool(os.remove, handle.name)
+        raise
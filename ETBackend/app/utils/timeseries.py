@@ -0,0 +1,89 @@
+"""Dense income/expense series built from sparse SQL bucket totals.
+
+SQL returns one row per (bucket, type) that had any transactions; everything
+here works on whole NumPy arrays, so the cost depends on the number of
+buckets and rows, never on a Python loop over the series.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+def as_days(values) -> np.ndarray:
+    # Drivers hand back DATE(...) either as date objects or as ISO strings
+    return np.array([str(value)[:10] for value in values], dtype="datetime64[D]")
+
+def month_starts(years, months) -> np.ndarray:
+    index = np.asarray(years, dtype=np.int64) * 12 + np.asarray(months, dtype=np.int64) - 1 - 1970 * 12
+    return index.astype("datetime64[M]").astype("datetime64[D]")
+
+def bucket_axis(start: date, end: date, granularity: str):
+    """First day of every bucket from start to end, inclusive, as datetime64[D]."""
+    if granularity == "day":
+        return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    if granularity == "week":
+        first = start - timedelta(days=start.weekday())
+        return np.arange(np.datetime64(first, "D"), np.datetime64(end, "D") + 1, 7)
+    months = np.arange(np.datetime64(start, "M"), np.datetime64(end, "M") + 1)
+    return months.astype("datetime64[D]")
+
+def bucket_index(days: np.ndarray, axis: np.ndarray, granularity: str) -> np.ndarray:
+    """Position on axis of the bucket holding each day."""
+    if granularity == "day":
+        return (days - axis[0]).astype(np.int64)
+    if granularity == "week":
+        return (days - axis[0]).astype(np.int64) // 7
+    return (days.astype("datetime64[M]") - axis[0].astype("datetime64[M]")).astype(np.int64)
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over up to `window` buckets; the first buckets average what exists."""
+    sums = np.cumsum(values)
+    shifted = np.concatenate((np.zeros(window), sums))[:len(values)]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return (sums - shifted) / counts
+
+def period_delta(values: np.ndarray):
+    """Change from the previous bucket, absolute and as a fraction (NaN where undefined)."""
+    previous = np.concatenate(([np.nan], values[:-1]))
+    delta = values - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(previous != 0, delta / previous, np.nan)
+    return delta, ratio
+
+def _to_list(values: np.ndarray):
+    # JSON has no NaN; undefined points become null
+    rounded = np.round(values, 2).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+def build_series(days: np.ndarray, types, amounts, start: date, end: date, granularity: str, window: int, income_type, expense_type):
+    """Gap-filled columns for the range; days (datetime64[D]), types and amounts are the sparse SQL rows."""
+    axis = bucket_axis(start, end, granularity)
+    size = len(axis)
+    income = np.zeros(size)
+    expense = np.zeros(size)
+
+    if len(days):
+        index = bucket_index(days, axis, granularity)
+        amounts = np.asarray(amounts, dtype=float)
+        types = np.asarray(types, dtype=object)
+        inside = (index >= 0) & (index < size)
+        income = np.bincount(index[inside], weights=np.where(types == income_type, amounts, 0.0)[inside], minlength=size)
+        expense = np.bincount(index[inside], weights=np.where(types == expense_type, amounts, 0.0)[inside], minlength=size)
+
+    net = income - expense
+    expense_delta, expense_delta_pct = period_delta(expense)
+    net_delta, _ = period_delta(net)
+    return {
+        "granularity": granularity,
+        "window": window,
+        "buckets": np.datetime_as_string(axis, unit="D").tolist(),
+        "income": _to_list(income),
+        "expense": _to_list(expense),
+        "net": _to_list(net),
+        "cumulative_net": _to_list(np.cumsum(net)),
+        "income_moving_avg": _to_list(rolling_mean(income, window)),
+        "expense_moving_avg": _to_list(rolling_mean(expense, window)),
+        "expense_delta": _to_list(expense_delta),
+        "expense_delta_pct": _to_list(expense_delta_pct * 100),
+        "net_delta": _to_list(net_delta),
+    }
@@ -0,0 +1,40 @@
+"""add client_operations for idempotent batch writes
+
+Revision ID: 5b7e0c4a9f12
+Revises: d8e2f6b1c3a9
+Create Date: 2026-10-18 12:31:07.884215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e0c4a9f12'
+down_revision: Union[str, None] = 'd8e2f6b1c3a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('client_operations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('op_id', sa.String(length=64), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'op_id', name='uq_client_operations_user_op')
+    )
+    op.create_index(op.f('ix_client_operations_id'), 'client_operations', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_client_operations_id'), table_name='client_operations')
+    op.drop_table('client_operations')
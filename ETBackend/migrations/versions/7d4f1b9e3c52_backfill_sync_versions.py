@@ -0,0 +1,35 @@
+"""backfill sync versions
+
+Revision ID: 7d4f1b9e3c52
+Revises: b6d2e8f4a1c3
+Create Date: 2026-10-18 19:05:33.610284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4f1b9e3c52'
+down_revision: Union[str, None] = 'b6d2e8f4a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows that predate 9c3a1d5e7b20 were left at version 0, below any `since`
+    # a client can send. Give every user a new version and stamp those rows
+    # with it, so clients that have already synced pick them up as a delta.
+    # System categories (user_id NULL) are unversioned and stay at 0.
+    op.execute("UPDATE users SET sync_version = sync_version + 1")
+    for table in ('wallets', 'categories', 'transactions', 'budgets'):
+        op.execute(
+            f"UPDATE {table} SET version = "
+            f"(SELECT users.sync_version FROM users WHERE users.id = {table}.user_id) "
+            f"WHERE version = 0 AND user_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    pass
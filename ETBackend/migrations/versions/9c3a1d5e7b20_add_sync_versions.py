@@ -0,0 +1,50 @@
+"""add sync versions and tombstones
+
+Revision ID: 9c3a1d5e7b20
+Revises: 5b7e0c4a9f12
+Create Date: 2026-10-18 13:47:52.106338
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3a1d5e7b20'
+down_revision: Union[str, None] = '5b7e0c4a9f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('sync_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('wallets', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('categories', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('transactions', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('budgets', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_transactions_user_version', 'transactions', ['user_id', 'version'], unique=False)
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+    op.create_index('ix_sync_tombstones_user_version', 'sync_tombstones', ['user_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_tombstones_user_version', table_name='sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_id'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_index('ix_transactions_user_version', table_name='transactions')
+    op.drop_column('budgets', 'version')
+    op.drop_column('transactions', 'version')
+    op.drop_column('categories', 'version')
+    op.drop_column('wallets', 'version')
+    op.drop_column('users', 'sync_version')
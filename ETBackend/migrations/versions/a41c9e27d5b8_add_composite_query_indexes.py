@@ -0,0 +1,36 @@
+"""add composite query indexes
+
+Revision ID: a41c9e27d5b8
+Revises: 75347140f394
+Create Date: 2026-10-18 10:12:41.218764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c9e27d5b8'
+down_revision: Union[str, None] = '75347140f394'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_user_deleted_date', 'transactions', ['user_id', 'is_deleted', 'date'], unique=False)
+    op.create_index('ix_transactions_user_deleted_type_date', 'transactions', ['user_id', 'is_deleted', 'type', 'date', 'category_id', 'amount'], unique=False)
+    op.create_index('ix_budgets_user_year_month', 'budgets', ['user_id', 'year', 'month'], unique=False)
+    op.create_index('ix_categories_user_id', 'categories', ['user_id'], unique=False)
+    op.create_index('ix_wallets_user_id', 'wallets', ['user_id'], unique=False)
+    op.create_index('ix_recurring_transactions_next_run_date', 'recurring_transactions', ['next_run_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recurring_transactions_next_run_date', table_name='recurring_transactions')
+    op.drop_index('ix_wallets_user_id', table_name='wallets')
+    op.drop_index('ix_categories_user_id', table_name='categories')
+    op.drop_index('ix_budgets_user_year_month', table_name='budgets')
+    op.drop_index('ix_transactions_user_deleted_type_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_deleted_date', table_name='transactions')
@@ -0,0 +1,53 @@
+"""add full-text search index on transaction notes
+
+Revision ID: b6d2e8f4a1c3
+Revises: f1c8d3a5b742
+Create Date: 2026-10-18 17:42:10.318554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f4a1c3'
+down_revision: Union[str, None] = 'f1c8d3a5b742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+    "note, content='transactions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, note) VALUES (new.id, new.note); END",
+    "CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, note) VALUES ('delete', old.id, old.note); END",
+    "CREATE TRIGGER transactions_fts_au AFTER UPDATE OF note ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, note) VALUES ('delete', old.id, old.note); "
+    "INSERT INTO transactions_fts(rowid, note) VALUES (new.id, new.note); END",
+    # Index the notes that already exist
+    "INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ft_transactions_note', 'transactions', ['note'], unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ft_transactions_note', table_name='transactions')
+    elif dialect == 'sqlite':
+        for trigger in ('transactions_fts_ai', 'transactions_fts_ad', 'transactions_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS transactions_fts')
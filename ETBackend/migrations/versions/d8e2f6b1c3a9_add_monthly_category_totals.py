@@ -0,0 +1,42 @@
+"""add monthly_category_totals rollup
+
+Revision ID: d8e2f6b1c3a9
+Revises: a41c9e27d5b8
+Create Date: 2026-10-18 11:04:19.530112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e2f6b1c3a9'
+down_revision: Union[str, None] = 'a41c9e27d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('monthly_category_totals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.Enum('INCOME', 'EXPENSE', 'TRANSFER', name='transactiontype'), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year', 'month', 'category_id', 'type', name='uq_monthly_category_totals_key')
+    )
+    op.create_index(op.f('ix_monthly_category_totals_id'), 'monthly_category_totals', ['id'], unique=False)
+    # Run `python -m scripts.rebuild_rollups` afterwards to backfill existing data
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_monthly_category_totals_id'), table_name='monthly_category_totals')
+    op.drop_table('monthly_category_totals')
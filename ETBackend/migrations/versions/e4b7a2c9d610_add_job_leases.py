@@ -0,0 +1,38 @@
+"""add job leases
+
+Revision ID: e4b7a2c9d610
+Revises: 9c3a1d5e7b20
+Create Date: 2026-10-18 14:32:10.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7a2c9d610'
+down_revision: Union[str, None] = '9c3a1d5e7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_leases',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('next_due_at', sa.DateTime(), nullable=True),
+    sa.Column('last_started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+    sa.Column('last_duration_seconds', sa.Float(), nullable=True),
+    sa.Column('last_lag_seconds', sa.Float(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_leases')
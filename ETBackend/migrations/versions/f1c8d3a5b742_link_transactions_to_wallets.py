@@ -0,0 +1,34 @@
+"""link transactions to wallets and track opening balances
+
+Revision ID: f1c8d3a5b742
+Revises: e4b7a2c9d610
+Create Date: 2026-10-18 15:05:41.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c8d3a5b742'
+down_revision: Union[str, None] = 'e4b7a2c9d610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('wallets', sa.Column('opening_balance', sa.Float(), server_default='0', nullable=False))
+    # No transaction is linked to a wallet yet, so today's balance is the opening balance
+    op.execute('UPDATE wallets SET opening_balance = COALESCE(balance, 0)')
+    op.add_column('transactions', sa.Column('wallet_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_transactions_wallet_id', 'transactions', 'wallets', ['wallet_id'], ['id'])
+    op.create_index('ix_transactions_wallet_deleted', 'transactions', ['wallet_id', 'is_deleted', 'type', 'amount'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_wallet_deleted', table_name='transactions')
+    op.drop_constraint('fk_transactions_wallet_id', 'transactions', type_='foreignkey')
+    op.drop_column('transactions', 'wallet_id')
+    op.drop_column('wallets', 'opening_balance')
@@ -0,0 +1,339 @@
+"""Benchmark every router against a seeded database and check for regressions.
+
+Logs in as the users created by scripts.seed_bench, then runs each endpoint
+in turn: a short warm-up, then --requests requests from --concurrency
+concurrent clients, spread round-robin over the users. Prints throughput
+and p50/p95/p99 per endpoint.
+
+    python -m scripts.bench                                   # in-process, through httpx.ASGITransport
+    python -m scripts.bench --base-url http://127.0.0.1:8000  # a running uvicorn/gunicorn instead
+    python -m scripts.bench --save-baseline bench-baseline.json
+    python -m scripts.bench --baseline bench-baseline.json --threshold 0.25
+
+With --baseline, exits 1 if any tracked endpoint's p95 grew by more than
+--threshold (and by more than --min-delta-ms) or its throughput fell by
+more than --threshold, or if it returned errors. Only compare runs from the
+same machine, database and seed.
+
+/metrics and /internal/* answer only with INTERNAL_ENDPOINTS_ENABLED and
+INTERNAL_TOKEN set on the server; export the same INTERNAL_TOKEN here and it
+is sent as their bearer token.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import httpx
+
+RECENT = (datetime.utcnow() - timedelta(days=30)).replace(microsecond=0).isoformat()
+
+
+@dataclass
+class Endpoint:
+    name: str
+    # (user context) -> keyword arguments for client.request, or None to skip this user
+    build: Callable[[dict], Optional[dict]]
+    # Left out of the regression check: dominated by bcrypt, disk or payload size
+    tracked: bool = True
+    # (user context, response) -> None, to remember ids for later endpoints
+    after: Optional[Callable[[dict, httpx.Response], None]] = None
+
+
+def _get(path, **params):
+    return lambda user: {"method": "GET", "url": path, "params": params or None}
+
+
+def _internal(path):
+    token = os.getenv("INTERNAL_TOKEN")
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return lambda user: {"method": "GET", "url": path, "headers": headers}
+
+
+def _create_transaction(user):
+    return {"method": "POST", "url": "/api/v1/transactions/", "json": {
+        "category_id": user["expense_category_id"], "wallet_id": user["wallet_id"], "type": "expense",
+        "amount": 12.5, "note": "bench coffee",
+    }}
+
+
+def _remember_created(user, response):
+    user["created"].append(response.json()["id"])
+
+
+def _update_transaction(user):
+    if user["transaction"] is None:
+        return None
+    return {"method": "PUT", "url": f"/api/v1/transactions/{user['transaction_id']}", "json": {
+        "category_id": user["transaction"]["category_id"], "wallet_id": user["transaction"]["wallet_id"],
+        "type": user["transaction"]["type"], "amount": user["transaction"]["amount"], "note": user["transaction"]["note"],
+        "date": user["transaction"]["date"],
+    }}
+
+
+def _delete_transaction(user):
+    # Deletes what the create endpoint added, so the dataset stays the same size
+    if not user["created"]:
+        return None
+    return {"method": "DELETE", "url": f"/api/v1/transactions/{user['created'].pop()}"}
+
+
+def _batch(user):
+    user["batch_counter"] += 1
+    operations = [
+        {"op_id": f"bench-{user['id']}-{time.time_ns()}-{user['batch_counter']}-{i}", "action": "create", "data": {
+            "category_id": user["expense_category_id"], "type": "expense", "amount": 1.0 + i, "note": "bench batch",
+        }}
+        for i in range(10)
+    ]
+    return {"method": "POST", "url": "/api/v1/transactions/batch", "json": {"operations": operations}}
+
+
+def _import(user):
+    rows = "date,amount,type,note\n" + "".join(f"{RECENT[:10]},{5 + i},expense,bench import {i}\n" for i in range(20))
+    return {"method": "POST", "url": "/api/v1/transactions/import",
+            "files": {"file": ("bench.csv", rows.encode(), "text/csv")},
+            "data": {"category_id": str(user["expense_category_id"])}}
+
+
+def _upload(user):
+    return {"method": "POST", "url": "/api/v1/transactions/upload",
+            "files": {"file": ("bench.pdf", b"%PDF-1.4 bench receipt\n" * 64, "application/pdf")}}
+
+
+def _conditional_upload(user):
+    return {"method": "GET", "url": user["upload_url"], "headers": {"If-None-Match": user["upload_etag"]}}
+
+
+ENDPOINTS = (
+    Endpoint("auth.login", lambda user: {"method": "POST", "url": "/api/v1/auth/login",
+                                         "data": {"username": user["email"], "password": user["password"]}}, tracked=False),
+    Endpoint("auth.me", _get("/api/v1/auth/me")),
+    Endpoint("auth.update_me", lambda user: {"method": "PUT", "url": "/api/v1/auth/me", "json": {"name": user["name"]}}),
+    Endpoint("users.list", _get("/api/v1/users/")),
+    Endpoint("wallets.list", _get("/api/v1/wallets/")),
+    Endpoint("wallets.get", lambda user: {"method": "GET", "url": f"/api/v1/wallets/{user['wallet_id']}"}),
+    Endpoint("categories.list", _get("/api/v1/categories/")),
+    Endpoint("transactions.list", _get("/api/v1/transactions/", limit=50)),
+    Endpoint("transactions.list_next_page", lambda user: {"method": "GET", "url": "/api/v1/transactions/",
+                                                          "params": {"limit": 50, "cursor": user["next_cursor"]} if user["next_cursor"] else {"limit": 50}}),
+    Endpoint("transactions.list_filtered", _get("/api/v1/transactions/", limit=50, type="expense", min_amount=100, start_date=RECENT)),
+    Endpoint("transactions.search", _get("/api/v1/transactions/search", q="uber", limit=20)),
+    Endpoint("transactions.search_category", _get("/api/v1/transactions/search", q="food din", limit=20)),
+    Endpoint("transactions.create", _create_transaction, after=_remember_created),
+    Endpoint("transactions.update", _update_transaction),
+    Endpoint("transactions.delete", _delete_transaction),
+    Endpoint("transactions.batch", _batch),
+    Endpoint("transactions.import", _import, tracked=False),
+    Endpoint("transactions.export_recent_csv", _get("/api/v1/transactions/export", format="csv", start_date=RECENT)),
+    Endpoint("transactions.upload", _upload, tracked=False),
+    Endpoint("uploads.get", lambda user: {"method": "GET", "url": user["upload_url"]}, tracked=False),
+    Endpoint("uploads.get_not_modified", _conditional_upload),
+    Endpoint("budgets.list", _get("/api/v1/budgets/")),
+    Endpoint("budgets.progress", _get("/api/v1/budgets/progress")),
+    Endpoint("reports.summary", _get("/api/v1/reports/summary")),
+    Endpoint("reports.summary_all", _get("/api/v1/reports/summary", period="all")),
+    Endpoint("reports.category_breakdown", _get("/api/v1/reports/category-breakdown")),
+    Endpoint("reports.timeseries_day", _get("/api/v1/reports/timeseries", granularity="day")),
+    Endpoint("reports.timeseries_month", _get("/api/v1/reports/timeseries", granularity="month")),
+    Endpoint("sync.delta", lambda user: {"method": "GET", "url": "/api/v1/sync/", "params": {"since": user["sync_version"]}}),
+    Endpoint("metrics", _internal("/metrics"), tracked=False),
+    Endpoint("internal.db_pool", _internal("/internal/db-pool"), tracked=False),
+)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def prepare_user(client: httpx.AsyncClient, email: str, password: str) -> Optional[dict]:
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    if response.status_code != 200:
+        return None
+    client_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def get(url, **params):
+        result = await client.get(url, params=params or None, headers=client_headers)
+        result.raise_for_status()
+        return result
+
+    me = (await get("/api/v1/auth/me")).json()
+    wallets = (await get("/api/v1/wallets/")).json()
+    categories = (await get("/api/v1/categories/")).json()
+    page = await get("/api/v1/transactions/", limit=50)
+    transactions = page.json()
+    upload = await client.post("/api/v1/transactions/upload", headers=client_headers,
+                               files={"file": ("bench.pdf", b"%PDF-1.4 bench receipt\n" * 64, "application/pdf")})
+    upload.raise_for_status()
+    upload_url = upload.json()["receipt_url"]
+    upload_etag = (await client.get(upload_url)).headers.get("etag", '"none"')
+    sync_version = (await get("/api/v1/sync/")).json()["version"]
+    return {
+        "id": me["id"],
+        "email": email,
+        "name": me["name"],
+        "password": password,
+        "headers": client_headers,
+        "wallet_id": wallets[0]["id"] if wallets else None,
+        "expense_category_id": next(category["id"] for category in categories if category["type"] == "expense"),
+        "transaction_id": transactions[0]["id"] if transactions else 0,
+        "transaction": transactions[0] if transactions else None,
+        "next_cursor": page.headers.get("x-next-cursor"),
+        "upload_url": upload_url,
+        "upload_etag": upload_etag,
+        "sync_version": sync_version,
+        "created": [],
+        "batch_counter": 0,
+    }
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: Endpoint, users, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(offset):
+        nonlocal errors
+        for index in remaining:
+            user = users[(index + offset) % len(users)]
+            kwargs = endpoint.build(user)
+            if kwargs is None:
+                continue
+            kwargs["headers"] = {**user["headers"], **kwargs.get("headers", {})}
+            started = time.perf_counter()
+            response = await client.request(**kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            elif endpoint.after is not None:
+                endpoint.after(user, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50": round(percentile(latencies, 50), 2),
+        "p95": round(percentile(latencies, 95), 2),
+        "p99": round(percentile(latencies, 99), 2),
+        "tracked": endpoint.tracked,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float):
+    """Return (name, reason) for every tracked endpoint that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not result["tracked"] or base is None:
+            continue
+        if result["errors"]:
+            regressions.append((name, f"{result['errors']} errors"))
+        if result["p95"] > base["p95"] * (1 + threshold) and result["p95"] - base["p95"] > min_delta_ms:
+            regressions.append((name, f"p95 {base['p95']:.1f} -> {result['p95']:.1f} ms"))
+        if result["rps"] < base["rps"] / (1 + threshold):
+            regressions.append((name, f"throughput {base['rps']:.0f} -> {result['rps']:.0f} req/s"))
+    return regressions
+
+
+def print_table(results: dict, baseline: Optional[dict]):
+    base_endpoints = (baseline or {}).get("endpoints", {})
+    print(f"{'endpoint':34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'p95 vs base':>12}")
+    for name, result in results.items():
+        base = base_endpoints.get(name)
+        change = f"{(result['p95'] / base['p95'] - 1) * 100:+11.0f}%" if base and base["p95"] else ""
+        marker = "" if result["tracked"] else " (untracked)"
+        print(f"{name + marker:34} {result['rps']:8.1f} {result['p50']:8.1f} {result['p95']:8.1f} {result['p99']:8.1f} {result['errors']:6d} {change:>12}")
+
+
+async def main(args):
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+        app_engine = None
+    else:
+        from app.main import app
+        from app.db.database import engine as app_engine
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    async with client:
+        users = []
+        for index in range(args.max_users):
+            user = await prepare_user(client, f"bench{index}@example.com", args.password)
+            if user is None:
+                break
+            users.append(user)
+        if not users:
+            sys.exit("No bench users found; run python -m scripts.seed_bench first")
+        if args.only_largest:
+            users = users[-1:]
+        print(f"{len(users)} users, {args.requests} requests per endpoint, concurrency {args.concurrency}")
+
+        results = {}
+        selected = [endpoint for endpoint in ENDPOINTS if not args.endpoint or any(part in endpoint.name for part in args.endpoint)]
+        for endpoint in selected:
+            await run_endpoint(client, endpoint, users, args.warmup, args.concurrency)
+            result = await run_endpoint(client, endpoint, users, args.requests, args.concurrency)
+            if result is not None:
+                results[endpoint.name] = result
+
+    if app_engine is not None:
+        await app_engine.dispose()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "target": args.base_url or "in-process",
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "users": len(users),
+                "endpoints": results,
+            }, handle, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for name, reason in regressions:
+            print(f"REGRESSION {name}: {reason}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-users", type=int, default=20)
+    parser.add_argument("--only-largest", action="store_true", help="Run every request as the user with the most transactions")
+    parser.add_argument("--endpoint", action="append", help="Only endpoints whose name contains this; repeatable")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", default=None, help="Write this run's results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore p95 changes smaller than this")
+    args = parser.parse_args()
+    asyncio.run(main(args))
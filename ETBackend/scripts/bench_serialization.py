@@ -0,0 +1,132 @@
+"""Fetch-and-encode time for a large transaction list, Pydantic path vs row path.
+
+Loads --rows transactions of one user from DATABASE_URL (the user with the
+most, unless --user-id is given) and times the ways a list endpoint can turn
+them into a response body:
+
+    orm+pydantic+json     ORM objects, validated into TransactionResponse models,
+                          jsonable_encoder and the stdlib json module (FastAPI
+                          with a response_model, before it encoded via Pydantic)
+    orm+pydantic_core     ORM objects, validated and dumped straight to bytes by
+                          Pydantic (FastAPI with a response_model today)
+    rows+orjson           column tuples, app.schemas.rows dicts and orjson (the
+                          hot list endpoints)
+
+Every path must produce the same JSON; the script checks that before timing.
+
+    python -m scripts.seed_bench --users 2 --max-transactions 20000
+    python -m scripts.bench_serialization --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.db.database import engine, AsyncSessionLocal
+from app.models.models import Transaction
+from app.schemas.schemas import TransactionResponse
+from app.schemas import rows as row_serializers
+from app.core.responses import ORJSONResponse
+
+TRANSACTION_LIST = TypeAdapter(List[TransactionResponse])
+
+
+def _page(query, user_id: int, rows: int):
+    return query.filter(Transaction.user_id == user_id, Transaction.is_deleted == False).order_by(
+        Transaction.date.desc(), Transaction.id.desc()
+    ).limit(rows)
+
+
+async def fetch_orm(db, user_id: int, rows: int):
+    result = await db.execute(_page(select(Transaction), user_id, rows))
+    return result.scalars().all()
+
+
+async def fetch_rows(db, user_id: int, rows: int):
+    result = await db.execute(_page(select(*row_serializers.transaction.columns), user_id, rows))
+    return result.all()
+
+
+def encode_pydantic_json(objects) -> bytes:
+    models = TRANSACTION_LIST.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(models), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encode_pydantic_core(objects) -> bytes:
+    return TRANSACTION_LIST.dump_json(TRANSACTION_LIST.validate_python(objects, from_attributes=True))
+
+
+def encode_rows(rows) -> bytes:
+    return ORJSONResponse(row_serializers.transaction.dump_all(rows)).body
+
+
+PATHS = (
+    ("orm+pydantic+json", fetch_orm, encode_pydantic_json),
+    ("orm+pydantic_core", fetch_orm, encode_pydantic_core),
+    ("rows+orjson", fetch_rows, encode_rows),
+)
+
+
+async def pick_user(db, user_id):
+    if user_id is not None:
+        return user_id
+    result = await db.execute(
+        select(Transaction.user_id).filter(Transaction.is_deleted == False)
+        .group_by(Transaction.user_id).order_by(func.count().desc()).limit(1)
+    )
+    user_id = result.scalar()
+    if user_id is None:
+        raise SystemExit("No transactions in DATABASE_URL; run scripts.seed_bench first")
+    return user_id
+
+
+async def main(args):
+    async with AsyncSessionLocal() as db:
+        user_id = await pick_user(db, args.user_id)
+
+        bodies = {}
+        for name, fetch, encode in PATHS:
+            bodies[name] = encode(await fetch(db, user_id, args.rows))
+            db.expunge_all()
+        reference = json.loads(bodies[PATHS[0][0]])
+        for name, body in bodies.items():
+            if json.loads(body) != reference:
+                raise SystemExit(f"{name} produced different JSON")
+        print(f"user {user_id}: {len(reference)} rows, {len(bodies['rows+orjson']) / 1024:.0f} KiB body, {args.repeat} runs each")
+
+        print(f"{'path':<20}{'fetch ms':>10}{'encode ms':>11}{'total ms':>10}{'vs first':>10}")
+        baseline = None
+        for name, fetch, encode in PATHS:
+            fetch_times, encode_times = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                loaded = await fetch(db, user_id, args.rows)
+                fetched = time.perf_counter()
+                encode(loaded)
+                fetch_times.append(fetched - started)
+                encode_times.append(time.perf_counter() - fetched)
+                # A fresh identity map each run, as every request gets its own session
+                db.expunge_all()
+            fetch_ms = statistics.median(fetch_times) * 1000
+            encode_ms = statistics.median(encode_times) * 1000
+            total = fetch_ms + encode_ms
+            baseline = baseline or total
+            print(f"{name:<20}{fetch_ms:>10.1f}{encode_ms:>11.1f}{total:>10.1f}{baseline / total:>9.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+    asyncio.run(main(args))
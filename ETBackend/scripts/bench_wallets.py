@@ -0,0 +1,69 @@
+"""Requests/sec on GET /api/v1/wallets/ with the authenticated-user cache off and on.
+
+Drives the ASGI app in-process through httpx against DATABASE_URL, so the
+numbers include real auth and database work but no network hop.
+
+    python -m scripts.bench_wallets --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from app.db.database import engine
+from app.core.cache import user_cache
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    await client.post("/api/v1/auth/register", json={"email": email, "name": "Bench", "password": password})
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(client: httpx.AsyncClient, token: str, requests: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/api/v1/wallets/", headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = await login(client, args.email, args.password)
+        configured_ttl = user_cache.ttl
+
+        # Warm up connections and statement caches before measuring
+        await run(client, token, min(100, args.requests), args.concurrency)
+
+        user_cache.ttl = 0
+        user_cache.clear()
+        before = await run(client, token, args.requests, args.concurrency)
+
+        user_cache.ttl = configured_ttl or 60
+        user_cache.clear()
+        after = await run(client, token, args.requests, args.concurrency)
+
+    await engine.dispose()
+    print(f"user cache off: {before:8.1f} req/s")
+    print(f"user cache on:  {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    args = parser.parse_args()
+    asyncio.run(main(args))
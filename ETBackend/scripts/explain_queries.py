@@ -0,0 +1,113 @@
+"""EXPLAIN every read query issued by the report endpoints and CRUD helpers.
+
+Runs the real functions against DATABASE_URL, captures the SQL they send and
+prints the plan for each statement. Exits non-zero if any of them full-scans
+one of the indexed tables.
+
+    python -m scripts.explain_queries --user-id 1
+
+MySQL may legitimately prefer a table scan on tiny tables, so run this against
+a database with a realistic amount of data.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.future import select
+
+from app.db.database import engine, AsyncSessionLocal
+from app.models.models import User, RecurringTransaction
+from app.crud import transactions as crud_transactions
+from app.crud import categories as crud_categories
+from app.crud import budgets as crud_budgets
+from app.crud import wallets as crud_wallets
+from app.crud import users as crud_users
+from app.routers import reports
+
+CHECKED_TABLES = {"transactions", "categories", "budgets", "wallets", "recurring_transactions"}
+
+
+async def run_queries(db, user: User):
+    await crud_transactions.get_transactions(db, user_id=user.id)
+    await crud_categories.get_categories(db, user_id=user.id)
+    await crud_categories.get_category(db, category_id=1, user_id=user.id)
+    await crud_budgets.get_budgets(db, user_id=user.id)
+    await crud_budgets.get_budget(db, budget_id=1, user_id=user.id)
+    await crud_wallets.get_wallets(db, user_id=user.id)
+    await crud_users.get_user_by_email(db, email=user.email)
+    await reports.get_summary(start_date=None, end_date=None, period=None, db=db, read_db=db, current_user=user)
+    await reports.get_summary(start_date=None, end_date=None, period="all", db=db, read_db=db, current_user=user)
+    await reports.get_category_breakdown(start_date=None, end_date=None, period=None, db=db, read_db=db, current_user=user)
+    await reports.get_timeseries(granularity="day", start_date=None, end_date=None, window=7, db=db, read_db=db, current_user=user)
+    await reports.get_timeseries(granularity="month", start_date=None, end_date=None, window=3, db=db, read_db=db, current_user=user)
+    # Due-task lookup from utils/scheduler.py
+    await db.execute(select(RecurringTransaction).filter(RecurringTransaction.next_run_date <= datetime.utcnow()))
+
+
+def full_scans(dialect: str, plan_rows):
+    """Return the checked tables a plan reads without an index."""
+    scanned = set()
+    for row in plan_rows:
+        if dialect == "sqlite":
+            detail = row[-1]
+            if detail.startswith("SCAN ") and "USING" not in detail:
+                table = detail.split()[1]
+                if table in CHECKED_TABLES:
+                    scanned.add(table)
+        else:
+            row = row._mapping
+            if row.get("type") == "ALL" and row.get("table") in CHECKED_TABLES:
+                scanned.add(row["table"])
+    return scanned
+
+
+async def main(user_id: int) -> int:
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalars().first()
+        if user is None:
+            print(f"No user with id {user_id}")
+            return 2
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await run_queries(db, user)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    dialect = engine.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    failures = 0
+
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = await conn.exec_driver_sql(prefix + statement, parameters)
+            rows = plan.all()
+            scanned = full_scans(dialect, rows)
+            status = "FULL SCAN: " + ", ".join(sorted(scanned)) if scanned else "ok"
+            print("-" * 72)
+            print(" ".join(statement.split()))
+            for row in rows:
+                print("    ", tuple(row))
+            print("  =>", status)
+            if scanned:
+                failures += 1
+
+    print("-" * 72)
+    print(f"{len(captured)} queries checked, {failures} full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.user_id)))
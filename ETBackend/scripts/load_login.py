@@ -0,0 +1,85 @@
+"""Latency of an unrelated endpoint while a burst of logins is in flight.
+
+Runs the burst twice: once hashing inline on the event loop (the old
+behaviour) and once on the password-hash pool, and prints p50/p99 for
+GET / sampled throughout each burst.
+
+    python -m scripts.load_login --logins 40 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.db.database import engine
+from app.core import security
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def burst(client: httpx.AsyncClient, args, workers: int):
+    security.password_hasher.workers = workers
+    done = asyncio.Event()
+    latencies = []
+
+    async def login_worker(count):
+        for _ in range(count):
+            response = await client.post("/api/v1/auth/login", data={"username": args.email, "password": args.password})
+            if response.status_code not in (200, 503):
+                response.raise_for_status()
+
+    async def probe():
+        # Probes are due on a fixed schedule and latency is measured from when
+        # each one was due, so time spent stuck behind a blocked loop counts
+        interval = 0.01
+        due = time.perf_counter()
+        while not done.is_set():
+            due += interval
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            (await client.get("/")).raise_for_status()
+            latencies.append((time.perf_counter() - due) * 1000)
+            due = max(due, time.perf_counter())
+
+    probe_task = asyncio.create_task(probe())
+    per_worker = max(1, args.logins // args.concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(login_worker(per_worker) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return latencies, elapsed
+
+
+async def main(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=120) as client:
+        await client.post("/api/v1/auth/register", json={"email": args.email, "name": "Load", "password": args.password})
+        pool_workers = security.password_hasher.workers or 4
+
+        for label, workers in (("inline", 0), (f"pool({pool_workers})", pool_workers)):
+            latencies, elapsed = await burst(client, args, workers)
+            print(
+                f"{label:>10}: {len(latencies):5d} probes  "
+                f"p50 {statistics.median(latencies):7.1f} ms  "
+                f"p99 {percentile(latencies, 99):7.1f} ms  "
+                f"burst {elapsed:5.1f} s"
+            )
+    print("hasher:", security.password_hasher.stats())
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--email", default="load@example.com")
+    parser.add_argument("--password", default="load-password")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,24 @@
+"""Backfill monthly_category_totals from the transactions table.
+
+    python -m scripts.rebuild_rollups              # every user
+    python -m scripts.rebuild_rollups --user-id 7  # one user
+"""
+import argparse
+import asyncio
+
+from app.db.database import engine, AsyncSessionLocal
+from app.crud import rollups
+
+
+async def main(user_id):
+    async with AsyncSessionLocal() as db:
+        await rollups.rebuild_monthly_totals(db, user_id=user_id)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id))
+    print("monthly_category_totals rebuilt")
@@ -0,0 +1,68 @@
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch SQLite file first
+_tmpdir = tempfile.mkdtemp(prefix="et-tests-")
+atexit.register(shutil.rmtree, _tmpdir, True)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmpdir}/test.db"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.pop("REPORT_CACHE_URL", None)
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmpdir, "uploads")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.database import engine, Base, AsyncSessionLocal
+from app.core.cache import report_cache, user_cache, category_cache, LRUCacheBackend, REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_TTL
+from app.crud import categories as crud_categories
+from app.models import models  # noqa: F401  (registers the tables)
+
+
+def run(coro):
+    """Run a coroutine against the test database from sync test code."""
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+    return asyncio.run(wrapper())
+
+
+async def _reset():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture(autouse=True)
+def database():
+    run(_reset())
+    report_cache.backend = LRUCacheBackend(REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_TTL)
+    user_cache.clear()
+    category_cache.clear()
+    crud_categories._system_catalog = None
+    yield
+    run(engine.dispose())
+
+
+@pytest.fixture
+def session():
+    """An async session factory; use as `run(do(session))`."""
+    return AsyncSessionLocal
+
+
+def register(client: TestClient, email: str = "user@example.com", password: str = "secret") -> TestClient:
+    client.post("/api/v1/auth/register", json={"email": email, "name": "Test User", "password": password})
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    return client
+
+
+@pytest.fixture
+def client():
+    return register(TestClient(app))
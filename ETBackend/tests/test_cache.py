@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import LRUCache, LRUCacheBackend, RedisCacheBackend, ReportCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2, 60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def _roundtrip(backend):
+    async def go():
+        reports = ReportCache(backend)
+        await reports.set(1, 4, "summary", None, None, {"total": 1})
+        await reports.set(2, 4, "summary", None, None, {"total": 2})
+        hit = await reports.get(1, 4, "summary", None, None)
+        newer = await reports.get(1, 5, "summary", None, None)
+        await reports.invalidate_user(1)
+        return hit, newer, await reports.get(1, 4, "summary", None, None), await reports.get(2, 4, "summary", None, None)
+
+    return asyncio.run(go())
+
+
+def test_in_process_backend():
+    assert _roundtrip(LRUCacheBackend(100, 60)) == ({"total": 1}, None, None, {"total": 2})
+
+
+def test_redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisCacheBackend("redis://localhost:6379/0", 60)
+    backend._client = fakeredis.FakeAsyncRedis()
+
+    assert _roundtrip(backend) == ({"total": 1}, None, None, {"total": 2})
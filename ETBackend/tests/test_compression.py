@@ -0,0 +1,90 @@
+import asyncio
+import zlib
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, preferred_encoding
+
+LINE = b"2026-03-01,expense,12.50,coffee\n"
+
+
+async def stream(request):
+    async def rows():
+        for _ in range(50):
+            yield LINE
+    return StreamingResponse(rows(), media_type="text/csv")
+
+
+async def large(request):
+    return PlainTextResponse(LINE.decode() * 100)
+
+
+async def small(request):
+    return PlainTextResponse("ok")
+
+
+async def pdf(request):
+    return Response(LINE * 100, media_type="application/pdf")
+
+
+compressed_app = CompressionMiddleware(Starlette(routes=[
+    Route("/stream", stream), Route("/large", large), Route("/small", small), Route("/pdf", pdf),
+]))
+client = TestClient(compressed_app)
+
+
+@pytest.mark.parametrize("path", ["/stream", "/large"])
+def test_gzip_bodies_round_trip(path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.content.startswith(LINE)
+
+
+def test_streams_are_flushed_per_chunk():
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(compressed_app(scope, receive, send))
+
+    start, *bodies = messages
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert not any(name == b"content-length" for name, _ in start["headers"])
+    decompressor = zlib.decompressobj(31)
+    # Each chunk decodes as soon as it arrives, so a client sees rows as they are produced
+    assert decompressor.decompress(bodies[0]["body"]) == LINE
+    assert b"".join(decompressor.decompress(body["body"]) for body in bodies[1:]) == LINE * 49
+
+
+def test_brotli_is_preferred_when_accepted():
+    pytest.importorskip("brotli")
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.content.startswith(LINE)
+
+
+@pytest.mark.parametrize("path", ["/small", "/pdf"])
+def test_small_and_precompressed_bodies_are_left_alone(path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" in response.headers["vary"].lower()
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"), ("br;q=0, gzip", "gzip"), ("identity", None), ("*", "br"), ("", None),
+])
+def test_preferred_encoding(header, expected):
+    pytest.importorskip("brotli")
+    assert preferred_encoding(header) == expected
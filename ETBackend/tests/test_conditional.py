@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.conditional import etag_matches
+from app.main import app
+from tests.conftest import register
+
+COLLECTIONS = ["/api/v1/wallets/", "/api/v1/categories/", "/api/v1/budgets/", "/api/v1/transactions/", "/api/v1/transactions/count"]
+
+
+@pytest.mark.parametrize("path", COLLECTIONS)
+def test_unchanged_collection_is_answered_with_304(client, path):
+    first = client.get(path)
+    etag = first.headers["etag"]
+
+    again = client.get(path, headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+
+@pytest.mark.parametrize("path", COLLECTIONS)
+def test_a_write_changes_the_tag(client, path):
+    etag = client.get(path).headers["etag"]
+    client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"})
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_tags_are_per_user(client):
+    etag = client.get("/api/v1/wallets/").headers["etag"]
+    other = register(TestClient(app), email="other@example.com")
+
+    assert other.get("/api/v1/wallets/", headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('W/"wallets-1-3"', True),
+    ('"wallets-1-3"', True),
+    ('"other", W/"wallets-1-3"', True),
+    ("*", True),
+    ('W/"wallets-1-4"', False),
+])
+def test_weak_comparison(header, expected):
+    assert etag_matches(header, 'W/"wallets-1-3"') is expected
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compressed_responses_keep_the_tag(client, encoding):
+    if encoding == "br":
+        pytest.importorskip("brotli")
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+    operations = [
+        {"op_id": f"op-{n}", "action": "create", "data": {"category_id": category_id, "type": "expense", "amount": n, "note": "coffee " * 5}}
+        for n in range(40)
+    ]
+    client.post("/api/v1/transactions/batch", json={"operations": operations})
+
+    response = client.get("/api/v1/transactions/", headers={"Accept-Encoding": encoding})
+    again = client.get("/api/v1/transactions/", headers={"Accept-Encoding": encoding, "If-None-Match": response.headers["etag"]})
+
+    assert response.headers["content-encoding"] == encoding
+    assert len(response.json()) == 40
+    assert again.status_code == 304
@@ -0,0 +1,108 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from app.utils import images
+from app.utils.storage import storage
+
+SHA = "ab" * 32
+
+
+def _write_png(path, size=(64, 48)):
+    Image.new("RGB", size, "teal").save(path, "PNG")
+
+
+def test_render_variants_writes_every_variant(tmp_path):
+    source = tmp_path / "original"
+    _write_png(source)
+
+    outputs = images.render_variants(str(source), str(tmp_path))
+
+    assert set(outputs) == set(images.VARIANTS)
+    assert all(os.path.exists(path) for path in outputs.values())
+
+
+def test_render_variants_gives_up_on_unreadable_files(tmp_path):
+    source = tmp_path / "original"
+    source.write_bytes(b"not an image")
+
+    assert images.render_variants(str(source), str(tmp_path)) == {}
+
+
+def test_render_variants_gives_up_on_decompression_bombs(tmp_path, monkeypatch):
+    source = tmp_path / "original"
+    _write_png(source, (400, 400))
+    # Pillow raises DecompressionBombError past twice this many pixels
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    assert images.render_variants(str(source), str(tmp_path)) == {}
+
+
+def _upload(tmp_path, content: bytes) -> str:
+    key = f"{SHA[:2]}/{SHA}.png"
+    source = tmp_path / "upload"
+    source.write_bytes(content)
+    asyncio.run(storage.put_file(str(source), key, "image/png"))
+    return key
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(images, "_get_pool", lambda: pool)
+    yield
+    pool.shutdown()
+
+
+def test_failed_render_stores_the_original_under_variant_keys(tmp_path, inline_pool, monkeypatch):
+    key = _upload(tmp_path, b"not an image")
+
+    asyncio.run(images.process_upload(key))
+
+    for name in images.VARIANTS:
+        with open(storage.path(images.variant_key(key, name)), "rb") as handle:
+            assert handle.read() == b"not an image"
+
+    # Variants now exist, so the upload is not rendered again
+    monkeypatch.setattr(images, "render_variants", lambda *args: pytest.fail("rendered twice"))
+    asyncio.run(images.process_upload(key))
+
+
+def test_pool_workers_are_spawned():
+    pool = images._get_pool()
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        images.shutdown_pool()
+
+
+def test_created_transaction_advertises_receipt_variants(client):
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+    receipt_url = f"/uploads/{SHA[:2]}/{SHA}.jpg"
+
+    response = client.post("/api/v1/transactions/", json={
+        "category_id": category_id, "type": "expense", "amount": 5, "receipt_url": receipt_url,
+    })
+
+    assert response.json()["receipt_variants"] == images.variant_urls(receipt_url)
+    listed = client.get("/api/v1/transactions/").json()
+    assert listed[0]["receipt_variants"] == images.variant_urls(receipt_url)
+
+
+def test_heic_gets_no_variants_without_the_plugin():
+    url = f"/uploads/{SHA[:2]}/{SHA}.heic"
+
+    assert (images.variant_urls(url) is None) == (images.pillow_heif is None)
+
+
+def test_profile_advertises_avatar_variants(client):
+    avatar_url = f"/uploads/{SHA[:2]}/{SHA}.png"
+
+    updated = client.put("/api/v1/auth/me", json={"avatar_url": avatar_url}).json()
+
+    assert updated["avatar_variants"] == images.variant_urls(avatar_url)
+    assert client.get("/api/v1/auth/me").json()["avatar_variants"] == images.variant_urls(avatar_url)
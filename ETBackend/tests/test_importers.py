@@ -0,0 +1,110 @@
+import io
+import json
+from datetime import datetime
+import pytest
+
+from app.utils import importers
+
+CSV = b"""\xef\xbb\xbfPosted,Amount,Description,Category_ID
+2026-03-01,-12.50,Coffee,{category}
+2026-03-02,not-a-number,Broken,{category}
+,,,
+2026-03-03,1500,Salary,{category}
+2026-03-04,-3,Unknown category,999
+"""
+
+OFX = b"""OFXHEADER:100
+<OFX><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260301120000[-5:EST]<TRNAMT>-42.10<NAME>Grocer<MEMO>weekly shop</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>garbage<TRNAMT>-1.00</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260302<TRNAMT>1,000.00<NAME>Payroll</STMTTRN>
+</BANKTRANLIST></OFX>
+"""
+
+QIF = b"""!Type:Bank
+D03/01/2026
+T-20.00
+PCafe
+^
+D31/12/2025
+T5
+^
+Dyesterday
+T-1
+^
+D2026-03-03
+U-7.5
+MBus
+"""
+
+
+def _parse(parser, data):
+    return list(parser(io.BytesIO(data)))
+
+
+def test_csv_maps_header_aliases_and_reports_bad_rows():
+    rows = _parse(importers.parse_csv, CSV.replace(b"{category}", b"1"))
+
+    assert [number for number, _ in rows] == [2, 3, 5, 6]
+    assert rows[0][1] == {"date": "2026-03-01", "amount": 12.5, "type": "expense", "note": "Coffee", "category_id": "1"}
+    assert isinstance(rows[1][1], importers.ImportRowError)
+    assert rows[2][1]["type"] == "income"
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64 * 1024])
+def test_ofx_transactions_survive_chunk_boundaries(monkeypatch, chunk_size):
+    monkeypatch.setattr(importers, "CHUNK_SIZE", chunk_size)
+
+    rows = _parse(importers.parse_ofx, OFX)
+
+    assert [number for number, _ in rows] == [1, 2, 3]
+    assert rows[0][1] == {"date": datetime(2026, 3, 1, 12), "amount": 42.1, "type": "expense", "note": "Grocer - weekly shop"}
+    assert isinstance(rows[1][1], importers.ImportRowError)
+    assert rows[2][1]["amount"] == 1000.0 and rows[2][1]["type"] == "income"
+
+
+def test_qif_reads_each_record_and_its_date_format():
+    rows = _parse(importers.parse_qif, QIF)
+
+    assert [fields["date"] if isinstance(fields, dict) else None for _, fields in rows] == [
+        datetime(2026, 3, 1), datetime(2025, 12, 31), None, datetime(2026, 3, 3),
+    ]
+    assert "unrecognised date" in str(rows[2][1])
+    # The last record has no closing ^ and uses U for the amount
+    assert rows[3][1]["note"] == "Bus" and rows[3][1]["amount"] == 7.5
+
+
+def _import(client, filename, data, **form):
+    response = client.post("/api/v1/transactions/import", files={"file": (filename, data)}, data=form)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_csv_import_keeps_going_past_bad_rows(client):
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+
+    events = _import(client, "statement.csv", CSV.replace(b"{category}", str(category_id).encode()))
+
+    assert events[-1] == {"event": "done", "processed": 4, "imported": 2, "failed": 2}
+    errors = {error["row"]: error["error"] for event in events[:-1] for error in event["errors"]}
+    assert errors[3].startswith("Invalid amount")
+    assert errors[6] == "Unknown category 999"
+    assert client.get("/api/v1/transactions/count").json() == {"count": 2}
+
+
+@pytest.mark.parametrize("filename, data", [("statement.ofx", OFX), ("statement.qif", QIF)])
+def test_statement_imports_use_the_default_category(client, filename, data):
+    category_id = client.post("/api/v1/categories/", json={"name": "Bank", "type": "expense"}).json()["id"]
+
+    events = _import(client, filename, data, category_id=str(category_id))
+
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["failed"] == 1
+    assert done["imported"] == done["processed"] - 1
+
+
+def test_unknown_file_types_are_rejected(client):
+    response = client.post("/api/v1/transactions/import", files={"file": ("statement.xlsx", b"...")})
+
+    assert response.status_code == 400
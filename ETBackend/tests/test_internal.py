@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.main import app
+
+INTERNAL_PATHS = ["/internal/password-hasher", "/internal/db-pool", "/internal/scheduler", "/metrics"]
+
+
+@pytest.fixture
+def anonymous():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", INTERNAL_PATHS)
+def test_internal_endpoints_are_off_by_default(anonymous, path):
+    assert anonymous.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", INTERNAL_PATHS)
+def test_enabled_internal_endpoints_need_the_token(anonymous, monkeypatch, path):
+    monkeypatch.setattr(security, "INTERNAL_ENDPOINTS_ENABLED", True)
+    monkeypatch.setattr(security, "INTERNAL_TOKEN", "s3cret")
+
+    assert anonymous.get(path).status_code == 401
+    assert anonymous.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert anonymous.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_enabled_without_a_token_stays_closed(anonymous, monkeypatch, caplog):
+    monkeypatch.setattr(security, "INTERNAL_ENDPOINTS_ENABLED", True)
+    monkeypatch.setattr(security, "INTERNAL_TOKEN", None)
+
+    assert anonymous.get("/internal/db-pool").status_code == 404
+    security.check_internal_access_settings()
+    assert "without INTERNAL_TOKEN" in caplog.text
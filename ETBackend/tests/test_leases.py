@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app.crud import leases
+from app.models.models import JobLease
+from app.utils import scheduler
+from tests.conftest import run
+
+TTL = timedelta(seconds=60)
+NOW = datetime(2026, 3, 1, 12)
+
+
+async def _acquire(session, owner, now=NOW):
+    async with session() as db:
+        return await leases.acquire_lease(db, "job", owner, TTL, now=now)
+
+
+async def _lease(session):
+    async with session() as db:
+        return (await db.execute(select(JobLease).filter(JobLease.name == "job"))).scalar_one()
+
+
+def test_only_one_concurrent_acquirer_wins(session):
+    async def race():
+        return await asyncio.gather(*(_acquire(session, f"worker-{n}") for n in range(4)))
+
+    won = run(race())
+
+    assert won.count(True) == 1
+    assert run(_lease(session)).owner == f"worker-{won.index(True)}"
+
+
+def test_a_live_lease_is_kept_and_an_expired_one_taken_over(session):
+    assert run(_acquire(session, "a"))
+    assert not run(_acquire(session, "b", now=NOW + TTL / 2))
+    # The holder itself may re-claim its live lease
+    assert run(_acquire(session, "a", now=NOW + TTL / 2))
+
+    assert run(_acquire(session, "b", now=NOW + TTL * 2))
+    assert run(_lease(session)).owner == "b"
+
+
+def test_a_released_job_is_not_due_again_until_its_next_run(session):
+    async def release():
+        async with session() as db:
+            await leases.release_lease(db, "job", "a", NOW + timedelta(hours=1), 0.5)
+
+    run(_acquire(session, "a"))
+    run(release())
+
+    lease = run(_lease(session))
+    assert (lease.owner, lease.run_count) == (None, 1)
+    assert not run(_acquire(session, "b", now=NOW + timedelta(minutes=30)))
+    assert run(_acquire(session, "b", now=NOW + timedelta(hours=2)))
+
+
+def test_run_leased_job_runs_once_per_interval(session):
+    runs = []
+
+    async def job():
+        runs.append(True)
+
+    async def twice():
+        return [await scheduler.run_leased_job("job", timedelta(hours=1), job) for _ in range(2)]
+
+    assert run(twice()) == [True, False]
+    assert len(runs) == 1
+    lease = run(_lease(session))
+    assert lease.owner is None and lease.next_due_at is not None
+
+
+def test_a_holder_that_loses_its_lease_stops(session, monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHEDULER_LEASE_SECONDS", 0.3)
+    progress = []
+
+    async def job():
+        async with session() as db:
+            # A stalled heartbeat let another worker take the job over
+            await db.execute(update(JobLease).values(owner="other-worker"))
+            await db.commit()
+        for step in range(20):
+            progress.append(step)
+            await asyncio.sleep(0.1)
+
+    assert run(scheduler.run_leased_job("job", timedelta(hours=1), job))
+
+    assert len(progress) < 20
+    lease = run(_lease(session))
+    # The new holder's claim is left as it is
+    assert (lease.owner, lease.run_count) == ("other-worker", 0)
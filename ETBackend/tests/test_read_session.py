@@ -0,0 +1,48 @@
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import sync as crud_sync
+from app.db.database import Base, DATABASE_URL
+from app.models.models import User
+from tests.conftest import run
+
+REPLICA_URL = DATABASE_URL.replace("test.db", "replica.db")
+
+
+async def _with_replica(session, replica_version, primary_version=3):
+    """Copy the user row to a separate 'replica' database at an older or equal version."""
+    replica_engine = create_async_engine(REPLICA_URL)
+    Replica = sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with replica_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        async with session() as db, Replica() as replica:
+            db.add(User(id=1, email="u@example.com", password_hash="x", name="U", sync_version=primary_version))
+            replica.add(User(id=1, email="u@example.com", password_hash="x", name="U", sync_version=replica_version))
+            await db.commit()
+            await replica.commit()
+            version, chosen = await crud_sync.read_session(db, replica, 1)
+            return version, chosen is replica
+    finally:
+        await replica_engine.dispose()
+
+
+def test_lagging_replica_reads_from_the_primary(session):
+    assert run(_with_replica(session, replica_version=2)) == (3, False)
+
+
+def test_caught_up_replica_serves_the_read(session):
+    assert run(_with_replica(session, replica_version=3)) == (3, True)
+
+
+def test_without_a_replica_the_primary_serves_the_read(session):
+    async def check():
+        async with session() as db:
+            db.add(User(id=1, email="u@example.com", password_hash="x", name="U", sync_version=5))
+            await db.commit()
+            async with session() as read_db:
+                version, chosen = await crud_sync.read_session(db, read_db, 1)
+                return version, chosen is db
+
+    assert run(check()) == (5, True)
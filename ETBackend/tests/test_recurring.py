@@ -0,0 +1,96 @@
+from datetime import datetime
+from sqlalchemy.future import select
+
+from app.models.models import RecurringTransaction, Transaction, Wallet
+from app.utils import scheduler
+from tests.conftest import run
+
+NOW = datetime(2026, 3, 10, 12)
+
+
+def _template(client, date="2026-01-31T09:00:00"):
+    wallet_id = client.post("/api/v1/wallets/", json={"name": "Cash", "type": "cash", "balance": 100}).json()["id"]
+    category_id = client.post("/api/v1/categories/", json={"name": "Rent", "type": "expense"}).json()["id"]
+    return client.post("/api/v1/transactions/", json={
+        "category_id": category_id, "wallet_id": wallet_id, "type": "expense", "amount": 10, "note": "rent", "date": date,
+    }).json()
+
+
+async def _add_rules(session, template, frequency, next_run_dates):
+    async with session() as db:
+        db.add_all([
+            RecurringTransaction(
+                user_id=template["user_id"], frequency=frequency, next_run_date=next_run_date,
+                template_transaction_id=template["id"],
+            )
+            for next_run_date in next_run_dates
+        ])
+        await db.commit()
+
+
+async def _state(session):
+    async with session() as db:
+        dates = (await db.execute(
+            select(Transaction.date).filter(Transaction.note == "Recurring: rent").order_by(Transaction.date)
+        )).scalars().all()
+        next_runs = (await db.execute(
+            select(RecurringTransaction.next_run_date).order_by(RecurringTransaction.id)
+        )).scalars().all()
+        balance = (await db.execute(select(Wallet.balance))).scalar_one()
+        return dates, next_runs, balance
+
+
+def test_monthly_rules_keep_their_day_of_month(client, session):
+    template = _template(client)
+    run(_add_rules(session, template, "monthly", [datetime(2026, 1, 31, 9)]))
+
+    stats = run(scheduler.process_recurring_transactions(now=NOW))
+
+    dates, next_runs, balance = run(_state(session))
+    assert dates == [datetime(2026, 1, 31, 9), datetime(2026, 2, 28, 9)]
+    assert next_runs == [datetime(2026, 3, 31, 9)]
+    assert stats == {"rules": 1, "transactions": 2, "users": 1}
+    assert balance == 100 - 10 - 20
+
+
+def test_catch_up_is_capped_per_run_and_resumes(client, session, monkeypatch):
+    monkeypatch.setattr(scheduler, "RECURRING_MAX_CATCH_UP", 3)
+    template = _template(client)
+    run(_add_rules(session, template, "daily", [datetime(2026, 3, 1, 9)]))
+
+    first = run(scheduler.process_recurring_transactions(now=NOW))
+    dates, next_runs, _ = run(_state(session))
+    assert first["transactions"] == 3
+    assert next_runs == [datetime(2026, 3, 4, 9)]
+
+    # Nothing is created twice and the backlog (Mar 1-10) drains over later runs
+    while run(scheduler.process_recurring_transactions(now=NOW))["transactions"]:
+        pass
+    dates, next_runs, _ = run(_state(session))
+    assert dates == [datetime(2026, 3, day, 9) for day in range(1, 11)]
+    assert next_runs == [datetime(2026, 3, 11, 9)]
+
+
+def test_rules_are_processed_in_chunks(client, session, monkeypatch):
+    monkeypatch.setattr(scheduler, "RECURRING_CHUNK_SIZE", 2)
+    template = _template(client)
+    run(_add_rules(session, template, "weekly", [datetime(2026, 3, day, 9) for day in range(1, 6)]))
+
+    stats = run(scheduler.process_recurring_transactions(now=NOW))
+
+    dates, next_runs, _ = run(_state(session))
+    # Rules due Mar 1-3 also fell due again a week later
+    assert stats == {"rules": 5, "transactions": 8, "users": 1}
+    assert len(dates) == 8
+    assert next_runs == [datetime(2026, 3, day, 9) for day in (15, 16, 17, 11, 12)]
+
+
+def test_user_range_limits_the_run(client, session):
+    template = _template(client)
+    run(_add_rules(session, template, "daily", [datetime(2026, 3, 10, 9)]))
+
+    outside = run(scheduler.process_recurring_transactions(now=NOW, user_range=(template["user_id"] + 1, template["user_id"] + 10)))
+    inside = run(scheduler.process_recurring_transactions(now=NOW, user_range=(template["user_id"], template["user_id"])))
+
+    assert outside["rules"] == 0
+    assert inside["rules"] == 1
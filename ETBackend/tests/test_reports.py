@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from app.core.cache import report_cache
+from app.crud import rollups
+
+
+def _add_expense(client, amount, date):
+    category = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()
+    response = client.post("/api/v1/transactions/", json={
+        "category_id": category["id"], "type": "expense", "amount": amount, "date": date,
+    })
+    assert response.status_code == 200, response.text
+
+
+def _cache_keys():
+    return sorted(key for _, key in report_cache.backend._entries._entries)
+
+
+def test_timeseries_default_range_is_cached_across_calls(client, monkeypatch):
+    calls = []
+    original = rollups.get_daily_type_totals
+
+    async def counting(*args, **kwargs):
+        calls.append(args)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(rollups, "get_daily_type_totals", counting)
+
+    first = client.get("/api/v1/reports/timeseries")
+    second = client.get("/api/v1/reports/timeseries")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(calls) == 1
+    (key,) = _cache_keys()
+    today = datetime.utcnow().date().isoformat()
+    assert key.endswith(f"{today}T23:59:59.999999")
+    assert "T00:00:00:" in key
+
+
+def test_timeseries_month_default_starts_on_a_month_boundary(client):
+    response = client.get("/api/v1/reports/timeseries", params={"granularity": "month"})
+
+    assert response.status_code == 200
+    (key,) = _cache_keys()
+    start = key.split(":", 3)[3][:10]
+    assert start.endswith("-01")
+
+
+def test_timeseries_accepts_utc_start_without_end(client):
+    _add_expense(client, 40, "2026-03-05T10:00:00")
+
+    response = client.get("/api/v1/reports/timeseries", params={"start_date": "2026-03-01T00:00:00Z"})
+
+    assert response.status_code == 200
+
+
+def test_timeseries_aware_and_naive_bounds_share_a_cache_entry(client):
+    aware = client.get("/api/v1/reports/timeseries", params={
+        "start_date": "2026-03-01T05:30:00+05:30", "end_date": "2026-03-31T00:00:00",
+    })
+    naive = client.get("/api/v1/reports/timeseries", params={
+        "start_date": "2026-03-01T00:00:00", "end_date": "2026-03-31T00:00:00Z",
+    })
+
+    assert aware.status_code == naive.status_code == 200
+    assert _cache_keys() == ["timeseries:day:7@0:2026-03-01T00:00:00:2026-03-31T00:00:00"]
+
+
+def test_timeseries_rejects_unparseable_dates(client):
+    response = client.get("/api/v1/reports/timeseries", params={"start_date": "last tuesday"})
+
+    assert response.status_code == 400
+
+
+def test_report_cache_is_keyed_on_the_users_version(client):
+    first = client.get("/api/v1/reports/summary", params={"period": "all"}).json()
+    _add_expense(client, 25, "2026-03-05T10:00:00")
+    # Drop the write's invalidation, as if another worker had cached the first result
+    report_cache.backend._entries.set((1, report_cache.make_key("summary", 0, None, None)), first)
+
+    second = client.get("/api/v1/reports/summary", params={"period": "all"}).json()
+
+    assert first["total_expenses"] == 0
+    assert second["total_expenses"] == 25
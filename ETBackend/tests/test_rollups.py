@@ -0,0 +1,130 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy.future import select
+
+from app.crud.rollups import split_range
+from app.models.models import MonthlyCategoryTotal
+from tests.conftest import run
+
+MARCH = 2026 * 12 + 3
+
+
+def test_split_range_whole_months_between_partial_edges():
+    start, end = datetime(2026, 1, 15), datetime(2026, 5, 10, 12)
+
+    months, edges = split_range(start, end)
+
+    assert months == (2026 * 12 + 2, 2026 * 12 + 4)
+    assert edges == [(start, datetime(2026, 2, 1), None), (datetime(2026, 5, 1), None, end)]
+
+
+def test_split_range_month_aligned_start_has_no_leading_edge():
+    months, edges = split_range(datetime(2026, 3, 1), datetime(2026, 4, 2))
+
+    assert months == (MARCH, MARCH)
+    assert edges == [(datetime(2026, 4, 1), None, datetime(2026, 4, 2))]
+
+
+def test_split_range_within_one_month_is_a_single_raw_edge():
+    start, end = datetime(2026, 3, 3), datetime(2026, 3, 20)
+
+    assert split_range(start, end) == (None, [(start, None, end)])
+
+
+def test_split_range_open_ended():
+    assert split_range(None, None) == ((None, None), [])
+    months, edges = split_range(datetime(2026, 3, 1), None)
+    assert months == (MARCH, None)
+    assert edges == []
+
+
+def test_split_range_december_rolls_into_next_year():
+    months, edges = split_range(datetime(2025, 12, 10), datetime(2026, 2, 5))
+
+    assert months == (2026 * 12 + 1, 2026 * 12 + 1)
+    assert edges[0] == (datetime(2025, 12, 10), datetime(2026, 1, 1), None)
+
+
+@pytest.mark.parametrize("start, end", [
+    (datetime(2026, 1, 15, tzinfo=timezone.utc), datetime(2026, 5, 10)),
+    (datetime(2026, 1, 15), datetime(2026, 5, 10, tzinfo=timezone.utc)),
+    (datetime(2026, 1, 15, 5, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))), datetime(2026, 5, 10)),
+])
+def test_split_range_mixed_awareness_is_normalized_to_naive_utc(start, end):
+    months, edges = split_range(start, end)
+
+    assert months == (2026 * 12 + 2, 2026 * 12 + 4)
+    assert edges == [
+        (datetime(2026, 1, 15), datetime(2026, 2, 1), None),
+        (datetime(2026, 5, 1), None, datetime(2026, 5, 10)),
+    ]
+
+
+def _seed(client):
+    food = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()
+    pay = client.post("/api/v1/categories/", json={"name": "Pay", "type": "income"}).json()
+    for category, kind, amount, date in [
+        (food, "expense", 10, "2026-01-10T09:00:00"),  # before the range
+        (food, "expense", 20, "2026-01-20T09:00:00"),  # leading partial month
+        (food, "expense", 30, "2026-02-14T09:00:00"),  # whole month
+        (pay, "income", 500, "2026-03-01T00:00:00"),   # whole month
+        (food, "expense", 40, "2026-04-02T09:00:00"),  # trailing partial month
+        (food, "expense", 50, "2026-04-20T09:00:00"),  # after the range
+    ]:
+        response = client.post("/api/v1/transactions/", json={
+            "category_id": category["id"], "type": kind, "amount": amount, "date": date,
+        })
+        assert response.status_code == 200, response.text
+
+
+def test_summary_matches_raw_totals_across_month_edges(client):
+    _seed(client)
+
+    response = client.get("/api/v1/reports/summary", params={
+        "start_date": "2026-01-15T00:00:00Z", "end_date": "2026-04-10T00:00:00",
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {"total_income": 500, "total_expenses": 90, "total_balance": 410}
+
+
+def test_category_breakdown_with_aware_end_and_naive_start(client):
+    _seed(client)
+
+    response = client.get("/api/v1/reports/category-breakdown", params={
+        "start_date": "2026-01-15T00:00:00", "end_date": "2026-04-10T05:30:00+05:30",
+    })
+
+    assert response.status_code == 200
+    assert response.json()["total_spent"] == 90
+
+
+def _month_totals(session):
+    async def load():
+        async with session() as db:
+            result = await db.execute(select(MonthlyCategoryTotal.year, MonthlyCategoryTotal.month, MonthlyCategoryTotal.total))
+            return sorted(tuple(row) for row in result.all() if row.total)
+    return run(load())
+
+
+def test_offset_dates_are_stored_and_rolled_up_as_utc(client, session):
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+    late_march = "2026-03-31T22:00:00-05:00"
+
+    created = client.post("/api/v1/transactions/", json={
+        "category_id": category_id, "type": "expense", "amount": 10, "date": late_march,
+    }).json()
+    client.post("/api/v1/transactions/batch", json={"operations": [{"op_id": "op-1", "action": "create", "data": {
+        "category_id": category_id, "type": "expense", "amount": 5, "date": late_march,
+    }}]})
+
+    assert created["date"].startswith("2026-04-01T03:00:00")
+    assert _month_totals(session) == [(2026, 4, 15.0)]
+    april = client.get("/api/v1/reports/summary", params={"start_date": "2026-04-01T00:00:00Z", "end_date": "2026-04-30T23:59:59Z"})
+    assert april.json()["total_expenses"] == 15
+
+    client.put(f"/api/v1/transactions/{created['id']}", json={
+        "category_id": category_id, "type": "expense", "amount": 10, "date": "2026-03-15T23:30:00-01:00",
+    })
+    assert _month_totals(session) == [(2026, 3, 10.0), (2026, 4, 5.0)]
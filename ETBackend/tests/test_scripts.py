@@ -0,0 +1,13 @@
+from scripts import explain_queries
+from tests.conftest import run
+
+
+def test_explain_queries_runs_the_report_handlers(client, capsys):
+    client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"})
+
+    # SQLite may plan full scans on near-empty tables; only the run itself is checked here
+    assert run(explain_queries.main(1)) in (0, 1)
+
+    output = capsys.readouterr().out
+    assert "queries checked" in output
+    assert "monthly_category_totals" in output
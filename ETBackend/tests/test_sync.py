@@ -0,0 +1,79 @@
+import importlib.util
+import os
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app.models.models import User, Wallet, Category, Transaction, Budget, TransactionType, WalletType
+from tests.conftest import run
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), os.pardir, "migrations", "versions")
+
+
+def _load_migration(filename):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(MIGRATIONS, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _seed_unversioned(session):
+    """Rows as migration 9c3a1d5e7b20 left them: version 0, user at sync_version 0."""
+    async with session() as db:
+        user = (await db.execute(select(User))).scalar_one()
+        wallet = Wallet(user_id=user.id, name="Cash", type=WalletType.CASH, balance=100.0, version=0)
+        category = Category(user_id=user.id, name="Snacks", type=TransactionType.EXPENSE, version=0)
+        db.add_all([wallet, category])
+        await db.flush()
+        db.add(Transaction(user_id=user.id, category_id=category.id, wallet_id=wallet.id,
+                           type=TransactionType.EXPENSE, amount=12.5, note="chips", version=0))
+        db.add(Budget(user_id=user.id, category_id=category.id, monthly_limit=50, month=1, year=2026, version=0))
+        await db.execute(update(User).where(User.id == user.id).values(sync_version=0))
+        await db.commit()
+
+
+def test_first_sync_includes_unversioned_rows(client, session):
+    run(_seed_unversioned(session))
+
+    body = client.get("/api/v1/sync/", params={"since": 0}).json()
+
+    assert [t["note"] for t in body["transactions"]] == ["chips"]
+    assert [w["name"] for w in body["wallets"]] == ["Cash"]
+    assert "Snacks" in [c["name"] for c in body["categories"]]
+    assert len(body["budgets"]) == 1
+
+
+def test_backfill_migration_makes_rows_visible_to_delta_sync(client, session):
+    # A client that synced after a post-migration write, and so never saw the old rows
+    client.post("/api/v1/wallets/", json={"name": "Bank", "type": "bank", "balance": 0})
+    run(_seed_unversioned(session))
+    run(_stamp_user_version(session, 1))
+    assert client.get("/api/v1/sync/", params={"since": 1}).json()["transactions"] == []
+
+    migration = _load_migration("7d4f1b9e3c52_backfill_sync_versions.py")
+    run(_upgrade(session, migration))
+
+    body = client.get("/api/v1/sync/", params={"since": 1}).json()
+    assert body["version"] == 2
+    assert [t["note"] for t in body["transactions"]] == ["chips"]
+    assert [w["name"] for w in body["wallets"]] == ["Cash"]
+    assert len(body["budgets"]) == 1
+
+
+async def _stamp_user_version(session, version):
+    async with session() as db:
+        await db.execute(update(User).values(sync_version=version))
+        await db.execute(update(Wallet).where(Wallet.name == "Bank").values(version=version))
+        await db.commit()
+
+
+async def _upgrade(session, migration):
+    def upgrade(connection):
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+    async with session() as db:
+        await db.run_sync(lambda sync_session: upgrade(sync_session.connection()))
+        await db.commit()
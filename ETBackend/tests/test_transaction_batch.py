@@ -0,0 +1,108 @@
+from sqlalchemy import event, func
+from sqlalchemy.future import select
+
+from app.db.database import engine
+from app.models.models import ClientOperation, Transaction, User
+from tests.conftest import run
+
+
+def _category(client):
+    return client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+
+
+def _create(op_id, category_id, amount=10):
+    return {"op_id": op_id, "action": "create", "data": {"category_id": category_id, "type": "expense", "amount": amount}}
+
+
+def _batch(client, *operations):
+    response = client.post("/api/v1/transactions/batch", json={"operations": list(operations)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _count(session, model):
+    async with session() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+def test_applied_operation_is_replayed_not_repeated(client, session):
+    category_id = _category(client)
+
+    first = _batch(client, _create("op-1", category_id))
+    second = _batch(client, _create("op-1", category_id))
+
+    assert first[0]["status"] == "applied" and not first[0]["replayed"]
+    assert second[0] == {**first[0], "replayed": True}
+    assert run(_count(session, Transaction)) == 1
+
+
+def test_failed_operation_can_be_retried(client, session):
+    failed = _batch(client, _create("op-1", 999))
+    assert failed[0]["status"] == "failed"
+    assert run(_count(session, ClientOperation)) == 0
+
+    retried = _batch(client, _create("op-1", _category(client)))
+
+    assert retried[0]["status"] == "applied"
+    assert retried[0]["replayed"] is False
+    assert run(_count(session, Transaction)) == 1
+
+
+def test_failure_recorded_by_older_versions_is_retried(client, session):
+    async def record_failure():
+        async with session() as db:
+            user_id = (await db.execute(select(User.id))).scalar_one()
+            db.add(ClientOperation(user_id=user_id, op_id="op-1", action="create", status="failed", error="Unknown category 999"))
+            await db.commit()
+
+    run(record_failure())
+
+    retried = _batch(client, _create("op-1", _category(client)))
+
+    assert retried[0]["status"] == "applied"
+    assert run(_count(session, ClientOperation)) == 1
+
+
+def test_mixed_batch_records_only_applied_operations(client, session):
+    category_id = _category(client)
+
+    results = _batch(
+        client,
+        _create("op-1", category_id),
+        _create("op-2", 999),
+        {"op_id": "op-3", "action": "delete", "id": 12345},
+        _create("op-1", category_id),
+    )
+
+    assert [r["status"] for r in results] == ["applied", "failed", "failed", "failed"]
+    assert results[3]["error"] == "Duplicate op_id in batch"
+    assert run(_count(session, ClientOperation)) == 1
+
+
+def test_creates_are_one_insert_and_ids_follow_operation_order(client):
+    category_id = _category(client)
+    existing = _batch(client, _create("seed-1", category_id, 1), _create("seed-2", category_id, 2))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        results = _batch(
+            client,
+            _create("op-1", category_id, 10),
+            {"op_id": "op-2", "action": "update", "id": existing[0]["id"], "data": {"category_id": category_id, "type": "expense", "amount": 11}},
+            _create("op-3", category_id, 12),
+            {"op_id": "op-4", "action": "delete", "id": existing[1]["id"]},
+            _create("op-5", category_id, 13),
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert [r["status"] for r in results] == ["applied"] * 5
+    assert len([s for s in statements if s.lstrip().upper().startswith("INSERT INTO TRANSACTIONS")]) == 1
+    listed = {row["id"]: row["amount"] for row in client.get("/api/v1/transactions/").json()}
+    assert listed == {
+        results[0]["id"]: 10, existing[0]["id"]: 11, results[2]["id"]: 12, results[4]["id"]: 13,
+    }
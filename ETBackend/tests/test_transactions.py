@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+import pytest
+
+
+def _seed(client, count):
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+    base = datetime(2026, 3, 1, 12)
+    operations = [
+        # Pairs share a timestamp, so pages must break ties on id
+        {"op_id": f"op-{n}", "action": "create", "data": {
+            "category_id": category_id, "type": "expense", "amount": n + 1,
+            "date": (base + timedelta(hours=n // 2)).isoformat(),
+        }}
+        for n in range(count)
+    ]
+    response = client.post("/api/v1/transactions/batch", json={"operations": operations})
+    assert all(result["status"] == "applied" for result in response.json())
+
+
+def _all_pages(client, limit, **params):
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/v1/transactions/", params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_cursor_pages_cover_every_row_once_newest_first(client):
+    _seed(client, 11)
+
+    pages = _all_pages(client, limit=4)
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    rows = [row for page in pages for row in page]
+    assert len({row["id"] for row in rows}) == 11
+    keys = [(row["date"], row["id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_full_page_has_no_next_cursor(client):
+    _seed(client, 4)
+
+    response = client.get("/api/v1/transactions/", params={"limit": 4})
+
+    assert len(response.json()) == 4
+    assert "x-next-cursor" not in response.headers
+
+
+def test_cursor_paging_honours_filters(client):
+    _seed(client, 10)
+
+    pages = _all_pages(client, limit=3, min_amount=6)
+
+    assert sorted(row["amount"] for page in pages for row in page) == [6, 7, 8, 9, 10]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/v1/transactions/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_count_is_not_capped_by_the_page_size(client):
+    _seed(client, 60)
+
+    assert len(client.get("/api/v1/transactions/").json()) == 50
+    assert client.get("/api/v1/transactions/count").json() == {"count": 60}
+    assert client.get("/api/v1/transactions/count", params={"min_amount": 51}).json() == {"count": 10}
+
+
+def test_csv_export_streams_every_row(client):
+    _seed(client, 6)
+    response = client.get("/api/v1/transactions/export", params={"format": "csv"})
+
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,date,type,amount")
+    assert len(lines) == 7
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_columnar_exports_hold_naive_utc_dates(client, format):
+    pa = pytest.importorskip("pyarrow")
+    _seed(client, 4)
+    response = client.get("/api/v1/transactions/export", params={"format": format})
+
+    assert response.status_code == 200
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(pa.BufferReader(response.content))
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 4
+    assert table.schema.field("date").type == pa.timestamp("us")
+    assert table.column("date").to_pylist()[0] == datetime(2026, 3, 1, 12)
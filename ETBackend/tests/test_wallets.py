@@ -0,0 +1,68 @@
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app.crud import wallets as crud_wallets
+from app.models.models import User, Wallet
+from tests.conftest import run
+
+
+def _wallet_with_expense(client, balance, amount):
+    wallet = client.post("/api/v1/wallets/", json={"name": "Cash", "type": "cash", "balance": balance}).json()
+    category_id = client.post("/api/v1/categories/", json={"name": "Food", "type": "expense"}).json()["id"]
+    client.post("/api/v1/transactions/", json={
+        "category_id": category_id, "wallet_id": wallet["id"], "type": "expense", "amount": amount,
+    })
+    return wallet["id"]
+
+
+async def _reconcile(session, **changes):
+    async with session() as db:
+        if changes:
+            await db.execute(update(Wallet).values(**changes))
+            await db.commit()
+        before = (await db.execute(select(User.sync_version))).scalar_one()
+        outcome = await crud_wallets.reconcile_balances(db, after_id=0, limit=100)
+        balance, wallet_version = (await db.execute(select(Wallet.balance, Wallet.version))).one()
+        after = (await db.execute(select(User.sync_version))).scalar_one()
+        return outcome, balance, wallet_version, before, after
+
+
+def test_reconcile_repairs_drift_and_stamps_a_new_version(client, session):
+    wallet_id = _wallet_with_expense(client, 100, 30)
+
+    outcome, balance, wallet_version, before, after = run(_reconcile(session, balance=12.0))
+
+    assert outcome == (wallet_id, 1, 1)
+    assert balance == 70
+    assert after == before + 1
+    assert wallet_version == after
+
+
+def test_reconcile_leaves_consistent_wallets_and_versions_alone(client, session):
+    wallet_id = _wallet_with_expense(client, 100, 30)
+
+    outcome, balance, _, before, after = run(_reconcile(session))
+
+    assert outcome == (wallet_id, 1, 0)
+    assert balance == 70
+    assert after == before
+
+
+def test_reconcile_skips_suspects_settled_before_the_lock(client, session, monkeypatch):
+    wallet_id = _wallet_with_expense(client, 100, 30)
+    ledger = crud_wallets._ledger
+    calls = []
+
+    async def settled_after_first_look(db, wallet_ids):
+        calls.append(wallet_ids)
+        totals = await ledger(db, wallet_ids)
+        # The unlocked pass sees drift; by the locked re-check a writer has fixed it
+        return {id_: total + 5 for id_, total in totals.items()} if len(calls) == 1 else totals
+
+    monkeypatch.setattr(crud_wallets, "_ledger", settled_after_first_look)
+    outcome, balance, _, before, after = run(_reconcile(session))
+
+    assert len(calls) == 2
+    assert outcome == (wallet_id, 1, 0)
+    assert balance == 70
+    assert after == before
@@ -69,3 +69,13 @@ export const useBudgets = () => {
         },
     });
 };
+
+export const useBudgetProgress = (year, month) => {
+    return useQuery({
+        queryKey: ['budgets', 'progress', year, month],
+        queryFn: async () => {
+            const response = await apiClient.get('/budgets/progress', { params: { year, month } });
+            return response.data;
+        },
+    });
+};
@@ -1,16 +1,63 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import apiClient from '../services/api';
 
-export const useTransactions = () => {
+export const useRecentTransactions = (limit = 5) => {
     return useQuery({
-        queryKey: ['transactions'],
+        queryKey: ['transactions', 'recent', limit],
         queryFn: async () => {
-            const response = await apiClient.get('/transactions/');
+            const response = await apiClient.get('/transactions/', { params: { limit } });
             return response.data;
         },
     });
 };
 
+// The list endpoint is paged; totals come from the count endpoint
+export const useTransactionCount = (filters = {}) => {
+    return useQuery({
+        queryKey: ['transactions', 'count', filters],
+        queryFn: async () => {
+            const response = await apiClient.get('/transactions/count', { params: filters });
+            return response.data.count;
+        },
+    });
+};
+
+export const useTransactionPages = (filters = {}) => {
+    return useInfiniteQuery({
+        queryKey: ['transactions', 'pages', filters],
+        queryFn: async ({ pageParam }) => {
+            const params = { ...filters, limit: 50 };
+            if (pageParam) params.cursor = pageParam;
+            const response = await apiClient.get('/transactions/', { params });
+            return {
+                items: response.data,
+                nextCursor: response.headers['x-next-cursor'] || null,
+            };
+        },
+        initialPageParam: null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+    });
+};
+
+export const useTransactionSearch = (query, filters = {}) => {
+    const q = query.trim();
+    return useInfiniteQuery({
+        queryKey: ['transactions', 'search', q, filters],
+        queryFn: async ({ pageParam }) => {
+            const params = { ...filters, q, limit: 20, offset: pageParam };
+            const response = await apiClient.get('/transactions/search', { params });
+            const nextOffset = response.headers['x-next-offset'];
+            return {
+                items: response.data,
+                nextOffset: nextOffset ? Number(nextOffset) : null,
+            };
+        },
+        initialPageParam: 0,
+        getNextPageParam: (lastPage) => lastPage.nextOffset,
+        enabled: q.length > 0,
+    });
+};
+
 export const useUpdateTransaction = () => {
     const queryClient = useQueryClient();
     return useMutation({
@@ -21,6 +68,7 @@ export const useUpdateTransaction = () => {
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['transactions'] });
             queryClient.invalidateQueries({ queryKey: ['summary'] });
+            queryClient.invalidateQueries({ queryKey: ['budgets'] });
         },
     });
 };
@@ -36,6 +84,7 @@ export const useAddTransaction = () => {
             queryClient.invalidateQueries({ queryKey: ['transactions'] });
             queryClient.invalidateQueries({ queryKey: ['wallets'] });
             queryClient.invalidateQueries({ queryKey: ['summary'] });
+            queryClient.invalidateQueries({ queryKey: ['budgets'] });
         },
     });
 };
@@ -50,6 +99,7 @@ export const useDeleteTransaction = () => {
             queryClient.invalidateQueries({ queryKey: ['transactions'] });
             queryClient.invalidateQueries({ queryKey: ['wallets'] });
             queryClient.invalidateQueries({ queryKey: ['summary'] });
+            queryClient.invalidateQueries({ queryKey: ['budgets'] });
         },
     });
 };
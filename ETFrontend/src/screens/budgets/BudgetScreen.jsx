@@ -1,26 +1,27 @@
 import React from 'react';
 import { View, Text, StyleSheet, FlatList, ActivityIndicator } from 'react-native';
-import { useBudgets } from '../../hooks/useData';
+import { useBudgetProgress } from '../../hooks/useData';
 import COLORS from '../../utils/theme';
 
 const BudgetScreen = () => {
-    const { data: budgets, isLoading } = useBudgets();
+    const now = new Date();
+    const { data: budgets, isLoading } = useBudgetProgress(now.getFullYear(), now.getMonth() + 1);
 
     const renderBudget = ({ item }) => {
-        const spent = Math.random() * item.monthly_limit;
-        const progress = Math.min(spent / item.monthly_limit, 1);
+        const spent = item.spent;
+        const progress = Math.min(item.percentage / 100, 1);
 
         return (
             <View style={styles.budgetCard}>
                 <View style={styles.budgetHeader}>
-                    <Text style={styles.categoryName}>Category ID: {item.category_id}</Text>
+                    <Text style={styles.categoryName}>{item.category_name || `Category ID: ${item.category_id}`}</Text>
                     <Text style={styles.amountText}>${spent.toFixed(0)} / ${item.monthly_limit}</Text>
                 </View>
                 <View style={styles.progressBarContainer}>
                     <View style={[styles.progressBar, { width: `${progress * 100}%`, backgroundColor: progress > 0.8 ? COLORS.expense : COLORS.income }]} />
                 </View>
                 <Text style={styles.remainingText}>
-                    {progress >= 1 ? 'Budget Exceeded!' : `$${(item.monthly_limit - spent).toFixed(0)} remaining`}
+                    {progress >= 1 ? 'Budget Exceeded!' : `$${item.remaining.toFixed(0)} remaining`}
                 </Text>
             </View>
         );
@@ -16,18 +16,17 @@ import {
     PlusIcon
 } from '../../assets/icons';
 import { useSummary, useCategories } from '../../hooks/useData';
-import { useTransactions } from '../../hooks/useTransactions';
+import { useRecentTransactions, useTransactionCount } from '../../hooks/useTransactions';
 import { useAuthStore } from '../../store/authStore';
 
 const DashboardScreen = ({ navigation }) => {
     const { data: summary } = useSummary();
-    const { data: transactions } = useTransactions();
+    const { data: recentTransactions = [] } = useRecentTransactions(5);
+    const { data: transactionCount = 0 } = useTransactionCount();
     const { data: categories } = useCategories();
     const { user } = useAuthStore();
     const [selectedReceipt, setSelectedReceipt] = React.useState(null);
 
-    const recentTransactions = transactions?.slice(0, 5) || [];
-
     return (
         <SafeAreaView style={styles.safeArea} edges={['top']}>
             <ScrollView style={styles.container} showsVerticalScrollIndicator={false}>
@@ -124,7 +123,7 @@ const DashboardScreen = ({ navigation }) => {
                     </View>
                     <View style={styles.statCard}>
                         <ClockIcon size={24} color={COLORS.cream} />
-                        <Text style={styles.statValue}>{transactions?.length || 0}</Text>
+                        <Text style={styles.statValue}>{transactionCount}</Text>
                         <Text style={styles.statLabel}>Transactions</Text>
                     </View>
                 </View>
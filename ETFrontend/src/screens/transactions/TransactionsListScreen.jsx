@@ -14,7 +14,7 @@ import {
     FilterIcon,
     IconMap
 } from '../../assets/icons';
-import { useTransactions, useDeleteTransaction } from '../../hooks/useTransactions';
+import { useTransactionPages, useDeleteTransaction } from '../../hooks/useTransactions';
 import { useCategories, useSummary } from '../../hooks/useData';
 import { APP_CONFIG } from '../../utils/config';
 import { Swipeable, GestureHandlerRootView } from 'react-native-gesture-handler';
@@ -23,10 +23,16 @@ import { PencilIcon, TrashIcon } from '../../assets/icons';
 import COLORS from '../../utils/theme';
 
 const TransactionsListScreen = ({ navigation }) => {
-    const { data: transactions, isLoading: isTxLoading } = useTransactions();
+    const [activeTab, setActiveTab] = useState('all');
+    const {
+        data,
+        isLoading: isTxLoading,
+        fetchNextPage,
+        hasNextPage,
+        isFetchingNextPage,
+    } = useTransactionPages(activeTab === 'all' ? {} : { type: activeTab });
     const { data: categories } = useCategories();
     const deleteTransactionMutation = useDeleteTransaction();
-    const [activeTab, setActiveTab] = useState('all');
     const [selectedReceipt, setSelectedReceipt] = useState(null);
 
     const handleDelete = (tx) => {
@@ -40,14 +46,19 @@ const TransactionsListScreen = ({ navigation }) => {
         );
     };
 
+    // Pages arrive newest first and already filtered by type on the server
     const filteredTransactions = useMemo(() => {
-        if (!transactions) return [];
-        let filtered = transactions;
-        if (activeTab !== 'all') {
-            filtered = transactions.filter(t => t.type === activeTab);
+        if (!data) return [];
+        return data.pages.flatMap(page => page.items);
+    }, [data]);
+
+    const handleScroll = ({ nativeEvent }) => {
+        const { layoutMeasurement, contentOffset, contentSize } = nativeEvent;
+        const nearBottom = layoutMeasurement.height + contentOffset.y >= contentSize.height - 300;
+        if (nearBottom && hasNextPage && !isFetchingNextPage) {
+            fetchNextPage();
         }
-        return [...filtered].sort((a, b) => new Date(b.date) - new Date(a.date));
-    }, [transactions, activeTab]);
+    };
 
     const groupedTransactions = useMemo(() => {
         const groups = {};
@@ -177,7 +188,12 @@ const TransactionsListScreen = ({ navigation }) => {
                     ))}
                 </View>
 
-                <ScrollView style={styles.content} showsVerticalScrollIndicator={false}>
+                <ScrollView
+                    style={styles.content}
+                    showsVerticalScrollIndicator={false}
+                    onScroll={handleScroll}
+                    scrollEventThrottle={200}
+                >
                     {filteredTransactions.length === 0 ? (
                         <View style={styles.emptyState}>
                             <ClockIcon size={48} color={COLORS.textMuted} />
@@ -191,6 +207,9 @@ const TransactionsListScreen = ({ navigation }) => {
                             </View>
                         ))
                     )}
+                    {isFetchingNextPage && (
+                        <ActivityIndicator style={{ marginTop: 16 }} color={COLORS.primary} />
+                    )}
                     <View style={{ height: 100 }} />
                 </ScrollView>
 
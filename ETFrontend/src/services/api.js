@@ -9,6 +9,12 @@ const apiClient = axios.create({
     },
 });
 
+// Last ETag-tagged response per GET URL; unchanged collections come back as an empty 304
+const MAX_ETAG_ENTRIES = 50;
+const etagCache = new Map();
+
+const cacheKey = (config) => apiClient.getUri(config);
+
 apiClient.interceptors.request.use(async (config) => {
     // Get token synchronously from the store
     const token = useAuthStore.getState().accessToken;
@@ -17,6 +23,13 @@ apiClient.interceptors.request.use(async (config) => {
         config.headers.Authorization = `Bearer ${token}`;
     }
 
+    if (config.method === 'get') {
+        const cached = etagCache.get(cacheKey(config));
+        if (cached) {
+            config.headers['If-None-Match'] = cached.etag;
+        }
+    }
+
     console.log(`[API Request] ${config.method?.toUpperCase()} ${config.url}`);
     return config;
 }, (error) => {
@@ -25,6 +38,15 @@ apiClient.interceptors.request.use(async (config) => {
 
 apiClient.interceptors.response.use(
     (response) => {
+        const etag = response.headers?.etag;
+        if (response.config.method === 'get' && etag) {
+            const key = cacheKey(response.config);
+            etagCache.delete(key);
+            etagCache.set(key, { etag, data: response.data, headers: response.headers });
+            if (etagCache.size > MAX_ETAG_ENTRIES) {
+                etagCache.delete(etagCache.keys().next().value);
+            }
+        }
         return response;
     },
     async (error) => {
@@ -32,6 +54,13 @@ apiClient.interceptors.response.use(
         const status = error.response?.status;
         const url = originalRequest?.url || '';
 
+        if (status === 304 && originalRequest) {
+            const cached = etagCache.get(cacheKey(originalRequest));
+            if (cached) {
+                return { ...error.response, status: 200, data: cached.data, headers: { ...cached.headers, ...error.response.headers } };
+            }
+        }
+
         // If we get a 401 and it's NOT the login request
         if (status === 401 && !url.includes('/auth/login')) {
             const { logout, isAuthenticated } = useAuthStore.getState();